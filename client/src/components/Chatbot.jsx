@@ -15,6 +15,8 @@ const Chatbot = () => {
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const messagesEndRef = useRef(null);
+  // Conversation id from the server, sent back so follow-ups keep their context
+  const sessionIdRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -57,20 +59,60 @@ const Chatbot = () => {
     setInputMessage('');
     setIsLoading(true);
 
+    const botId = Date.now() + 1;
+    let streamStarted = false;
+
     try {
-      const { sendMessage } = await import('../services/api');
-      const response = await sendMessage(inputMessage);
-      
-      const botResponse = {
-        id: Date.now() + 1,
-        text: response.response,
-        sender: 'bot',
-        timestamp: new Date(),
-        source: response.source,
-        enhanced: response.enhanced_query
-      };
-      
-      setMessages(prev => [...prev, botResponse]);
+      const { sendMessage, streamMessage } = await import('../services/api');
+
+      try {
+        await streamMessage(inputMessage, {
+          sessionId: sessionIdRef.current,
+          onMeta: (meta) => {
+            if (meta.session_id) sessionIdRef.current = meta.session_id;
+            const botResponse = {
+              id: botId,
+              text: '',
+              sender: 'bot',
+              timestamp: new Date(),
+              source: meta.source,
+              enhanced: meta.enhanced_query
+            };
+            setMessages(prev => streamStarted
+              ? prev.map(m => m.id === botId ? { ...botResponse, text: '' } : m)
+              : [...prev, botResponse]);
+            streamStarted = true;
+          },
+          onToken: (delta) => {
+            setIsLoading(false);
+            setMessages(prev => prev.map(m => m.id === botId ? { ...m, text: m.text + delta } : m));
+          },
+          onDone: (timings) => {
+            if (import.meta.env.DEV) {
+              console.log('⏱️ Stream timings:', timings);
+            }
+          },
+          onError: (error) => {
+            setMessages(prev => prev.map(m => m.id === botId ? { ...m, text: `${m.text}\n\n${error.message}` } : m));
+          }
+        });
+      } catch (streamError) {
+        // Streaming not available (older backend or proxy buffering) - use the regular endpoint
+        if (streamStarted) throw streamError;
+        const response = await sendMessage(inputMessage, { sessionId: sessionIdRef.current });
+        if (response.session_id) sessionIdRef.current = response.session_id;
+
+        const botResponse = {
+          id: botId,
+          text: response.response,
+          sender: 'bot',
+          timestamp: new Date(),
+          source: response.source,
+          enhanced: response.enhanced_query
+        };
+
+        setMessages(prev => [...prev, botResponse]);
+      }
       setIsLoading(false);
     } catch (error) {
       console.error('Error sending message:', error);
@@ -89,6 +89,8 @@ export const chatService = {
       const payload = { 
         message
       };
+      // The server hands back a session id; sending it keeps the conversation's history
+      if (options.sessionId) payload.session_id = options.sessionId;
       
       // Use retry mechanism for chat requests
       return await retryRequest(async () => {
@@ -101,6 +103,52 @@ export const chatService = {
     }
   },
 
+  // Streaming chat endpoint (Server-Sent Events over a POST response)
+  streamMessage: async (message, { sessionId, onMeta, onToken, onDone, onError } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(sessionId ? { message, session_id: sessionId } : { message }),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Stream request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    const handleEvent = (rawEvent) => {
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (!data) return;
+
+      const payload = JSON.parse(data);
+      if (event === 'meta') onMeta?.(payload);
+      else if (event === 'token') onToken?.(payload.delta);
+      else if (event === 'done') onDone?.(payload);
+      else if (event === 'error') onError?.(payload);
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        handleEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+  },
+
   // Fireworks.ai only endpoint
   sendFireworksMessage: async (message) => {
     try {
@@ -226,4 +274,5 @@ export const chatService = {
 export default api;
 
 // Export the main sendMessage function for easy import
-export const sendMessage = chatService.sendMessage;
\ No newline at end of file
+export const sendMessage = chatService.sendMessage;
+export const streamMessage = chatService.streamMessage;
@@ -1,108 +1,209 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_cors import CORS
+import click
 import os
+import re
+import json
+import time
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
+from typing import Optional
 
-from services.fireworks_service import FireworksService
-from services.groq_service import GroqService
-from services.rule_based_chatbot import RuleBasedChatbot
+from services.app_services import AppServices
+from services.http_encoding import conditional, snapshot_response, versioned
+from services.logging_setup import KeyValues, configure_logging
+from services.metrics import CHAT_RESPONSES, HTTP_REQUESTS, REGISTRY, STAGE_SECONDS, take_usage
 from routes.chat import chat_bp
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class CircuitBreaker:
-    def __init__(self, failure_threshold=3, reset_timeout=60):
-        self.failure_threshold = failure_threshold
-        self.reset_timeout = reset_timeout
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = 'closed' 
-    
-    def can_execute(self):
-        import time
-        if self.state == 'closed':
-            return True
-        elif self.state == 'open':
-            if self.last_failure_time and time.time() - self.last_failure_time > self.reset_timeout:
-                self.state = 'half-open'
-                return True
-            return False
-        else:  
-            return True
-    
-    def record_success(self):
-        self.failure_count = 0
-        self.state = 'closed'
-    
-    def record_failure(self):
-        import time
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        if self.failure_count >= self.failure_threshold:
-            self.state = 'open'
+# Every route of the app; the services they use live in app.extensions['aniru']
+main_bp = Blueprint('main', __name__, cli_group=None)
+
+BREAKER_STATE_VALUES = {'closed': 0, 'half-open': 1, 'open': 2}
+
+def _services() -> AppServices:
+    return current_app.extensions['aniru']
+
+def create_app(services: Optional[AppServices] = None) -> Flask:
+    """
+    Build the app and, unless given, the services it shares. Nothing is
+    constructed at import time: gunicorn.conf.py preloads "app:create_app()"
+    in the master so the workers fork with everything already built, and
+    `app:app` still works through the module-level lazy `app`.
+    """
+    configure_logging()
+    services = services or AppServices()
+    services.warm_up()
+
+    app = Flask(__name__)
+    CORS(app)
+    app.extensions['aniru'] = services
+    app.register_blueprint(main_bp)
+    app.register_blueprint(chat_bp, url_prefix='/api')
+    _register_gauges(services)
+    return app
+
+_default_app = None
+
+def __getattr__(name):
+    """`app` is the default app, created on first access (gunicorn app:app, flask run)"""
+    global _default_app
+    if name == 'app':
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-fireworks_service = FireworksService()
-groq_service = GroqService()
-rule_based_chatbot = RuleBasedChatbot()
+def _register_gauges(services: AppServices):
+    fireworks_service = services.fireworks_service
+    response_cache = services.response_cache
+    admission = services.admission
+    answer_router = services.answer_router
+    chat_pipeline = services.chat_pipeline
 
-fireworks_circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
-groq_circuit_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    REGISTRY.gauge_callback(
+        'aniru_circuit_breaker_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)', ['upstream'],
+        lambda: [((breaker.name,), BREAKER_STATE_VALUES.get(breaker.state, -1))
+                 for breaker in [services.fireworks_circuit_breaker] + [provider.breaker for provider in answer_router.providers]]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_provider_latency_ewma_ms', 'EWMA of successful answer-provider call latency', ['provider'],
+        lambda: [((provider.name,), provider.latency_ewma_ms) for provider in answer_router.providers
+                 if provider.latency_ewma_ms is not None]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_provider_error_rate', 'EWMA of the answer-provider error rate', ['provider'],
+        lambda: [((provider.name,), provider.error_ewma) for provider in answer_router.providers]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_upstream_up', 'Whether the latest health probe of an upstream succeeded', ['upstream'],
+        lambda: [((probe.name,), 1 if last.reachable else 0)
+                 for probe, last in ((probe, probe.last) for probe in services.health_prober.probes)
+                 if last.checked_at is not None and last.reachable is not None]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_upstream_probe_latency_ms', 'Latency of the latest health probe of an upstream', ['upstream'],
+        lambda: [((probe.name,), probe.last.latency_ms) for probe in services.health_prober.probes
+                 if probe.last.latency_ms is not None]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_cache_lookups_total', 'Cache lookups by cache and outcome', ['cache', 'result'],
+        lambda: [
+            (('response', 'hit'), response_cache.hits + response_cache.near_hits),
+            (('response', 'miss'), response_cache.misses),
+            (('enhancement', 'hit'), fireworks_service.enhancement_cache.hits),
+            (('enhancement', 'miss'), fireworks_service.enhancement_cache.misses),
+        ],
+        kind='counter'
+    )
+    REGISTRY.gauge_callback(
+        'aniru_upstream_in_flight', 'Chat requests holding an upstream concurrency slot', [],
+        lambda: [((), admission.upstream.in_flight)]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_upstream_queue_depth', 'Chat requests waiting for an upstream concurrency slot', [],
+        lambda: [((), admission.upstream.queue_depth)]
+    )
+    REGISTRY.gauge_callback(
+        'aniru_coalesced_requests_total', 'Chat requests that shared an identical in-flight pipeline run', [],
+        lambda: [((), chat_pipeline.coalescer.coalesced)],
+        kind='counter'
+    )
 
-app.register_blueprint(chat_bp, url_prefix='/api')
+@main_bp.before_app_request
+def start_health_prober():
+    _services().health_prober.ensure_running()
 
-@app.route('/', methods=['GET'])
+@main_bp.after_app_request
+def count_request(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.labels(endpoint, response.status_code).inc()
+    return response
+
+@main_bp.after_app_request
+def encode_response(response):
+    # Chat answers depend on the session and are never to be stored by a CDN
+    if request.method == 'POST' and 'Cache-Control' not in response.headers:
+        response.cache_control.no_store = True
+    return _services().compressor.apply(response, request.headers.get('Accept-Encoding'))
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@main_bp.route('/', methods=['GET'])
 def home():
     """Home endpoint"""
-    return jsonify({
+    services = _services()
+    response = jsonify({
         "status": "healthy",
         "message": "Aniru AI Backend is running!",
         "services": {
-            "fireworks": fireworks_service.is_available(),
-            "groq": groq_service.is_available(),
+            "fireworks": services.fireworks_service.is_available(),
+            "groq": services.groq_service.is_available(),
             "rule_based": True
         }
     })
+    return conditional(response, request, services.health_snapshot.ttl)
+
+def _health_body(services: AppServices) -> bytes:
+    # Check service availability
+    services_status = {
+        "fireworks": {
+            "available": services.fireworks_service.is_available(),
+            "circuit_breaker": services.fireworks_circuit_breaker.state,
+            "failure_count": services.fireworks_circuit_breaker.failure_count,
+            "breaker_stats": services.fireworks_circuit_breaker.stats()
+        },
+        "groq": {
+            "available": services.groq_service.is_available(),
+            "circuit_breaker": services.groq_circuit_breaker.state,
+            "failure_count": services.groq_circuit_breaker.failure_count,
+            "breaker_stats": services.groq_circuit_breaker.stats()
+        },
+        "rule_based": {
+            "available": True,  # Rule-based should always be available
+            "portfolio_data_loaded": bool(services.rule_based_chatbot.portfolio_data)
+        }
+    }
 
-@app.route('/health', methods=['GET'])
+    # Determine overall health
+    overall_health = "healthy"
+    if services.groq_circuit_breaker.state == 'open' and not services.rule_based_chatbot.portfolio_data:
+        overall_health = "degraded"
+
+    return json.dumps({
+        "status": overall_health,
+        "timestamp": datetime.now().isoformat(),
+        "services": services_status,
+        "latency": services.chat_pipeline.latency.stats(),
+        "groq_timeout_seconds": services.chat_pipeline.groq_timeout.seconds(),
+        "portfolio_data": services.portfolio_store.stats(),
+        "response_cache": services.response_cache.stats(),
+        "answer_routing": services.answer_router.stats(),
+        "coalescing": services.chat_pipeline.coalescer.stats(),
+        "admission": services.admission.stats(),
+        "sessions": services.session_store.stats() if services.session_store is not None else {"backend": "off"},
+        "enhancement_cache": services.fireworks_service.enhancement_cache.stats(),
+        "upstream_probes": services.health_prober.stats(),
+        "compression": services.compressor.stats()
+    }).encode('utf-8')
+
+@main_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint. The body is rebuilt at most every
+    HEALTH_CACHE_SECONDS, and carries validators for conditional polling.
+    """
+    services = _services()
     try:
-        # Check service availability
-        services_status = {
-            "fireworks": {
-                "available": fireworks_service.is_available(),
-                "circuit_breaker": fireworks_circuit_breaker.state,
-                "failure_count": fireworks_circuit_breaker.failure_count
-            },
-            "groq": {
-                "available": groq_service.is_available(),
-                "circuit_breaker": groq_circuit_breaker.state,
-                "failure_count": groq_circuit_breaker.failure_count
-            },
-            "rule_based": {
-                "available": True,  # Rule-based should always be available
-                "portfolio_data_loaded": bool(rule_based_chatbot.portfolio_data)
-            }
-        }
-        
-        # Determine overall health
-        overall_health = "healthy"
-        if groq_circuit_breaker.state == 'open' and not rule_based_chatbot.portfolio_data:
-            overall_health = "degraded"
-        
-        return jsonify({
-            "status": overall_health,
-            "timestamp": datetime.now().isoformat(),
-            "services": services_status
-        })
+        snapshot = services.health_snapshot.get(lambda: _health_body(services))
+        return snapshot_response(request, snapshot, services.health_snapshot.ttl, 'application/json')
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -112,9 +213,10 @@ def health_check():
             "timestamp": datetime.now().isoformat()
         }), 500
 
-@app.route('/api/chat', methods=['POST'])
+@main_bp.route('/api/chat', methods=['POST'])
 def chat():
     """Main chat endpoint with the specified pipeline"""
+    services = _services()
     try:
         data = request.get_json()
         user_message = data.get('message', '').strip()
@@ -122,100 +224,22 @@ def chat():
         if not user_message:
             return jsonify({"error": "Message is required"}), 400
         
-        logger.info(f"Received message: {user_message}")
+        logger.debug("Received message: %s", user_message)
         
-        # Step 1: Try to enhance the question using Fireworks API (with circuit breaker)
-        enhanced_message = user_message
-        if fireworks_circuit_breaker.can_execute() and fireworks_service.is_available():
-            try:
-                logger.info("Step 1: Enhancing message with Fireworks API")
-                enhanced_message = fireworks_service.enhance_question(user_message)
-                fireworks_circuit_breaker.record_success()
-                logger.info(f"Enhanced message: {enhanced_message}")
-            except Exception as e:
-                fireworks_circuit_breaker.record_failure()
-                logger.warning(f"Fireworks API failed for enhancement: {str(e)}")
-                logger.info("Proceeding with original message")
-        else:
-            logger.info("Fireworks API circuit breaker open or service unavailable, skipping enhancement")
-
-        if groq_circuit_breaker.can_execute() and groq_service.is_available():
-            try:
-                logger.info("Step 2: Getting response from Groq API")
-                response = groq_service.get_response(enhanced_message, user_message)
-                groq_circuit_breaker.record_success()
-                logger.info("Successfully got response from Groq API")
-                
-                return jsonify({
-                    "response": response,
-                    "source": "groq_api",
-                    "enhanced_query": enhanced_message != user_message,
-                    "original_message": user_message,
-                    "enhanced_message": enhanced_message if enhanced_message != user_message else None
-                })
-                
-            except Exception as e:
-                groq_circuit_breaker.record_failure()
-                logger.warning(f"Groq API failed: {str(e)}")
-                logger.info("Step 3: Falling back to rule-based chatbot")
-        else:
-            logger.info("Groq API circuit breaker open or service unavailable, using fallback")
-            
-        try:
-            response = rule_based_chatbot.get_response(enhanced_message)
-            logger.info("Successfully got response from rule-based chatbot")
-            
-            return jsonify({
-                "response": response,
-                "source": "rule_based",
-                "enhanced_query": enhanced_message != user_message,
-                "original_message": user_message,
-                "enhanced_message": enhanced_message if enhanced_message != user_message else None,
-                "fallback_reason": "API services unavailable or circuit breaker open"
-            })
-        except Exception as fallback_error:
-            logger.error(f"Rule-based chatbot also failed: {str(fallback_error)}")
-            try:
-                response = rule_based_chatbot.get_response(user_message)
-                logger.info("Fallback successful with original message")
-                
-                return jsonify({
-                    "response": response,
-                    "source": "rule_based_fallback",
-                    "enhanced_query": False,
-                    "original_message": user_message,
-                    "fallback_reason": f"Enhanced message failed, used original"
-                })
-            except Exception as final_error:
-                logger.error(f"All fallbacks failed: {str(final_error)}")
-                # Emergency response
-                emergency_response = f"""Hello! I'm Aniru AI, Anirudh's personal assistant. I'm currently experiencing some technical difficulties, but I'm here to help you learn about Anirudh.
-
-Anirudh is a passionate computer science student and full-stack developer with expertise in:
-• Programming Languages: C++, Python, JavaScript
-• Technologies: React, Node.js, Express, MongoDB
-• Specialties: Data Structures, Algorithms, System Design
-
-You can reach out to Anirudh at:
-• Email: anirudh200503@gmail.com
-• LinkedIn: https://www.linkedin.com/in/anirudh-t-b5b26a2aa/
-• GitHub: https://github.com/anirudh-pedro
-
-Please try asking your question again, and I'll do my best to provide you with detailed information about Anirudh's projects and achievements!"""
-                
-                return jsonify({
-                    "response": emergency_response,
-                    "source": "emergency_fallback",
-                    "enhanced_query": False,
-                    "original_message": user_message,
-                    "fallback_reason": "All systems temporarily unavailable"
-                })
+        client = services.admission.client(request.remote_addr, request.headers.get('X-Forwarded-For'))
+        session_id = services.chat_pipeline.session_id(data.get('session_id'))
+        result = services.chat_pipeline.run(user_message, client, session_id)
+        started = time.perf_counter()
+        response = jsonify(result)
+        STAGE_SECONDS.labels('serialize').observe(time.perf_counter() - started)
+        return response
                 
     except Exception as e:
         logger.error(f"Unexpected error in chat endpoint: {str(e)}")
         
         try:
-            response = rule_based_chatbot.get_response(data.get('message', ''))
+            response = services.rule_based_chatbot.get_response(data.get('message', ''))
+            CHAT_RESPONSES.labels('rule_based', 'false').inc()
             return jsonify({
                 "response": response,
                 "source": "rule_based",
@@ -223,13 +247,304 @@ Please try asking your question again, and I'll do my best to provide you with d
                 "fallback_reason": "Unexpected error occurred"
             })
         except:
+            CHAT_RESPONSES.labels('error_fallback', 'false').inc()
             return jsonify({
                 "response": "I'm sorry, I'm experiencing technical difficulties. Please try again later.",
                 "source": "error_fallback",
                 "enhanced_query": False
             })
 
+BATCH_MAX_MESSAGES = int(os.getenv('BATCH_MAX_MESSAGES', '500'))
+
+def _batch_summary(sources, started):
+    return {
+        "count": sum(sources.values()),
+        "sources": dict(sources),
+        "total_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+@main_bp.route('/api/answers', defaults={'intent': None}, methods=['GET'])
+@main_bp.route('/api/answers/<intent>', methods=['GET'])
+def rule_based_answer(intent):
+    """
+    The pre-rendered rule-based answer for an intent, or for the intent that
+    ?message= classifies to. It depends only on the portfolio data version
+    and the intent, so it is cacheable and revalidated by that pair:
+    /api/chat is a POST that no CDN stores, so this is the cacheable route
+    to the same answers. After a data.json reload the ETag changes, and
+    shared caches pick up the new answer within RULE_ANSWER_MAX_AGE seconds.
+    """
+    services = _services()
+    chatbot = services.rule_based_chatbot
+    if intent is None:
+        message = request.args.get('message', '').strip()
+        if not message:
+            return jsonify({"error": "Pass an intent in the path or ?message="}), 400
+        intent = chatbot.classify_with_confidence(message)[0]
+
+    version, answers = chatbot.versioned_answers()
+    if intent not in answers:
+        return jsonify({"error": f"Unknown intent '{intent}'", "intents": sorted(answers)}), 404
+    return versioned(request, f'{version}-{intent}', services.answer_max_age, lambda: jsonify({
+        "response": answers[intent],
+        "source": "rule_based",
+        "intent": intent,
+        "data_version": version,
+    }))
+
+@main_bp.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Answer a list of messages in one call: {"messages": [...], "parallelism": 4}.
+    With "stream": true, or Accept: application/x-ndjson, every result is
+    written as an NDJSON line as soon as it is ready, then a summary line.
+    Every distinct message takes a token from the client's rate limit, as a
+    single request would; messages past the client's budget get the
+    rate-limited rule-based answer.
+    """
+    services = _services()
+    started = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages')
+
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "messages must be a non-empty list"}), 400
+    if len(messages) > BATCH_MAX_MESSAGES:
+        return jsonify({"error": f"At most {BATCH_MAX_MESSAGES} messages per batch"}), 400
+    messages = [message.strip() if isinstance(message, str) else '' for message in messages]
+    if not all(messages):
+        return jsonify({"error": "Every message must be a non-empty string"}), 400
+
+    client = services.admission.client(request.remote_addr, request.headers.get('X-Forwarded-For'))
+
+    # The configured parallelism is also the ceiling for what a caller may ask for
+    try:
+        parallelism = min(int(data.get('parallelism') or services.chat_pipeline.batch_parallelism), services.chat_pipeline.batch_parallelism)
+    except (TypeError, ValueError):
+        return jsonify({"error": "parallelism must be an integer"}), 400
+
+    logger.info("Received batch of %d messages", len(messages))
+    results = services.chat_pipeline.iter_batch(messages, parallelism, client)
+
+    if data.get('stream') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def lines():
+            sources = {}
+            for index, result in results:
+                sources[result['source']] = sources.get(result['source'], 0) + 1
+                yield json.dumps({"index": index, **result}) + '\n'
+            yield json.dumps({"summary": _batch_summary(sources, started)}) + '\n'
+        return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+    ordered = [None] * len(messages)
+    sources = {}
+    for index, result in results:
+        sources[result['source']] = sources.get(result['source'], 0) + 1
+        ordered[index] = {"index": index, **result}
+    return jsonify({"results": ordered, "summary": _batch_summary(sources, started)})
+
+STREAM_CHUNK_CHARS = 48
+
+def _sse(event, data):
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _stream_timings(started, ttft_ms):
+    total_ms = (time.perf_counter() - started) * 1000
+    return {
+        "ttft_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+        "total_ms": round(total_ms, 2)
+    }
+
+def _stream_text(meta, text, started):
+    """Stream an already complete answer (cache hit or rule-based) in word-aligned chunks"""
+    yield _sse('meta', meta)
+    ttft_ms = None
+    chunk = ''
+    for piece in re.findall(r'\s*\S+', text):
+        chunk += piece
+        if len(chunk) >= STREAM_CHUNK_CHARS:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            yield _sse('token', {"delta": chunk})
+            chunk = ''
+    if chunk:
+        if ttft_ms is None:
+            ttft_ms = (time.perf_counter() - started) * 1000
+        yield _sse('token', {"delta": chunk})
+    yield _sse('done', _stream_timings(started, ttft_ms))
+
+def _relay_groq_stream(services, deltas, meta, user_message, enhanced_message, started, history=()):
+    """
+    Relay Groq deltas to the client, falling back to the rule-based answer if
+    nothing arrived. The finished exchange goes into the session; answers that
+    depend on a session's history are not cached.
+    """
+    yield _sse('meta', meta)
+    parts = []
+    ttft_ms = None
+    # Drop the enhancement's usage, so only the stream's own is logged
+    take_usage()
+    try:
+        for delta in deltas:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+                logger.debug("Stream time-to-first-token: %.1f ms", ttft_ms)
+            parts.append(delta)
+            yield _sse('token', {"delta": delta})
+    except Exception as e:
+        services.groq_circuit_breaker.record_failure()
+        logger.warning(f"Groq API stream failed: {str(e)}")
+        if parts:
+            yield _sse('error', {"message": "The response was interrupted. Please try again."})
+            return
+        fallback_meta = {
+            **meta,
+            "source": "rule_based",
+            "fallback_reason": "Groq stream failed before any tokens arrived"
+        }
+        CHAT_RESPONSES.labels('rule_based', 'false').inc()
+        fallback = services.rule_based_chatbot.get_response(enhanced_message)
+        services.chat_pipeline.remember(meta.get('session_id'), user_message, {"response": fallback})
+        yield from _stream_text(fallback_meta, fallback, started)
+        return
+
+    services.groq_circuit_breaker.record_success()
+    CHAT_RESPONSES.labels('groq_api', 'false').inc()
+    timings = _stream_timings(started, ttft_ms)
+    logger.info("Stream request: %s", KeyValues(source='groq_api', **timings, **take_usage()))
+    response_text = ''.join(parts).strip()
+    if not history:
+        cached = {key: value for key, value in meta.items() if key != 'session_id'}
+        services.response_cache.set(user_message, {**cached, "response": response_text})
+    services.chat_pipeline.remember(meta.get('session_id'), user_message, {"response": response_text})
+    yield _sse('done', timings)
+
+@main_bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming variant of /api/chat that relays tokens as Server-Sent Events"""
+    services = _services()
+    started = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get('message') or '').strip()
+
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+
+    logger.debug("Received streaming message: %s", user_message)
+
+    pipeline = services.chat_pipeline
+    session_id = pipeline.session_id(data.get('session_id'))
+    client = services.admission.client(request.remote_addr, request.headers.get('X-Forwarded-For'))
+    if not services.admission.allow(client):
+        shed = pipeline.remember(session_id, user_message, pipeline.shed(user_message, 'rate_limited'))
+        return _sse_response(_stream_text({key: value for key, value in shed.items() if key != 'response'}, shed['response'], started))
+
+    history = pipeline.history(session_id)
+    cached = None if history else services.response_cache.get(user_message)
+    if cached is not None:
+        cached = pipeline.remember(session_id, user_message, cached)
+        meta = {key: value for key, value in cached.items() if key != 'response'}
+        meta.update({"original_message": user_message, "cached": True})
+        CHAT_RESPONSES.labels(meta.get('source', 'groq_api'), 'true').inc()
+        return _sse_response(_stream_text(meta, cached['response'], started))
+
+    if not services.admission.upstream.acquire():
+        shed = pipeline.remember(session_id, user_message, pipeline.shed(user_message, 'busy'))
+        return _sse_response(_stream_text({key: value for key, value in shed.items() if key != 'response'}, shed['response'], started))
+
+    try:
+        response = _open_groq_stream(services, user_message, started, session_id, history)
+    except BaseException:
+        services.admission.upstream.release()
+        raise
+    # The upstream slot is held until the stream ends or the client goes away
+    response.call_on_close(services.admission.upstream.release)
+    return response
+
+def _open_groq_stream(services, user_message, started, session_id=None, history=()):
+    """Enhance and open the Groq stream for a request holding an upstream slot"""
+    # As in the pipeline, a follow-up is not enhanced: the history carries its context
+    if history or services.chat_pipeline.should_skip_enhancement(user_message):
+        enhanced_message = user_message
+    else:
+        enhanced_message = services.chat_pipeline.enhance(user_message)
+    meta = {
+        "enhanced_query": enhanced_message != user_message,
+        "original_message": user_message,
+        "enhanced_message": enhanced_message if enhanced_message != user_message else None
+    }
+    if session_id:
+        meta["session_id"] = session_id
+
+    if services.groq_service.is_available() and services.groq_circuit_breaker.can_execute():
+        try:
+            deltas = services.groq_service.stream_response(enhanced_message, user_message,
+                                                           timeout=services.chat_pipeline.groq_timeout.seconds(),
+                                                           history=history)
+            return _sse_response(_relay_groq_stream(
+                services, deltas, {**meta, "source": "groq_api"}, user_message, enhanced_message, started, history
+            ))
+        except Exception as e:
+            services.groq_circuit_breaker.record_failure()
+            logger.warning(f"Groq API stream failed to open: {str(e)}")
+    else:
+        logger.info("Groq API circuit breaker open or service unavailable, streaming fallback")
+
+    fallback_meta = {
+        **meta,
+        "source": "rule_based",
+        "fallback_reason": "API services unavailable or circuit breaker open"
+    }
+    CHAT_RESPONSES.labels('rule_based', 'false').inc()
+    fallback = services.rule_based_chatbot.get_response(enhanced_message)
+    services.chat_pipeline.remember(session_id, user_message, {"response": fallback})
+    return _sse_response(_stream_text(fallback_meta, fallback, started))
+
+@main_bp.cli.command('warm-enhancement-cache')
+@click.argument('questions_file', required=False, type=click.Path(exists=True, dir_okay=False))
+def warm_enhancement_cache(questions_file):
+    """Pre-fill the enhancement cache from a JSON list or one-question-per-line file"""
+    services = _services()
+    path = questions_file or os.path.join(os.path.dirname(__file__), 'data', 'common_questions.json')
+    with open(path, 'r', encoding='utf-8') as file:
+        if path.endswith('.json'):
+            questions = json.load(file)
+        else:
+            questions = [line.strip() for line in file if line.strip()]
+
+    cache = services.fireworks_service.enhancement_cache
+    if not cache.persistent:
+        # A memory-only cache would be warmed in this process and lost when it exits
+        raise click.ClickException("ENHANCEMENT_CACHE_PATH is not set (or the cache is disabled); "
+                                   "there is no persistent cache for running workers to read")
+    if not services.fireworks_service.is_available():
+        click.echo("FIREWORKS_API_KEY is not configured, nothing to warm")
+        return
+
+    warmed = skipped = failed = 0
+    for question in questions:
+        if question in cache:
+            skipped += 1
+            continue
+        try:
+            enhanced = services.fireworks_service.enhance_question(question)
+            click.echo(f"{question} → {enhanced}")
+            warmed += 1
+        except Exception as e:
+            click.echo(f"{question} → failed: {str(e)}", err=True)
+            failed += 1
+
+    click.echo(f"Warmed {warmed}, already cached {skipped}, failed {failed}")
+
 if __name__ == '__main__':
+    app = create_app()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
@@ -0,0 +1,138 @@
+"""
+ASGI entry point.
+
+POST /api/chat runs natively on the event loop through ChatPipeline.arun, so
+a single worker can keep hundreds of Fireworks/Groq calls in flight. Every
+other route is served by the existing Flask app through asgiref's WSGI
+adapter (which runs it in a thread pool).
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+"""
+import os
+import json
+import time
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from services.http_session import close_async_client, transport_config
+from services.metrics import CHAT_RESPONSES, HTTP_REQUESTS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+flask_app = create_app()
+services = flask_app.extensions['aniru']
+admission = services.admission
+if os.getenv('UPSTREAM_MAX_CONCURRENCY') is None:
+    # One event loop carries as many upstream calls as its connection pool
+    admission.upstream.max_concurrent = transport_config()['async_max_connections']
+chat_pipeline = services.chat_pipeline
+rule_based_chatbot = services.rule_based_chatbot
+
+wsgi_application = WsgiToAsgi(flask_app)
+
+JSON_HEADERS = [
+    (b"content-type", b"application/json"),
+    # Matches the permissive flask_cors default used by the WSGI routes
+    (b"access-control-allow-origin", b"*"),
+    # As the WSGI routes: answers are never stored, and may be compressed
+    (b"cache-control", b"no-store"),
+    (b"vary", b"Accept-Encoding"),
+]
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send, payload, status=200, accept_encoding=None):
+    started = time.perf_counter()
+    body = json.dumps(payload).encode("utf-8")
+    STAGE_SECONDS.labels('serialize').observe(time.perf_counter() - started)
+    HTTP_REQUESTS.labels('/api/chat', status).inc()
+    headers = JSON_HEADERS
+    body, encoding = services.compressor.encode(body, accept_encoding)
+    if encoding is not None:
+        headers = headers + [(b"content-encoding", encoding.encode("ascii"))]
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers + [(b"content-length", str(len(body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _client(scope):
+    headers = dict(scope.get("headers") or [])
+    forwarded_for = headers.get(b"x-forwarded-for")
+    remote_addr = (scope.get("client") or (None,))[0]
+    return admission.client(remote_addr, forwarded_for.decode("latin-1") if forwarded_for else None)
+
+
+async def chat(scope, receive, send):
+    """Async twin of the Flask /api/chat view"""
+    user_message = ""
+    accept_encoding = dict(scope.get("headers") or []).get(b"accept-encoding", b"").decode("latin-1")
+    try:
+        data = json.loads(await _read_body(receive) or b"{}")
+        user_message = (data.get("message") or "").strip()
+
+        if not user_message:
+            await _send_json(send, {"error": "Message is required"}, status=400, accept_encoding=accept_encoding)
+            return
+
+        logger.debug("Received message: %s", user_message)
+        session_id = chat_pipeline.session_id(data.get("session_id"))
+        await _send_json(send, await chat_pipeline.arun(user_message, _client(scope), session_id),
+                         accept_encoding=accept_encoding)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in async chat endpoint: {str(e)}")
+        try:
+            response = rule_based_chatbot.get_response(user_message)
+            CHAT_RESPONSES.labels('rule_based', 'false').inc()
+            await _send_json(send, {
+                "response": response,
+                "source": "rule_based",
+                "enhanced_query": False,
+                "fallback_reason": "Unexpected error occurred"
+            }, accept_encoding=accept_encoding)
+        except Exception:
+            CHAT_RESPONSES.labels('error_fallback', 'false').inc()
+            await _send_json(send, {
+                "response": "I'm sorry, I'm experiencing technical difficulties. Please try again later.",
+                "source": "error_fallback",
+                "enhanced_query": False
+            })
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            services.health_prober.ensure_running()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(scope, receive, send)
+        return
+
+    if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/api/chat":
+        await chat(scope, receive, send)
+        return
+
+    await wsgi_application(scope, receive, send)
@@ -0,0 +1,125 @@
+"""
+Concurrency of a sync gunicorn worker versus the ASGI pipeline.
+
+The stub upstreams, a single gunicorn gthread worker serving app:app and a
+single uvicorn worker serving asgi:application each run in their own process,
+so the comparison is not distorted by sharing one GIL. Each stub answers after
+--latency seconds (Fireworks and Groq each).
+
+    cd server && python -m benchmarks.bench_async --concurrency 200 --requests 600
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SERVER_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn(args, env=None):
+    return subprocess.Popen([sys.executable] + args, cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+
+def wait_until_up(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def drive(url, total, concurrency):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(i):
+        start = time.perf_counter()
+        response = session.post(url, json={"message": f"what are his projects {i}"}, timeout=300)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000, response.json()["source"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    return {
+        "throughput_rps": total / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)],
+        "groq_share": sum(1 for r in results if r[1] == 'groq_api') / total,
+    }
+
+
+def report(label, stats):
+    print(f"{label:>28}: {stats['throughput_rps']:7.1f} req/s  p50 {stats['p50_ms']:8.1f} ms  "
+          f"p99 {stats['p99_ms']:8.1f} ms  groq answers {stats['groq_share']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--latency', type=float, default=0.25)
+    parser.add_argument('--sync-threads', type=int, default=4)
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        upstreams = {}
+        for name in ('groq', 'fireworks'):
+            stub = spawn(['-m', 'benchmarks.stub_upstream', '--latency', str(args.latency)])
+            processes.append(stub)
+            upstreams[name] = stub.stdout.readline().strip()
+
+        env = dict(os.environ,
+                   GROQ_API_KEY='bench', GROQ_API_URL=upstreams['groq'],
+                   FIREWORKS_API_KEY='bench', FIREWORKS_API_URL=upstreams['fireworks'],
+                   RESPONSE_CACHE_ENABLED='false',
+                   # Every simulated user shares one address here, and shedding would hide the latency
+                   RATE_LIMIT_RPS='0', UPSTREAM_MAX_CONCURRENCY='0',
+                   HTTP_POOL_MAXSIZE=str(args.concurrency),
+                   ASYNC_HTTP_MAX_CONNECTIONS=str(args.concurrency))
+
+        sync_port, async_port = free_port(), free_port()
+        processes.append(spawn(['-m', 'gunicorn', 'app:app', '-b', f'127.0.0.1:{sync_port}',
+                                '-w', '1', '-k', 'gthread', '--threads', str(args.sync_threads),
+                                '--backlog', '2048', '--log-level', 'warning'], env=env))
+        processes.append(spawn(['-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1',
+                                '--port', str(async_port), '--log-level', 'warning',
+                                '--backlog', '2048'], env=env))
+        wait_until_up(f"http://127.0.0.1:{sync_port}/health")
+        wait_until_up(f"http://127.0.0.1:{async_port}/health")
+
+        print(f"{args.requests} requests, {args.concurrency} concurrent clients, "
+              f"{args.latency * 1000:.0f} ms per upstream call")
+        report(f"gunicorn gthread x{args.sync_threads}",
+               drive(f"http://127.0.0.1:{sync_port}/api/chat", args.requests, args.concurrency))
+        report("uvicorn asgi (1 loop)",
+               drive(f"http://127.0.0.1:{async_port}/api/chat", args.requests, args.concurrency))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""
+Load test of the chat pipeline against stub upstreams.
+
+Stub Groq and Fireworks servers (with configurable latency, slow tails, error
+rates and streaming) and the app each run in their own process. For every
+concurrency level a fresh app process is started, so breakers, caches and
+latency histograms do not leak between levels. Client-side throughput,
+latency percentiles and answer sources are combined with the per-stage
+percentiles and breaker counters the app reports on /health.
+
+In-process micro benchmarks cover CircuitBreaker transitions and the
+RuleBasedChatbot fallback path. Results can be saved as JSON and compared
+with an earlier run, e.g. from the previous commit:
+
+    cd server && python -m benchmarks.bench_chat --concurrency 1,8,32 --output before.json
+    cd server && python -m benchmarks.bench_chat --concurrency 1,8,32 --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_async import SERVER_DIR, free_port, spawn, wait_until_up
+
+QUESTIONS_PATH = os.path.join(SERVER_DIR, 'data', 'common_questions.json')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def start_stub(latency, error_rate, tail_rate, tail_latency, token_delay):
+    process = spawn(['-m', 'benchmarks.stub_upstream', '--latency', str(latency),
+                     '--error-rate', str(error_rate), '--tail-rate', str(tail_rate),
+                     '--tail-latency', str(tail_latency), '--token-delay', str(token_delay)])
+    return process, process.stdout.readline().strip()
+
+
+def start_app(args, env):
+    port = free_port()
+    if args.server == 'uvicorn':
+        command = ['-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                   '--log-level', 'warning', '--backlog', '2048']
+    else:
+        command = ['-m', 'gunicorn', 'app:app', '-b', f'127.0.0.1:{port}', '-w', '1', '-k', 'gthread',
+                   '--threads', str(args.threads), '--backlog', '2048', '--log-level', 'warning']
+    process = spawn(command, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(f"{base_url}/health")
+    return process, base_url
+
+
+def one_blocking(session, base_url, message):
+    started = time.perf_counter()
+    response = session.post(f"{base_url}/api/chat", json={"message": message}, timeout=120)
+    latency_ms = (time.perf_counter() - started) * 1000
+    if response.status_code != 200:
+        return latency_ms, None, 'http_error'
+    return latency_ms, None, response.json().get('source', 'unknown')
+
+
+def one_stream(session, base_url, message):
+    started = time.perf_counter()
+    ttft_ms, source = None, 'unknown'
+    with session.post(f"{base_url}/api/chat/stream", json={"message": message}, timeout=120, stream=True) as response:
+        if response.status_code != 200:
+            return (time.perf_counter() - started) * 1000, None, 'http_error'
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: '):
+                if event == 'meta':
+                    source = json.loads(line[6:]).get('source', source)
+                elif event == 'token' and ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                elif event == 'error':
+                    source = 'stream_error'
+    return (time.perf_counter() - started) * 1000, ttft_ms, source
+
+
+def drive(base_url, questions, total, concurrency, stream, repeat):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=concurrency))
+    request_one = one_stream if stream else one_blocking
+
+    def one(i):
+        # Distinct suffixes keep the response cache from answering repeats unless --cache-hits is set
+        message = questions[i % len(questions)]
+        return request_one(session, base_url, message if repeat else f"{message} ({i})")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results)
+    ttfts = sorted(r[1] for r in results if r[1] is not None)
+    sources = {}
+    for _, _, source in results:
+        sources[source] = sources.get(source, 0) + 1
+
+    stats = {
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "sources": sources,
+        "fallback_rate": round(sum(n for s, n in sources.items() if s != 'groq_api') / total, 4),
+    }
+    if ttfts:
+        stats["ttft_p50_ms"] = round(percentile(ttfts, 0.50), 1)
+        stats["ttft_p95_ms"] = round(percentile(ttfts, 0.95), 1)
+    return stats
+
+
+def load_questions():
+    with open(QUESTIONS_PATH, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def bench_breaker(iterations):
+    """Cost of the breaker on the hot path and a full open/half-open/closed cycle"""
+    from services.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05, name='bench', state_dir='')
+    started = time.perf_counter()
+    for _ in range(iterations):
+        breaker.can_execute()
+        breaker.record_success(10.0)
+    closed_us = (time.perf_counter() - started) / iterations * 1e6
+
+    for _ in range(3):
+        breaker.can_execute()
+        breaker.record_failure()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        breaker.can_execute()
+    open_us = (time.perf_counter() - started) / iterations * 1e6
+
+    time.sleep(0.06)
+    probes = sum(1 for _ in range(10) if breaker.can_execute())
+    breaker.record_success(10.0)
+    return {
+        "closed_call_us": round(closed_us, 2),
+        "open_rejection_us": round(open_us, 3),
+        "half_open_probes_admitted": probes,
+        "state_after_probe": breaker.state,
+        "times_opened": breaker.stats()["opened"],
+    }
+
+
+def bench_rule_based(questions, iterations):
+    """Latency of the rule-based fallback answer"""
+    from services.rule_based_chatbot import RuleBasedChatbot
+
+    chatbot = RuleBasedChatbot()
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        chatbot.get_response(questions[i % len(questions)])
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return {
+        "p50_us": round(percentile(timings, 0.50), 1),
+        "p99_us": round(percentile(timings, 0.99), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report_level(stats):
+    sources = ' '.join(f"{source}={count}" for source, count in sorted(stats['sources'].items()))
+    ttft = f"  ttft p50 {stats['ttft_p50_ms']:7.1f} ms" if 'ttft_p50_ms' in stats else ''
+    print(f"  c={stats['concurrency']:<4} {stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:8.1f}  "
+          f"p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f} ms{ttft}  fallback {stats['fallback_rate']:.1%}  {sources}")
+    for stage, summary in stats.get('server_stages', {}).items():
+        p50, p95, p99 = (summary[key] or 0.0 for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"         {stage:<14} n={summary['count']:<6} p50 {p50:8.1f}  p95 {p95:8.1f}  p99 {p99:8.1f} ms")
+    for name, breaker in stats.get('breakers', {}).items():
+        print(f"         breaker {name:<9} state={breaker['state']} opened={breaker['opened']} rejected={breaker['rejected']}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    previous = {level['concurrency']: level for level in baseline.get('levels', [])}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for level in results['levels']:
+        before = previous.get(level['concurrency'])
+        if before is None:
+            continue
+        rps = (level['throughput_rps'] / before['throughput_rps'] - 1) * 100 if before['throughput_rps'] else 0.0
+        p95 = (level['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0.0
+        print(f"  c={level['concurrency']:<4} throughput {rps:+6.1f}%  p95 {p95:+6.1f}%  "
+              f"fallback {before['fallback_rate']:.1%} -> {level['fallback_rate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=200, help='requests per level')
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn gthread threads')
+    parser.add_argument('--stream', action='store_true', help='drive /api/chat/stream instead of /api/chat')
+    parser.add_argument('--cache-hits', action='store_true', help='repeat questions verbatim so the response cache can answer')
+    parser.add_argument('--groq-latency', type=float, default=0.2)
+    parser.add_argument('--fireworks-latency', type=float, default=0.1)
+    parser.add_argument('--groq-error-rate', type=float, default=0.0)
+    parser.add_argument('--fireworks-error-rate', type=float, default=0.0)
+    parser.add_argument('--tail-rate', type=float, default=0.0, help='share of upstream calls that are slow')
+    parser.add_argument('--tail-latency', type=float, default=2.0)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--micro-iterations', type=int, default=20000)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE', help='extra app environment')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    questions = load_questions()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "config": vars(args),
+        "levels": [],
+        "micro": {
+            "circuit_breaker": bench_breaker(args.micro_iterations),
+            "rule_based_fallback": bench_rule_based(questions, args.micro_iterations // 10),
+        },
+    }
+
+    processes = []
+    try:
+        groq_stub, groq_url = start_stub(args.groq_latency, args.groq_error_rate, args.tail_rate,
+                                         args.tail_latency, args.token_delay)
+        fireworks_stub, fireworks_url = start_stub(args.fireworks_latency, args.fireworks_error_rate,
+                                                   args.tail_rate, args.tail_latency, 0.0)
+        processes += [groq_stub, fireworks_stub]
+
+        env = dict(os.environ,
+                   GROQ_API_KEY='bench', GROQ_API_URL=groq_url,
+                   FIREWORKS_API_KEY='bench', FIREWORKS_API_URL=fireworks_url,
+                   RESPONSE_CACHE_ENABLED='true' if args.cache_hits else 'false',
+                   ENHANCEMENT_CACHE_ENABLED='true' if args.cache_hits else 'false',
+                   # Every simulated user shares one address here, and shedding would hide the latency
+                   RATE_LIMIT_RPS='0', UPSTREAM_MAX_CONCURRENCY='0',
+                   HTTP_POOL_MAXSIZE=str(max(levels)),
+                   ASYNC_HTTP_MAX_CONNECTIONS=str(max(levels)))
+        env.update(item.split('=', 1) for item in args.env)
+
+        endpoint = '/api/chat/stream' if args.stream else '/api/chat'
+        print(f"{args.server} {endpoint}: groq {args.groq_latency * 1000:.0f} ms ({args.groq_error_rate:.0%} errors), "
+              f"fireworks {args.fireworks_latency * 1000:.0f} ms ({args.fireworks_error_rate:.0%} errors), "
+              f"{args.tail_rate:.0%} tail at +{args.tail_latency * 1000:.0f} ms")
+
+        for concurrency in levels:
+            app_process, base_url = start_app(args, env)
+            try:
+                stats = drive(base_url, questions, args.requests, concurrency, args.stream, args.cache_hits)
+                health = requests.get(f"{base_url}/health", timeout=10).json()
+                stats["server_stages"] = health.get("latency", {})
+                stats["breakers"] = {
+                    name: service.get("breaker_stats", {})
+                    for name, service in health.get("services", {}).items() if "breaker_stats" in service
+                }
+            finally:
+                app_process.terminate()
+                app_process.wait()
+            results["levels"].append(stats)
+            report_level(stats)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    breaker = results["micro"]["circuit_breaker"]
+    fallback = results["micro"]["rule_based_fallback"]
+    print(f"\nCircuitBreaker: {breaker['closed_call_us']} us per closed call, {breaker['open_rejection_us']} us per "
+          f"rejection, {breaker['half_open_probes_admitted']} probe admitted half-open, then {breaker['state_after_probe']}")
+    print(f"RuleBasedChatbot fallback: p50 {fallback['p50_us']} us, p99 {fallback['p99_us']} us")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Response size and CPU cost of compression, and what conditional /health
+polling saves.
+
+Chat payloads are the /api/chat JSON bodies for the common questions, with
+the rule-based answers and with full-length answers: GROQ_MAX_TOKENS (1500)
+tokens of portfolio text, built from the context the retriever selects.
+Each is encoded with gzip at several levels and, when installed, brotli.
+
+/health is then polled through the Flask test client as a load balancer
+would: rebuilt on every call (HEALTH_CACHE_SECONDS=0, the old behaviour),
+served from the snapshot, and revalidated with If-None-Match.
+
+    cd server && python -m benchmarks.bench_compression --polls 2000
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.http_encoding import brotli
+from services.portfolio_store import get_portfolio_store
+from services.retrieval import PortfolioRetriever
+from services.rule_based_chatbot import RuleBasedChatbot
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'common_questions.json')
+
+
+def chat_payloads(questions):
+    """(label, list of JSON bodies) for rule-based and full-length answers"""
+    store = get_portfolio_store()
+    chatbot = RuleBasedChatbot(store)
+    retriever = PortfolioRetriever(store.data)
+
+    def body(question, answer, source):
+        return json.dumps({
+            "response": answer, "source": source, "enhanced_query": True,
+            "original_message": question, "enhanced_message": f"{question} (Anirudh's portfolio)",
+            "cached": False,
+        }).encode('utf-8')
+
+    # ~4 characters per token; the question's own context first, then the others'
+    contexts = [retriever.relevant_data(q.lower()) for q in questions]
+    full_chars = int(os.getenv('GROQ_MAX_TOKENS', '1500')) * 4
+
+    def full_answer(index):
+        text = '\n\n'.join(contexts[index:] + contexts[:index])
+        while len(text) < full_chars:
+            text += '\n\n' + text
+        return text[:full_chars]
+
+    return [
+        ('rule_based', [body(q, chatbot.get_response(q), 'rule_based') for q in questions]),
+        ('full_length', [body(q, full_answer(i), 'groq_api') for i, q in enumerate(questions)]),
+    ]
+
+
+def encoders():
+    yield 'gzip-1', lambda data: gzip.compress(data, compresslevel=1, mtime=0)
+    yield 'gzip-6', lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+    yield 'gzip-9', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield 'br-4', lambda data: brotli.compress(data, quality=4)
+        yield 'br-5', lambda data: brotli.compress(data, quality=5)
+        yield 'br-11', lambda data: brotli.compress(data, quality=11)
+
+
+def report_compression(payloads, repeat):
+    print(f"{'payload':<13}{'encoding':<10}{'bytes':>9}{'ratio':>8}{'us / response':>15}")
+    for label, bodies in payloads:
+        raw = sum(len(body) for body in bodies)
+        print(f"{label:<13}{'identity':<10}{raw / len(bodies):>9.0f}{1.0:>8.2f}{0.0:>15.1f}")
+        for name, encode in encoders():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                encoded = [encode(body) for body in bodies]
+            elapsed_us = (time.perf_counter() - started) * 1e6 / (repeat * len(bodies))
+            size = sum(len(body) for body in encoded)
+            print(f"{'':<13}{name:<10}{size / len(bodies):>9.0f}{size / raw:>8.2f}{elapsed_us:>15.1f}")
+
+
+def report_health(polls):
+    from app import create_app
+    from services.app_services import AppServices
+    from services.http_encoding import TimedSnapshot
+
+    services = AppServices()
+    app = create_app(services)
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+
+    def poll(extra=None):
+        started = time.perf_counter()
+        sent = 0
+        for _ in range(polls):
+            response = client.get('/health', headers={**headers, **(extra or {})})
+            sent += len(response.get_data())
+        return (time.perf_counter() - started) * 1e6 / polls, sent / polls
+
+    def report(label, extra=None):
+        us, size = poll(extra)
+        print(f"{label:<28}{us:>11.1f}{size:>12.0f}")
+
+    print(f"\n{'/health poll':<28}{'us / poll':>11}{'body bytes':>12}")
+    services.health_snapshot = TimedSnapshot(0)
+    report('rebuilt every call')
+    services.health_snapshot = TimedSnapshot(3600)
+    report('snapshot')
+    report('snapshot, If-None-Match', {'If-None-Match': client.get('/health', headers=headers).headers['ETag']})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50, help='encodings of every payload per encoder')
+    parser.add_argument('--polls', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with open(QUESTIONS_PATH, encoding='utf-8') as file:
+        questions = json.load(file)
+    if brotli is None:
+        print("brotli not installed, gzip only")
+    report_compression(chat_payloads(questions), args.repeat)
+    report_health(args.polls)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Per-call cost of prompt context selection, before and after the index.
+
+Compares the original GroqService._extract_relevant_data (keyword scans and
+json.dumps(indent=2) on every call, kept verbatim below) with
+PortfolioContextIndex.relevant_data over a mix of typical questions.
+
+    cd server && python -m benchmarks.bench_context_index --iterations 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.context_index import PortfolioContextIndex
+
+QUESTIONS = [
+    "what are his projects",
+    "can you provide details about anirudh's notable projects with descriptions and links?",
+    "what are anirudh's technical skills and areas of expertise?",
+    "how can i contact anirudh for professional opportunities?",
+    "what is his education background",
+    "tell me about his leetcode and hackathon achievements",
+    "thanks, bye!",
+    "who is anirudh",
+]
+
+
+def legacy_extract_relevant_data(portfolio_data: dict, question_lower: str) -> str:
+    """GroqService._extract_relevant_data before the context index (verbatim)"""
+    if not portfolio_data:
+        return "No portfolio data available."
+    
+    relevant_sections = []
+    
+    # Projects-related questions
+    if any(word in question_lower for word in ['project', 'work', 'portfolio', 'built', 'created', 'developed', 'github', 'repo']) and not any(word in question_lower for word in ['bye', 'goodbye', 'see you', 'thanks', 'thank you']):
+        if 'projects' in portfolio_data:
+            projects_data = portfolio_data['projects'][:4]  # Limit to 4 projects to avoid large payload
+            
+            # Dynamic GitHub URLs - map based on actual project names in data.json
+            def get_github_url(project_name):
+                """Get GitHub URL for a project based on its name"""
+                name_lower = project_name.lower()
+                if 'flashchat' in name_lower:
+                    return 'https://github.com/anirudh-pedro/FlashChat'
+                elif 'typomaster' in name_lower:
+                    return 'https://github.com/anirudh-pedro/TypoMaster'
+                elif 'sentiment' in name_lower:
+                    return 'https://github.com/anirudh-pedro/Sentiment-Analysis-App'
+                elif 'blogsphere' in name_lower or 'blog' in name_lower:
+                    return 'https://github.com/anirudh-pedro/blogsphere'
+                return None
+            
+            # Enhance projects with GitHub URLs dynamically
+            enhanced_projects = []
+            for project in projects_data:
+                enhanced_project = project.copy()
+                project_name = project.get('name', '')
+                
+                # Add GitHub URL dynamically based on project name
+                github_url = get_github_url(project_name)
+                if github_url:
+                    enhanced_project['github_url'] = github_url
+                
+                enhanced_projects.append(enhanced_project)
+            
+            relevant_sections.append(f"PROJECTS: {json.dumps(enhanced_projects, indent=2)}")
+        else:
+            # Only provide basic message if no project data exists
+            relevant_sections.append("PROJECTS: No detailed project data available.")
+    
+    # Skills-related questions
+    if any(word in question_lower for word in ['skill', 'technology', 'programming', 'languages', 'frameworks', 'tools', 'tech']):
+        if 'skills' in portfolio_data:
+            relevant_sections.append(f"SKILLS: {json.dumps(portfolio_data['skills'], indent=2)}")
+    
+    # Contact-related questions
+    if any(word in question_lower for word in ['contact', 'email', 'phone', 'reach', 'connect', 'linkedin']):
+        contact_info = {
+            'email': 'anirudh200503@gmail.com',
+            'phone': '+91 9894969187',
+            'linkedin': 'https://www.linkedin.com/in/anirudh-t-b5b26a2aa/',
+            'github': 'https://github.com/anirudh-pedro'
+        }
+        relevant_sections.append(f"CONTACT: {json.dumps(contact_info, indent=2)}")
+    
+    # Experience/Education questions
+    if any(word in question_lower for word in ['experience', 'education', 'degree', 'university', 'background']):
+        if 'profile' in portfolio_data:
+            profile_info = {
+                'education': portfolio_data['profile'].get('education', {}),
+                'bio': portfolio_data['profile'].get('bio', ''),
+                'title': portfolio_data['profile'].get('title', '')
+            }
+            relevant_sections.append(f"BACKGROUND: {json.dumps(profile_info, indent=2)}")
+    
+    # Achievements questions
+    if any(word in question_lower for word in ['achievement', 'leetcode', 'hackathon', 'contest', 'accomplishment']):
+        if 'achievements' in portfolio_data:
+            achievements = portfolio_data['achievements']
+            # Limit achievements data to avoid large payload
+            limited_achievements = {}
+            if 'leetcode' in achievements:
+                limited_achievements['leetcode'] = {
+                    'problems_solved': achievements['leetcode'].get('problems_solved'),
+                    'contest_rating': achievements['leetcode'].get('contest_rating'),
+                    'profile_url': achievements['leetcode'].get('profile_url')
+                }
+            if 'hackathons' in achievements:
+                limited_achievements['hackathons'] = achievements['hackathons'][:2]  # Limit to 2
+            relevant_sections.append(f"ACHIEVEMENTS: {json.dumps(limited_achievements, indent=2)}")
+    
+    # Farewell/goodbye questions
+    if any(word in question_lower for word in ['bye', 'goodbye', 'see you', 'farewell', 'take care', 'later']):
+        farewell_info = {
+            'message_type': 'farewell',
+            'response_style': 'brief and friendly'
+        }
+        relevant_sections.append(f"FAREWELL: {json.dumps(farewell_info, indent=2)}")
+    
+    # Default: provide basic profile info
+    if not relevant_sections:
+        if 'profile' in portfolio_data:
+            basic_info = {
+                'name': portfolio_data['profile'].get('name'),
+                'title': portfolio_data['profile'].get('title'),
+                'bio': portfolio_data['profile'].get('bio', '')[:200] + '...'  # Truncate long bio
+            }
+            relevant_sections.append(f"PROFILE: {json.dumps(basic_info, indent=2)}")
+    
+    return '\n\n'.join(relevant_sections) if relevant_sections else "Basic portfolio information available."
+
+
+def measure(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for question in QUESTIONS:
+            fn(question)
+    return (time.perf_counter() - start) / (iterations * len(QUESTIONS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'data.json')
+    with open(data_path, 'r', encoding='utf-8') as file:
+        portfolio_data = json.load(file)
+
+    start = time.perf_counter()
+    index = PortfolioContextIndex(portfolio_data)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    legacy_us = measure(lambda q: legacy_extract_relevant_data(portfolio_data, q), args.iterations)
+    index_us = measure(index.relevant_data, args.iterations)
+
+    legacy_chars = sum(len(legacy_extract_relevant_data(portfolio_data, q)) for q in QUESTIONS) / len(QUESTIONS)
+    index_chars = sum(len(index.relevant_data(q)) for q in QUESTIONS) / len(QUESTIONS)
+
+    print(f"index build (once per data.json version): {build_ms:.2f} ms")
+    print(f"{'legacy _extract_relevant_data':>32}: {legacy_us:8.2f} us/call  {legacy_chars:8.0f} chars/prompt")
+    print(f"{'PortfolioContextIndex':>32}: {index_us:8.2f} us/call  {index_chars:8.0f} chars/prompt")
+    print(f"{'speed-up':>32}: {legacy_us / index_us:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
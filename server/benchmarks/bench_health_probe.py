@@ -0,0 +1,158 @@
+"""
+Cost of /api/test and how the background health prober changes an outage.
+
+Part 1 compares what /api/test used to do, a full completion through each
+service's test_connection(), with reading the prober's cached results.
+Stub upstreams answer completions after --latency seconds.
+
+Part 2 sends user traffic at --rate requests per second through the answer
+stage while the Groq stub goes through three phases:
+- healthy
+- failing every call for --outage seconds
+- healthy again
+
+This is run with and without the prober. Reported:
+- user calls sent to the failing upstream
+- time from the outage starting until the breaker opened
+- time from recovery until the breaker closed again
+
+    cd server && python -m benchmarks.bench_health_probe --rate 0.5 --outage 15
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# test_connection() would otherwise answer Fireworks from the enhancement cache
+os.environ['ENHANCEMENT_CACHE_ENABLED'] = 'false'
+
+from benchmarks.stub_upstream import StubUpstreamServer
+from services.chat_pipeline import ChatPipeline
+from services.circuit_breaker import CircuitBreaker
+from services.fireworks_service import FireworksService
+from services.groq_service import GroqService
+from services.health_prober import HealthProber, UpstreamProbe
+from services.portfolio_store import get_portfolio_store
+from services.providers import AnswerProvider, ProviderRouter
+from services.response_cache import ResponseCache
+from services.rule_based_chatbot import RuleBasedChatbot
+
+
+def timed_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) * 1e6 / calls
+
+
+def report_api_test(groq_url, fireworks_url, calls):
+    fireworks = FireworksService()
+    fireworks.api_key, fireworks.base_url = 'stub', fireworks_url
+    groq = GroqService(get_portfolio_store())
+    groq.api_key, groq.base_url = 'stub', groq_url
+    prober = HealthProber([UpstreamProbe(fireworks, CircuitBreaker(name='fireworks')),
+                           UpstreamProbe(groq, CircuitBreaker(name='groq'))], interval=3600)
+    prober.probe_all()
+
+    live_us = timed_us(lambda: (fireworks.test_connection(), groq.test_connection()), max(calls // 100, 3))
+    cached_us = timed_us(prober.results, calls)
+    probe_us = timed_us(prober.probe_all, max(calls // 100, 3))
+    print(f"{'/api/test upstream checks':<36}{'us / call':>12}")
+    print(f"{'test_connection() completions':<36}{live_us:>12.1f}")
+    print(f"{'one probe round (model listing)':<36}{probe_us:>12.1f}")
+    print(f"{'cached prober results':<36}{cached_us:>12.1f}")
+
+
+def run_outage(with_prober, args, groq_stub):
+    store = get_portfolio_store()
+    groq = GroqService(store)
+    groq.api_key, groq.base_url = 'stub', groq_stub.url
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=args.reset_timeout, name='groq')
+    router = ProviderRouter([AnswerProvider(groq, breaker)])
+    pipeline = ChatPipeline(FireworksService(), groq, RuleBasedChatbot(store), ResponseCache(store),
+                            CircuitBreaker(name='fireworks'), breaker, router=router)
+    prober = HealthProber([UpstreamProbe(groq, breaker)], interval=args.interval, timeout=1.0)
+
+    groq_stub.error_rate = 0.0
+    events = {}
+    stop = threading.Event()
+
+    def users():
+        while not stop.is_set():
+            pipeline._call_providers("what projects has he built", "what projects has he built", {})
+            stop.wait(1 / args.rate)
+
+    def watch_breaker():
+        while not stop.is_set():
+            state = breaker.state
+            if 'outage' in events and 'opened' not in events and state == 'open':
+                events['opened'] = time.perf_counter()
+            if 'recovered' in events and 'closed' not in events and state == 'closed':
+                events['closed'] = time.perf_counter()
+            stop.wait(0.01)
+
+    threads = [threading.Thread(target=users, daemon=True), threading.Thread(target=watch_breaker, daemon=True)]
+    for thread in threads:
+        thread.start()
+    if with_prober:
+        prober.ensure_running()
+
+    time.sleep(args.healthy)
+    posts_before = groq_stub.requests
+    probes_before = prober.probes[0].last.probes
+    events['outage'] = time.perf_counter()
+    groq_stub.error_rate = 1.0
+    time.sleep(args.outage)
+    groq_stub.error_rate = 0.0
+    events['recovered'] = time.perf_counter()
+    user_hits = groq_stub.requests - posts_before - (prober.probes[0].last.probes - probes_before)
+    time.sleep(args.recovery)
+    stop.set()
+    prober.stop()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "user_hits": user_hits,
+        "open_after_s": events['opened'] - events['outage'] if 'opened' in events else None,
+        "closed_after_s": events['closed'] - events['recovered'] if 'closed' in events else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub completion latency in seconds')
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=0.5, help='user requests per second during the outage run')
+    parser.add_argument('--interval', type=float, default=1.0, help='probe interval in seconds')
+    parser.add_argument('--reset-timeout', type=float, default=5.0)
+    parser.add_argument('--healthy', type=float, default=3.0)
+    parser.add_argument('--outage', type=float, default=15.0)
+    parser.add_argument('--recovery', type=float, default=10.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    groq_stub = StubUpstreamServer(latency=args.latency).start()
+    fireworks_stub = StubUpstreamServer(latency=args.latency, reply="What projects has Anirudh built?").start()
+    report_api_test(groq_stub.url, fireworks_stub.url, args.calls)
+
+    groq_stub.latency = 0.05
+    print(f"\n{args.rate} user requests/s, Groq failing for {args.outage:.0f}s, "
+          f"probe every {args.interval:g}s, breaker reset after {args.reset_timeout:g}s")
+    print(f"{'prober':<10}{'user calls to failing Groq':>28}{'opened after s':>16}{'closed after s':>16}")
+    for with_prober in (False, True):
+        result = run_outage(with_prober, args, groq_stub)
+        opened = f"{result['open_after_s']:.1f}" if result['open_after_s'] is not None else 'never'
+        closed = f"{result['closed_after_s']:.1f}" if result['closed_after_s'] is not None else 'never'
+        print(f"{'on' if with_prober else 'off':<10}{result['user_hits']:>28}{opened:>16}{closed:>16}")
+
+    groq_stub.shutdown()
+    fireworks_stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
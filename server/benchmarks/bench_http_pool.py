@@ -0,0 +1,83 @@
+"""
+Handshake savings of the pooled transport per /api/chat turn.
+
+Runs the real Flask app against two local stub upstreams (Groq and Fireworks)
+and compares HTTP_POOLING_ENABLED=false (new connection per call, the old
+requests.post behaviour) with the shared keep-alive session.
+
+    cd server && python -m benchmarks.bench_http_pool --turns 200
+
+Pass --certfile/--keyfile (and export REQUESTS_CA_BUNDLE) to include the TLS
+handshake in the measurement.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.stub_upstream import StubUpstreamServer
+
+
+def run_turns(client, turns):
+    timings = []
+    for i in range(turns):
+        start = time.perf_counter()
+        response = client.post('/api/chat', json={"message": f"what are his projects {i}"})
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help="stub upstream latency in seconds")
+    parser.add_argument('--certfile')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    groq = StubUpstreamServer(latency=args.latency, certfile=args.certfile, keyfile=args.keyfile).start()
+    fireworks = StubUpstreamServer(latency=args.latency, reply="What are Anirudh's projects?",
+                                   certfile=args.certfile, keyfile=args.keyfile).start()
+
+    os.environ.update({
+        'GROQ_API_KEY': 'bench', 'GROQ_API_URL': groq.url,
+        'FIREWORKS_API_KEY': 'bench', 'FIREWORKS_API_URL': fireworks.url,
+        'RESPONSE_CACHE_ENABLED': 'false',
+        # One test client address for every turn; no turn may be shed
+        'RATE_LIMIT_RPS': '0', 'UPSTREAM_MAX_CONCURRENCY': '0',
+    })
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from app import create_app
+    from services.http_session import reset_session
+
+    client = create_app().test_client()
+    results = {}
+    for label, pooling in (("per-call connection", 'false'), ("pooled keep-alive", 'true')):
+        os.environ['HTTP_POOLING_ENABLED'] = pooling
+        reset_session()
+        groq.reset_counters()
+        fireworks.reset_counters()
+
+        timings = run_turns(client, args.turns)
+        connections = groq.connections + fireworks.connections
+        results[label] = timings
+        print(f"{label:>22}: mean {statistics.mean(timings):7.2f} ms  "
+              f"p50 {statistics.median(timings):7.2f} ms  "
+              f"connections/turn {connections / args.turns:5.2f}")
+
+    saved = statistics.mean(results["per-call connection"]) - statistics.mean(results["pooled keep-alive"])
+    print(f"{'saved per turn':>22}: {saved:7.2f} ms")
+
+    groq.shutdown()
+    fireworks.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Accuracy and throughput of intent classification, before and after the
+compiled classifier.
+
+Compares the original RuleBasedChatbot._classify_intent (ordered substring
+scans, kept verbatim below) with IntentClassifier on a small labelled set of
+realistic questions, including typos and words that merely contain a keyword
+("this", "network"). The n-gram scorer only runs when NumPy is installed.
+
+IntentClassifier remembers recently classified messages, so each variant is
+timed twice: "first sight" with INTENT_CACHE_SIZE=0 (every call does the full
+work) and "repeated" with the default cache, which is what the second and
+later classifications of a message within one request cost. Timings are the
+best of --repeat runs.
+
+    cd server && python -m benchmarks.bench_intent --iterations 200
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.intent_classifier import IntentClassifier, np
+
+LABELLED = [
+    ("hello", 'greeting'),
+    ("hi there!", 'greeting'),
+    ("hey", 'greeting'),
+    ("good morning", 'greeting'),
+    ("what are his skills?", 'skills'),
+    ("which programming languages does he know", 'skills'),
+    ("what technologies does he use", 'skills'),
+    ("what is his tech stack", 'skills'),
+    ("is he good with frameworks like react", 'skills'),
+    ("hi, what are his technical skills?", 'skills'),
+    ("what skils does he have", 'skills'),
+    ("which language is he best at", 'skills'),
+    ("show me his projects", 'projects'),
+    ("what has he built", 'projects'),
+    ("tell me about his projects", 'projects'),
+    ("what does he work on", 'projects'),
+    ("can you show his github", 'projects'),
+    ("list his projcts", 'projects'),
+    ("what is this typomaster thing", 'default'),
+    ("what is his work experience", 'experience'),
+    ("has he done any internships", 'experience'),
+    ("what is his career so far", 'experience'),
+    ("any professional employment", 'experience'),
+    ("how can i contact him", 'contact'),
+    ("what is his email", 'contact'),
+    ("can i hire him", 'contact'),
+    ("how do i reach him", 'contact'),
+    ("his linkedin please", 'contact'),
+    ("where did he study", 'education'),
+    ("which university does he attend", 'education'),
+    ("what degree is he doing", 'education'),
+    ("his academic record", 'education'),
+    ("who is anirudh", 'about'),
+    ("tell me about him", 'about'),
+    ("what is his background", 'about'),
+    ("what's his story", 'about'),
+    ("which network protocols", 'default'),
+    ("what is the weather today", 'default'),
+    ("this is nice", 'default'),
+    ("ok", 'default'),
+]
+
+
+def legacy_classify_intent(message: str) -> str:
+    """RuleBasedChatbot._classify_intent before the compiled classifier (verbatim)"""
+    message_lower = message.lower()
+
+    # Greeting patterns
+    if any(word in message_lower for word in ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon']):
+        return 'greeting'
+
+    # Skills patterns
+    if any(word in message_lower for word in ['skill', 'technology', 'programming', 'languages', 'frameworks', 'tools', 'technical', 'expertise']):
+        return 'skills'
+
+    # Projects patterns
+    if any(word in message_lower for word in ['project', 'projects', 'work', 'portfolio', 'built', 'created', 'developed', 'github', 'show me his']):
+        return 'projects'
+
+    # Experience patterns
+    if any(word in message_lower for word in ['experience', 'job', 'career', 'work history', 'employment', 'professional']):
+        return 'experience'
+
+    # Contact patterns
+    if any(word in message_lower for word in ['contact', 'email', 'phone', 'reach', 'connect', 'linkedin', 'social']):
+        return 'contact'
+
+    # Education patterns
+    if any(word in message_lower for word in ['education', 'degree', 'university', 'college', 'study', 'academic']):
+        return 'education'
+
+    # About patterns
+    if any(word in message_lower for word in ['about', 'who is', 'tell me', 'background', 'bio', 'story']):
+        return 'about'
+
+    return 'default'
+
+
+def accuracy(classify):
+    misses = [(text, expected, classify(text)) for text, expected in LABELLED if classify(text) != expected]
+    return 1 - len(misses) / len(LABELLED), misses
+
+
+def per_message_us(fn, iterations, repeat=5):
+    texts = [text for text, _ in LABELLED]
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for text in texts:
+                fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / (iterations * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--show-misses', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    texts = [text for text, _ in LABELLED]
+
+    start = time.perf_counter()
+    classifier = IntentClassifier()
+    build_ms = (time.perf_counter() - start) * 1000
+    os.environ['INTENT_CACHE_SIZE'] = '0'
+    uncached = IntentClassifier()
+    os.environ['INTENT_NGRAM_ENABLED'] = 'false'
+    keywords_uncached = IntentClassifier()
+    del os.environ['INTENT_CACHE_SIZE']
+    keywords_only = IntentClassifier()
+
+    candidates = [
+        ("legacy substring scan", legacy_classify_intent),
+        ("keywords, first sight", lambda text: keywords_uncached.classify(text)[0]),
+        ("keywords, repeated", lambda text: keywords_only.classify(text)[0]),
+    ]
+    if np is not None:
+        candidates.append(("+ n-grams, first sight", lambda text: uncached.classify(text)[0]))
+        candidates.append(("+ n-grams, repeated", lambda text: classifier.classify(text)[0]))
+    else:
+        print("NumPy not installed: skipping the n-gram scorer")
+
+    print(f"classifier build: {build_ms:.1f} ms, {len(LABELLED)} labelled questions")
+    for label, classify in candidates:
+        score, misses = accuracy(classify)
+        print(f"{label:>28}: accuracy {score:6.1%}  {per_message_us(classify, args.iterations, args.repeat):7.2f} us/message")
+        if args.show_misses:
+            for text, expected, got in misses:
+                print(f"{'':>30}{text!r}: expected {expected}, got {got}")
+
+    batch_iterations = max(args.iterations // 10, 1)
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for _ in range(batch_iterations):
+            classifier.classify_many(texts)
+        best = min(best, time.perf_counter() - start)
+    batch_us = best / (batch_iterations * len(texts)) * 1e6
+    print(f"{'classify_many':>28}: {batch_us:7.2f} us/message in batches of {len(texts)} (no cache)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Request-path cost of logging.
+
+One ChatPipeline.run (Fireworks enhancement plus a Groq answer against
+in-process stub upstreams, caches off) is recorded at DEBUG level, which
+captures every log call a request makes. Those calls are then replayed
+under each setup with output going to a file, and the request thread's time
+per request is reported. Replaying isolates logging from the HTTP stack,
+whose run-to-run noise is larger than the logging cost itself.
+
+- before: every step line at INFO with its message built eagerly
+  (f-strings) and written by a basicConfig handler on the request thread
+- sync: LOG_MODE=sync, step lines demoted to lazy DEBUG, one summary line
+- queue: LOG_MODE=queue, the summary handed to the background writer
+- queue_sampled: as queue, keeping 10% of the pipeline's info records
+
+    cd server && python -m benchmarks.bench_logging --requests 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+os.environ['ENHANCEMENT_CACHE_ENABLED'] = 'false'
+
+from benchmarks.stub_upstream import StubUpstreamServer
+from services import logging_setup
+from services.chat_pipeline import ChatPipeline
+from services.circuit_breaker import CircuitBreaker
+from services.fireworks_service import FireworksService
+from services.groq_service import GroqService
+from services.portfolio_store import get_portfolio_store
+from services.response_cache import ResponseCache
+from services.rule_based_chatbot import RuleBasedChatbot
+
+SETUPS = {
+    'before': {'LOG_MODE': 'sync', 'LOG_LEVEL': 'INFO', 'LOG_SAMPLE_RATES': ''},
+    'sync': {'LOG_MODE': 'sync', 'LOG_LEVEL': 'INFO', 'LOG_SAMPLE_RATES': ''},
+    'queue': {'LOG_MODE': 'queue', 'LOG_LEVEL': 'INFO', 'LOG_SAMPLE_RATES': ''},
+    'queue_sampled': {'LOG_MODE': 'queue', 'LOG_LEVEL': 'INFO', 'LOG_SAMPLE_RATES': 'services.chat_pipeline=0.1'},
+}
+# Libraries whose own records are not part of the app's request path
+LIBRARY_LOGGERS = ('urllib3', 'httpx', 'httpcore')
+
+
+class _Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.calls = []
+
+    def emit(self, record):
+        if not record.name.startswith(LIBRARY_LOGGERS):
+            self.calls.append((record.name, record.levelno, record.msg, record.args))
+
+
+def record_request_calls():
+    """The (logger, level, msg, args) of every log call one pipeline run makes"""
+    groq_stub = StubUpstreamServer().start()
+    fireworks_stub = StubUpstreamServer(reply="What projects has Anirudh built?").start()
+    store = get_portfolio_store()
+    fireworks = FireworksService()
+    fireworks.api_key, fireworks.base_url = 'stub', fireworks_stub.url
+    groq = GroqService(store)
+    groq.api_key, groq.base_url = 'stub', groq_stub.url
+    pipeline = ChatPipeline(fireworks, groq, RuleBasedChatbot(store), ResponseCache(store),
+                            CircuitBreaker(name='fireworks'), CircuitBreaker(name='groq'))
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    recorder = _Recorder()
+    pipeline.run("warm up the connection pools")
+    root.addHandler(recorder)
+    pipeline.run("what projects has he built")
+    root.removeHandler(recorder)
+
+    groq_stub.shutdown()
+    fireworks_stub.shutdown()
+    return recorder.calls
+
+
+def reset_logging():
+    root = logging.getLogger()
+    logging_setup.stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def replay(calls, eager: bool):
+    """One request's log calls; eager builds each message first and logs it at INFO, as f-strings did"""
+    # A lone mapping argument is stored as record.args itself
+    loggers = [(logging.getLogger(name), level, msg, (args,) if isinstance(args, dict) else args)
+               for name, level, msg, args in calls]
+    if eager:
+        def run():
+            for logger, level, msg, args in loggers:
+                logger.log(max(level, logging.INFO), msg % args if args else msg)
+    else:
+        def run():
+            for logger, level, msg, args in loggers:
+                logger.log(level, msg, *args)
+    return run
+
+
+def measure(calls, name, requests, log_path):
+    reset_logging()
+    os.environ.update(SETUPS[name])
+    # configure_logging writes to sys.stderr as it is when called
+    with open(log_path, 'w') as log_file:
+        stderr, sys.stderr = sys.stderr, log_file
+        try:
+            logging_setup.configure_logging()
+        finally:
+            sys.stderr = stderr
+
+        run = replay(calls, eager=name == 'before')
+        wall_started, cpu_started = time.perf_counter(), time.thread_time()
+        for _ in range(requests):
+            run()
+        wall_us = (time.perf_counter() - wall_started) * 1e6 / requests
+        cpu_us = (time.thread_time() - cpu_started) * 1e6 / requests
+        reset_logging()
+
+    with open(log_path) as log_file:
+        lines = sum(1 for _ in log_file)
+    return wall_us, cpu_us, lines / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--setups', default=','.join(SETUPS))
+    args = parser.parse_args()
+
+    calls = record_request_calls()
+    reset_logging()
+    print(f"{len(calls)} log calls per request, {args.requests} requests per setup")
+    print(f"{'setup':<15}{'request-thread us':>19}{'CPU us':>9}{'lines / request':>17}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.setups.split(','):
+            wall_us, cpu_us, lines = measure(calls, name, args.requests, os.path.join(directory, f'{name}.log'))
+            print(f"{name:<15}{wall_us:>19.1f}{cpu_us:>9.1f}{lines:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
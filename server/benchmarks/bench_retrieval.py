@@ -0,0 +1,103 @@
+"""
+Prompt size, relevance and latency of context selection: the keyword-section
+index against BM25 retrieval, with and without hashed-embedding typo matching.
+
+Each question has a fact the answer needs; a hit means that fact made it into
+the RELEVANT DATA block. Prompt tokens are estimated (about four characters a
+token) over every message GroqService would send.
+
+    cd server && python -m benchmarks.bench_retrieval --iterations 500
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.context_index import PortfolioContextIndex
+from services.groq_service import GroqService
+from services.portfolio_store import get_portfolio_store
+from services.prompt_builder import estimate_tokens
+from services.retrieval import PortfolioRetriever, np
+
+LABELLED = [
+    ("what are his projects", "TypoMaster"),
+    ("what has he built", "BlogSphere"),
+    ("tell me about flashchat", "flash-chat-phi.vercel.app"),
+    ("which projects use mongodb", "TypoMaster"),
+    ("what did he build with react", "FlashChat"),
+    ("what are his technical skills", "scikit-learn"),
+    ("which databases does he know", "MongoDB"),
+    ("has he used flsk", "Flask"),
+    ("how good is he at python", "proficiency"),
+    ("what certifications does he have", "Udemy"),
+    ("what courses has he taken", "Machine Learning A-Z"),
+    ("where does he study", "Sri Shakthi"),
+    ("what subjects did he take in college", "Operating Systems"),
+    ("what is he focusing on lately", "scalable API design"),
+    ("what is his leetcode rating", "contest_rating"),
+    ("what hackathons has he done", "TruthTell"),
+    ("how can i reach him", "anirudh200503@gmail.com"),
+    ("thanks, bye!", "FAREWELL"),
+]
+
+
+def measure(fn, iterations):
+    questions = [question for question, _ in LABELLED]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for question in questions:
+            fn(question)
+    return (time.perf_counter() - start) / (iterations * len(questions)) * 1e6
+
+
+def prompt_tokens(service, index, question):
+    """Estimated tokens of every message GroqService would send for the question"""
+    service._index = (service.store.version, index)
+    _, payload = service._build_request(question, question)
+    return sum(estimate_tokens(message['content']) for message in payload['messages'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--show-misses', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    store = get_portfolio_store()
+    service = GroqService(store)
+
+    candidates = [
+        ("keyword sections", lambda data: PortfolioContextIndex(data)),
+        ("BM25", lambda data: PortfolioRetriever(data, use_embeddings=False)),
+    ]
+    if np is not None:
+        candidates.append(("BM25 + hashed embeddings", lambda data: PortfolioRetriever(data, use_embeddings=True)))
+    else:
+        print("NumPy not installed: skipping hashed embeddings")
+
+    print(f"{len(LABELLED)} questions, estimated tokens per request")
+    print(f"{'':>26}  {'build ms':>8}  {'us/call':>8}  {'context':>8}  {'prompt':>8}  {'max':>6}  {'hits':>6}")
+    for label, build in candidates:
+        start = time.perf_counter()
+        index = build(store.data)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        contexts = [index.relevant_data(question.lower()) for question, _ in LABELLED]
+        context_tokens = [estimate_tokens(context) for context in contexts]
+        prompts = [prompt_tokens(service, index, question) for question, _ in LABELLED]
+        misses = [(question, fact) for (question, fact), context in zip(LABELLED, contexts) if fact not in context]
+        us = measure(lambda question: index.relevant_data(question.lower()), args.iterations)
+
+        print(f"{label:>26}  {build_ms:8.2f}  {us:8.2f}  {sum(context_tokens) / len(LABELLED):8.0f}  "
+              f"{sum(prompts) / len(LABELLED):8.0f}  {max(prompts):6d}  {len(LABELLED) - len(misses):3d}/{len(LABELLED)}")
+        if args.show_misses:
+            for question, fact in misses:
+                print(f"{'':>28}{question!r}: missing {fact!r}")
+
+
+if __name__ == '__main__':
+    main()
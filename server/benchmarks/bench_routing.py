@@ -0,0 +1,109 @@
+"""
+Tail latency of the answer stage when one provider degrades.
+
+Two stub chat-completions servers stand in for Groq and Fireworks. Each
+scenario builds a fresh router, warms it up with both stubs healthy, then
+degrades the Groq stub (slow tail plus errors) and measures the answer stage
+(routing, failover and breakers included) under concurrent load:
+
+- groq_only: the old hard-wired path, falling back to the rule-based chatbot
+- ordered: Groq first, Fireworks only on failover
+- least_latency / weighted: live EWMA routing
+
+    cd server && python -m benchmarks.bench_routing --requests 400 --concurrency 8
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.stub_upstream import StubUpstreamServer
+from services.chat_pipeline import ChatPipeline
+from services.circuit_breaker import CircuitBreaker
+from services.fireworks_service import FireworksService
+from services.groq_service import GroqService
+from services.portfolio_store import get_portfolio_store
+from services.providers import AnswerProvider, CompletionService, ProviderRouter
+from services.response_cache import ResponseCache
+from services.rule_based_chatbot import RuleBasedChatbot
+
+SCENARIOS = ('groq_only', 'ordered', 'least_latency', 'weighted')
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def build_pipeline(scenario, groq_url, fireworks_url):
+    store = get_portfolio_store()
+    groq_service = GroqService(store)
+    groq_service.api_key, groq_service.base_url = 'stub', groq_url
+    groq_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=5, name='groq')
+    providers = [AnswerProvider(groq_service, groq_breaker)]
+    if scenario != 'groq_only':
+        fireworks = CompletionService(groq_service, 'fireworks', 'Fireworks', 'stub', fireworks_url, 'stub-model')
+        providers.append(AnswerProvider(fireworks, CircuitBreaker(failure_threshold=3, reset_timeout=5, name='fireworks_answer')))
+    router = ProviderRouter(providers, policy='least_latency' if scenario == 'groq_only' else scenario)
+    pipeline = ChatPipeline(
+        FireworksService(), groq_service, RuleBasedChatbot(store), ResponseCache(store),
+        CircuitBreaker(name='fireworks'), groq_breaker, router=router
+    )
+    return pipeline, router
+
+
+def load(pipeline, requests, concurrency):
+    def one(index):
+        started = time.perf_counter()
+        answer = pipeline._call_providers(f"question {index}", f"question {index}", {})
+        return (time.perf_counter() - started) * 1000, answer.provider if answer else 'rule_based'
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=100, help='healthy requests before the degradation')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='healthy Groq stub latency in seconds')
+    parser.add_argument('--fireworks-latency', type=float, default=0.08)
+    parser.add_argument('--tail-rate', type=float, default=0.3, help='share of degraded Groq calls that stall')
+    parser.add_argument('--tail-latency', type=float, default=2.0)
+    parser.add_argument('--error-rate', type=float, default=0.1, help='share of degraded Groq calls that fail')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    # Short adaptive timeouts once a few calls have been seen, as in production
+    os.environ.setdefault('UPSTREAM_TIMEOUT_MIN', '0.25')
+
+    groq_stub = StubUpstreamServer(latency=args.latency).start()
+    fireworks_stub = StubUpstreamServer(latency=args.fireworks_latency).start()
+
+    print(f"Groq degraded to {args.tail_rate:.0%} stalls of {args.tail_latency:.1f}s and {args.error_rate:.0%} errors; "
+          f"{args.requests} requests at concurrency {args.concurrency}")
+    print(f"{'scenario':<15}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  answered by")
+    for scenario in args.scenarios.split(','):
+        groq_stub.tail_rate = groq_stub.tail_latency = groq_stub.error_rate = 0.0
+        pipeline, router = build_pipeline(scenario, groq_stub.url, fireworks_stub.url)
+        load(pipeline, args.warmup, args.concurrency)
+
+        groq_stub.tail_rate, groq_stub.tail_latency, groq_stub.error_rate = args.tail_rate, args.tail_latency, args.error_rate
+        results = load(pipeline, args.requests, args.concurrency)
+        latencies = sorted(latency for latency, _ in results)
+        sources = Counter(source for _, source in results)
+        shares = ', '.join(f"{name} {count / len(results):.0%}" for name, count in sources.most_common())
+        print(f"{scenario:<15}{percentile(latencies, 0.5):>9.0f}{percentile(latencies, 0.95):>9.0f}"
+              f"{percentile(latencies, 0.99):>9.0f}{latencies[-1]:>9.0f}  {shares}, {router.failovers} failovers")
+
+    groq_stub.shutdown()
+    fireworks_stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
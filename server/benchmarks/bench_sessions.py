@@ -0,0 +1,114 @@
+"""
+Memory and latency of the conversation session stores.
+
+Fills each store with --sessions sessions of --exchanges question/answer
+pairs and reports traced Python memory per 10k sessions for the in-memory
+store (deque ring buffers of __slots__ turns) against a plain dict-of-lists
+of dict messages, plus append/history latency and file size for SQLite.
+Stored text is the same for every layout, so the difference is the
+per-turn overhead.
+
+    cd server && python -m benchmarks.bench_sessions --sessions 10000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.prompt_builder import PromptBuilder
+from services.sessions import MemorySessionStore, SqliteSessionStore, new_session_id
+
+QUESTION = "tell me more about the second project he built, which stack does it use"
+ANSWER = ("**FlashChat** is a real-time chat application built with React, Node.js, Express and "
+          "Socket.IO, with MongoDB for message history. ") * 6
+
+
+def _traced(fill) -> int:
+    """Bytes still allocated after fill() returns the structure it built"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = fill()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return after - before
+
+
+def fill_dicts(session_ids, exchanges, max_chars):
+    sessions = {}
+    question, answer = QUESTION[:max_chars], ANSWER[:max_chars]
+    for session_id in session_ids:
+        messages = sessions.setdefault(session_id, [])
+        for _ in range(exchanges):
+            now = time.time()
+            messages.append({"role": "user", "content": question, "created_at": now})
+            messages.append({"role": "assistant", "content": answer, "created_at": now})
+    return sessions
+
+
+def fill_store(store, session_ids, exchanges):
+    for session_id in session_ids:
+        for _ in range(exchanges):
+            store.append(session_id, QUESTION, ANSWER)
+    return store
+
+
+def timed(fn, calls: int) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--exchanges', type=int, default=4, help='exchanges kept per session')
+    parser.add_argument('--max-chars', type=int, default=1200, help='stored message length cap')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    session_ids = [new_session_id() for _ in range(args.sessions)]
+    scale = 10000 / args.sessions
+    text_bytes = sys.getsizeof(QUESTION[:args.max_chars]) + sys.getsizeof(ANSWER[:args.max_chars])
+    # Strings are shared in both layouts; count them once per exchange as a real server would hold them
+    content_bytes = text_bytes * args.exchanges * args.sessions
+
+    print(f"{args.sessions} sessions x {args.exchanges} exchanges, messages capped at {args.max_chars} chars")
+    print(f"{'layout':<26}{'MB / 10k sessions':>18}{'overhead B / turn':>19}")
+    turns = args.sessions * args.exchanges * 2
+
+    dict_bytes = _traced(lambda: fill_dicts(session_ids, args.exchanges, args.max_chars))
+    memory_bytes = _traced(lambda: fill_store(
+        MemorySessionStore(args.exchanges, args.max_chars, 3600, args.sessions), session_ids, args.exchanges))
+    for name, traced in (('dict of lists of dicts', dict_bytes), ('MemorySessionStore', memory_bytes)):
+        print(f"{name:<26}{(traced + content_bytes) * scale / 1e6:>18.1f}{traced / turns:>19.0f}")
+
+    store = MemorySessionStore(args.exchanges, args.max_chars, 3600, args.sessions)
+    append_us = timed(lambda: fill_store(store, session_ids, args.exchanges), args.sessions * args.exchanges)
+    history_us = timed(lambda: [store.history(session_id) for session_id in session_ids], args.sessions)
+    print(f"\nmemory: append {append_us:.1f} us, history {history_us:.1f} us")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sessions.sqlite3')
+        store = SqliteSessionStore(path, args.exchanges, args.max_chars, 3600)
+        append_us = timed(lambda: fill_store(store, session_ids, args.exchanges), args.sessions * args.exchanges)
+        history_us = timed(lambda: [store.history(session_id) for session_id in session_ids], args.sessions)
+        store._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size = os.path.getsize(path)
+        print(f"sqlite: append {append_us:.1f} us, history {history_us:.1f} us, "
+              f"file {size * scale / 1e6:.1f} MB / 10k sessions")
+
+    builder = PromptBuilder()
+    store = fill_store(MemorySessionStore(args.exchanges, args.max_chars, 3600, 1), ['bench'], args.exchanges)
+    prompt = builder.build("PROJECTS:\n" + ANSWER, QUESTION, QUESTION, store.history('bench'))
+    print(f"\nprompt with full history: ~{prompt.estimated_tokens} tokens (budget {builder.token_budget}), "
+          f"{prompt.history_turns} of {args.exchanges * 2} turns kept")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Startup time and per-worker memory under gunicorn, with and without preload.
+
+For each setup a gunicorn master with --workers workers is started from
+server/ (so gunicorn.conf.py applies) against an in-process stub Groq, and
+driven with --requests /api/chat calls so every worker has served traffic.
+Reported per setup:
+
+- first response: spawn to the first 200 from /health
+- CPU: seconds the master and workers spent starting up and serving the
+  requests (the same for every setup, so the difference is startup)
+- per worker: RSS, PSS (shared pages split between the processes mapping
+  them) and private memory, from /proc/<pid>/smaps_rollup (Linux only)
+- total PSS: master plus workers, the footprint of the whole server
+
+Setups:
+
+- per_worker: GUNICORN_PRELOAD=false, every worker imports and builds the app
+- preload: the master builds it once and the workers are forked from it
+
+    cd server && python -m benchmarks.bench_startup --workers 4 --requests 400
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_async import SERVER_DIR, free_port, spawn
+from benchmarks.stub_upstream import StubUpstreamServer
+
+SETUPS = {
+    'per_worker': {'GUNICORN_PRELOAD': 'false'},
+    'preload': {'GUNICORN_PRELOAD': 'true'},
+}
+QUESTIONS_PATH = os.path.join(SERVER_DIR, 'data', 'common_questions.json')
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def children(pid):
+    """Pids whose parent is `pid`"""
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as file:
+                    fields = file.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == pid:
+                found.append(int(entry))
+    return found
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as file:
+        fields = file.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def memory_kb(pid):
+    """Rss, Pss and private kB of one process"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0])
+    return values['Rss'], values['Pss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def drive(base_url, questions, total, concurrency):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(i):
+        response = session.post(f"{base_url}/api/chat", json={"message": f"{questions[i % len(questions)]} {i}"}, timeout=60)
+        response.raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+
+
+def measure(setup, args, env, questions):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = spawn(['-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '-w', str(args.workers)],
+                    env={**env, **SETUPS[setup]})
+    try:
+        while True:
+            try:
+                if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except requests.exceptions.RequestException:
+                pass
+            if process.poll() is not None or time.perf_counter() - started > 60:
+                raise RuntimeError(f"{setup}: gunicorn did not come up")
+            time.sleep(0.01)
+        first_response_ms = (time.perf_counter() - started) * 1000
+        # Workers still loading the app in per_worker mode finish before the load ends
+        drive(base_url, questions, args.requests, args.workers * 8)
+
+        workers = children(process.pid)
+        cpu = cpu_seconds(process.pid) + sum(cpu_seconds(pid) for pid in workers)
+        usage = [memory_kb(pid) for pid in workers]
+        master_pss = memory_kb(process.pid)[1]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    count = len(usage)
+    return {
+        "first_response_ms": first_response_ms,
+        "cpu_seconds": cpu,
+        "rss_mb": sum(rss for rss, _, _ in usage) / count / 1024,
+        "pss_mb": sum(pss for _, pss, _ in usage) / count / 1024,
+        "private_mb": sum(private for _, _, private in usage) / count / 1024,
+        "total_pss_mb": (master_pss + sum(pss for _, pss, _ in usage)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--setups', default=','.join(SETUPS))
+    args = parser.parse_args()
+
+    groq = StubUpstreamServer(latency=0.01).start()
+    env = {
+        **os.environ,
+        'GROQ_API_KEY': 'bench', 'GROQ_API_URL': groq.url, 'FIREWORKS_API_KEY': '',
+        'RESPONSE_CACHE_ENABLED': 'false', 'LOG_LEVEL': 'WARNING',
+        'RATE_LIMIT_RPS': '0', 'UPSTREAM_MAX_CONCURRENCY': '0',
+    }
+    with open(QUESTIONS_PATH, encoding='utf-8') as file:
+        questions = json.load(file)
+
+    print(f"{args.workers} gthread workers, {args.requests} chat requests per setup")
+    print(f"{'setup':<12}{'first response ms':>19}{'CPU s':>8}{'RSS MB':>9}{'PSS MB':>9}"
+          f"{'private MB':>12}{'total PSS MB':>14}")
+    for setup in args.setups.split(','):
+        result = measure(setup, args, env, questions)
+        print(f"{setup:<12}{result['first_response_ms']:>19.0f}{result['cpu_seconds']:>8.2f}{result['rss_mb']:>9.1f}"
+              f"{result['pss_mb']:>9.1f}{result['private_mb']:>12.1f}{result['total_pss_mb']:>14.1f}")
+
+    groq.shutdown()
+
+
+if __name__ == '__main__':
+    main()
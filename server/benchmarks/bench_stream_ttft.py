@@ -0,0 +1,69 @@
+"""
+Time-to-first-token of /api/chat/stream versus the blocking /api/chat.
+
+The stub Groq upstream emits one word every --token-delay seconds, so the
+blocking endpoint pays for the whole completion while the streaming endpoint
+only waits for the first delta.
+
+    cd server && python -m benchmarks.bench_stream_ttft --turns 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.stub_upstream import StubUpstreamServer
+
+REPLY = ("Anirudh has built several full-stack projects including FlashChat, TypoMaster, "
+         "a sentiment analysis app and BlogSphere using React, Node.js, Flask and MongoDB.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.1, help="stub time before the first token (s)")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="stub delay between tokens (s)")
+    args = parser.parse_args()
+
+    groq = StubUpstreamServer(latency=args.latency, token_delay=args.token_delay, reply=REPLY).start()
+    os.environ.update({
+        'GROQ_API_KEY': 'bench', 'GROQ_API_URL': groq.url,
+        'FIREWORKS_API_KEY': '', 'RESPONSE_CACHE_ENABLED': 'false',
+        # One test client address for every turn; no turn may be shed
+        'RATE_LIMIT_RPS': '0', 'UPSTREAM_MAX_CONCURRENCY': '0',
+    })
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from app import create_app
+    client = create_app().test_client()
+
+    blocking, ttft, stream_total = [], [], []
+    for i in range(args.turns):
+        start = time.perf_counter()
+        client.post('/api/chat', json={"message": f"what are his projects {i}"})
+        blocking.append((time.perf_counter() - start) * 1000)
+
+        response = client.post('/api/chat/stream', json={"message": f"what are his projects {i}"}, buffered=False)
+        for raw in response.response:
+            for event in raw.decode('utf-8').split('\n\n'):
+                if event.startswith('event: done'):
+                    timings = json.loads(event.split('data: ', 1)[1])
+                    ttft.append(timings['ttft_ms'])
+                    stream_total.append(timings['total_ms'])
+        response.close()
+
+    print(f"{'blocking /api/chat':>28}: p50 {statistics.median(blocking):8.2f} ms")
+    print(f"{'stream time-to-first-token':>28}: p50 {statistics.median(ttft):8.2f} ms")
+    print(f"{'stream total':>28}: p50 {statistics.median(stream_total):8.2f} ms")
+
+    groq.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the Groq / Fireworks chat-completions APIs.
+
+Used by the benchmarks so they never touch the real upstreams. The server
+speaks HTTP/1.1 with keep-alive and counts accepted TCP connections, which is
+what the pooled transport is meant to save. Failures and slow tails can be
+injected with error_rate, tail_rate and tail_latency.
+"""
+import json
+import random
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, port=0, latency=0.0, reply="Stub answer about Anirudh.", certfile=None, keyfile=None,
+                 token_delay=0.0, error_rate=0.0, tail_rate=0.0, tail_latency=0.0):
+        super().__init__(('127.0.0.1', port), _StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        # A tail_rate share of requests waits tail_latency seconds on top of latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.connections = 0
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+        self.scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.scheme = 'https'
+
+    @property
+    def url(self) -> str:
+        return f"{self.scheme}://127.0.0.1:{self.server_address[1]}/v1/chat/completions"
+
+    def get_request(self):
+        conn, addr = super().get_request()
+        with self._counter_lock:
+            self.connections += 1
+        return conn, addr
+
+    def count_request(self):
+        with self._counter_lock:
+            self.requests += 1
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.connections = 0
+            self.requests = 0
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Without these, headers and body go out in separate segments and the
+    # client's delayed ACK adds ~40 ms to every keep-alive request.
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.count_request()
+
+        delay = self.server.latency
+        if self.server.tail_rate and random.random() < self.server.tail_rate:
+            delay += self.server.tail_latency
+        if delay:
+            time.sleep(delay)
+
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._error_reply()
+            return
+
+        if payload.get("stream"):
+            self._stream_reply()
+            return
+
+        # A blocking completion still has to generate every token first
+        if self.server.token_delay:
+            time.sleep(self.server.token_delay * (len(self.server.reply.split(' ')) - 1))
+
+        body = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.server.reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """The model listing, which the health prober uses as a cheap probe; no completion latency applies"""
+        self.server.count_request()
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._error_reply()
+            return
+
+        body = json.dumps({"object": "list", "data": [{"id": "stub", "object": "model"}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error_reply(self):
+        body = json.dumps({"error": {"message": "Injected stub failure", "type": "server_error"}}).encode('utf-8')
+        self.send_response(500)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_reply(self):
+        """Send the reply word by word as chat.completion.chunk events"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        words = self.server.reply.split(' ')
+        for i, word in enumerate(words):
+            if i and self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            delta = word if i == 0 else ' ' + word
+            event = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": delta}}]}
+            if i == len(words) - 1:
+                # Groq reports usage on the last chunk
+                event["x_groq"] = {"usage": {"prompt_tokens": 10, "completion_tokens": len(words), "total_tokens": 10 + len(words)}}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a stub chat-completions upstream")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--reply', default="Stub answer about Anirudh.")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--tail-rate', type=float, default=0.0)
+    parser.add_argument('--tail-latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubUpstreamServer(port=args.port, latency=args.latency, reply=args.reply, token_delay=args.token_delay,
+                                error_rate=args.error_rate, tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
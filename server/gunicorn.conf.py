@@ -0,0 +1,45 @@
+"""
+Gunicorn settings, read automatically when gunicorn is started from server/:
+
+    cd server && gunicorn
+    cd server && gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+
+With preload_app the master imports the app and builds the shared services
+(portfolio data, retrieval index, rendered answers, intent tables) once, then
+forks the workers, which share those pages copy-on-write instead of each
+building its own. GUNICORN_PRELOAD=false builds the app in every worker.
+
+Each worker is a separate process with its own in-memory caches. Conversation
+sessions therefore default to SQLite (SESSION_STORE=sqlite, shared by the
+workers on the host) when there is more than one worker; SESSION_STORE=memory
+keeps them per worker and needs one worker or sticky routing.
+"""
+import gc
+import os
+
+wsgi_app = os.getenv('GUNICORN_APP', 'app:create_app()')
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Lets the app see how many workers it runs in (in-memory sessions warn about it)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+if worker_class == 'gthread':
+    # The upstream concurrency cap defaults to one slot per worker thread
+    os.environ['GUNICORN_THREADS'] = str(threads)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+# Upstream calls time out after GROQ_TIMEOUT (15 s) at most
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+
+
+def when_ready(server):
+    """
+    Runs in the master after the preloaded app is built, before any fork.
+    Freezing moves every object built so far out of the collector's reach:
+    a worker's garbage collections would otherwise write to the header of
+    each of those objects and un-share the pages they live on.
+    """
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info("Froze %d objects built by the preloaded app", gc.get_freeze_count())
@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 import logging
 
+from services.http_encoding import conditional
+
 # This file is kept for modular structure
 # The main chat logic is implemented in app.py
 # Additional routes can be added here if needed
@@ -12,27 +14,30 @@ chat_bp = Blueprint('chat', __name__)
 @chat_bp.route('/health', methods=['GET'])
 def health():
     """Health check for chat service"""
-    return jsonify({
+    response = jsonify({
         "status": "healthy",
         "service": "chat_routes",
         "message": "Chat service is running"
     })
+    return conditional(response, request, current_app.extensions['aniru'].health_snapshot.ttl)
 
 @chat_bp.route('/test', methods=['POST'])
 def test_services():
-    """Test all services"""
+    """
+    Test all services. Upstreams report the health prober's latest results;
+    ?refresh=true probes them all again first.
+    """
     try:
-        from services.fireworks_service import FireworksService
-        from services.groq_service import GroqService
-        from services.rule_based_chatbot import RuleBasedChatbot
-        
-        fireworks_service = FireworksService()
-        groq_service = GroqService()
-        rule_based_chatbot = RuleBasedChatbot()
-        
+        # Reuse the app's service instances and shared portfolio data
+        services = current_app.extensions['aniru']
+        prober = services.health_prober
+        rule_based_chatbot = services.rule_based_chatbot
+
+        if request.args.get('refresh', '').lower() == 'true':
+            prober.probe_all()
+
         results = {
-            "fireworks": fireworks_service.test_connection(),
-            "groq": groq_service.test_connection(),
+            **prober.results(),
             "rule_based": rule_based_chatbot.test_functionality()
         }
         
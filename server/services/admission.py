@@ -0,0 +1,252 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict, deque
+from typing import Optional
+
+from services.metrics import SHED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(remote_addr: Optional[str], forwarded_for: Optional[str] = None, trust_proxy: bool = False) -> Optional[str]:
+    """The client address, taken from X-Forwarded-For only behind a trusted proxy"""
+    if trust_proxy and forwarded_for:
+        return forwarded_for.split(',')[0].strip() or remote_addr
+    return remote_addr
+
+
+class TokenBucketLimiter:
+    """
+    Per-client token buckets: `rate` requests a second sustained, up to
+    `burst` at once. Buckets live in an LRU capped at `max_clients`, so a
+    flood of distinct addresses cannot grow memory without bound.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def allow(self, client: Optional[str]) -> bool:
+        if not self.enabled or not client:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            self.limited += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "clients": len(self._buckets),
+                "limited": self.limited,
+            }
+
+
+class _Waiter:
+    __slots__ = ('event', 'loop', 'future', 'granted')
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.event = None if loop is not None else threading.Event()
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+
+    def grant(self):
+        """Hand a released slot to this waiter (limiter lock held)"""
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class ConcurrencyLimiter:
+    """
+    At most `max_concurrent` holders at a time, with a FIFO queue of at most
+    `max_queue` waiters who give up after `queue_timeout` seconds. Threads use
+    acquire() and coroutines aacquire(); both share the same slots, and a
+    released slot is handed straight to the oldest waiter. A `max_concurrent`
+    of 0 admits everyone and only counts holders.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.queued = 0
+        self.queue_full = 0
+        self.queue_timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _try_enter(self, waiter_factory):
+        """(admitted, waiter): admitted now, queued behind a waiter, or rejected (lock held)"""
+        if not self.enabled or self._active < self.max_concurrent:
+            self._active += 1
+            self.admitted += 1
+            return True, None
+        if len(self._queue) >= self.max_queue:
+            self.queue_full += 1
+            SHED_REQUESTS.labels('queue_full').inc()
+            return False, None
+        waiter = waiter_factory()
+        self._queue.append(waiter)
+        self.queued += 1
+        return False, waiter
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        """After waking or timing out: True if the waiter now holds a slot"""
+        with self._lock:
+            if waiter.granted:
+                self.admitted += 1
+                return True
+            self._queue.remove(waiter)
+            self.queue_timeouts += 1
+        SHED_REQUESTS.labels('queue_timeout').inc()
+        return False
+
+    def acquire(self) -> bool:
+        with self._lock:
+            admitted, waiter = self._try_enter(_Waiter)
+        if waiter is None:
+            return admitted
+        waiter.event.wait(self.queue_timeout)
+        return self._settle(waiter)
+
+    async def aacquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            admitted, waiter = self._try_enter(lambda: _Waiter(loop))
+        if waiter is None:
+            return admitted
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._queue.remove(waiter)
+            if granted:
+                self.release()
+            raise
+        return self._settle(waiter)
+
+    def release(self):
+        with self._lock:
+            if self._queue:
+                # The slot passes to the next waiter; the active count is unchanged
+                self._queue.popleft().grant()
+            else:
+                self._active -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "in_flight": self._active,
+                "queue_depth": len(self._queue),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "queue_full": self.queue_full,
+                "queue_timeouts": self.queue_timeouts,
+            }
+
+
+class AdmissionController:
+    """
+    Front door for chat requests: a per-client token bucket (RATE_LIMIT_RPS,
+    RATE_LIMIT_BURST) and a cap on concurrent upstream LLM pipelines
+    (UPSTREAM_MAX_CONCURRENCY) with a bounded queue (UPSTREAM_QUEUE_SIZE,
+    UPSTREAM_QUEUE_TIMEOUT). Callers answer rejected requests from the
+    precomputed rule-based answers instead of letting them wait on upstream
+    timeouts.
+
+    Rate limiting is off (0) unless configured. Buckets are keyed by the
+    client address, which is the X-Forwarded-For client only with
+    TRUST_PROXY_HEADERS; otherwise it is the peer address, which behind the
+    Vercel rewrite is the proxy's, shared by every user.
+
+    The concurrency cap defaults to what the worker can actually carry: its
+    thread count (GUNICORN_THREADS, exported by gunicorn.conf.py for gthread
+    workers). asgi.py raises it to ASYNC_HTTP_MAX_CONNECTIONS for the event
+    loop. UPSTREAM_MAX_CONCURRENCY=0 turns the cap off.
+    """
+
+    def __init__(self):
+        self.trust_proxy = os.getenv('TRUST_PROXY_HEADERS', 'false').lower() == 'true'
+        rate = float(os.getenv('RATE_LIMIT_RPS', '0'))
+        if rate > 0 and not self.trust_proxy:
+            logger.warning("RATE_LIMIT_RPS applies per peer address because TRUST_PROXY_HEADERS is not set; "
+                           "behind a proxy every client shares the proxy's bucket")
+        self.rate_limiter = TokenBucketLimiter(rate, float(os.getenv('RATE_LIMIT_BURST', '10')))
+        self.upstream = ConcurrencyLimiter(
+            int(os.getenv('UPSTREAM_MAX_CONCURRENCY', os.getenv('GUNICORN_THREADS', '8'))),
+            int(os.getenv('UPSTREAM_QUEUE_SIZE', '32')),
+            float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', '2')),
+        )
+
+    def client(self, remote_addr: Optional[str], forwarded_for: Optional[str] = None) -> Optional[str]:
+        return client_ip(remote_addr, forwarded_for, self.trust_proxy)
+
+    def allow(self, client: Optional[str]) -> bool:
+        """Take a token from the client's bucket; False when it is rate limited"""
+        if self.rate_limiter.allow(client):
+            return True
+        SHED_REQUESTS.labels('rate_limited').inc()
+        logger.info("Rate limited client %s", client)
+        return False
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        return {
+            "rate_limit": self.rate_limiter.stats(),
+            "upstream": self.upstream.stats(),
+        }
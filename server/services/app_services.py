@@ -0,0 +1,71 @@
+import os
+import time
+import logging
+
+from services.fireworks_service import FireworksService
+from services.groq_service import GroqService
+from services.rule_based_chatbot import RuleBasedChatbot
+from services.response_cache import ResponseCache
+from services.portfolio_store import get_portfolio_store
+from services.circuit_breaker import CircuitBreaker
+from services.chat_pipeline import ChatPipeline
+from services.admission import AdmissionController
+from services.providers import build_answer_router
+from services.sessions import create_session_store
+from services.http_encoding import ResponseCompressor, TimedSnapshot
+from services.health_prober import HealthProber, UpstreamProbe
+
+logger = logging.getLogger(__name__)
+
+
+class AppServices:
+    """
+    The long-lived objects the routes share, built once per process by
+    create_app(). Under gunicorn with preload_app they are built in the
+    master before it forks, so every worker starts with the parsed portfolio
+    data, the retrieval index, the rendered rule-based answers and the intent
+    classifier's tables already in (copy-on-write shared) memory.
+    """
+
+    def __init__(self):
+        self.portfolio_store = get_portfolio_store()
+        self.fireworks_service = FireworksService()
+        self.groq_service = GroqService(self.portfolio_store)
+        self.rule_based_chatbot = RuleBasedChatbot(self.portfolio_store)
+        self.response_cache = ResponseCache(
+            self.portfolio_store, classify=lambda question: self.rule_based_chatbot.classify_with_confidence(question)[0]
+        )
+
+        self.fireworks_circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, name='fireworks')
+        self.groq_circuit_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, name='groq')
+
+        self.admission = AdmissionController()
+        self.session_store = create_session_store()
+        self.answer_router = build_answer_router(self.groq_service, self.groq_circuit_breaker)
+
+        self.chat_pipeline = ChatPipeline(
+            self.fireworks_service, self.groq_service, self.rule_based_chatbot, self.response_cache,
+            self.fireworks_circuit_breaker, self.groq_circuit_breaker, self.admission, self.session_store,
+            self.answer_router
+        )
+
+        # Started by the first request each process serves
+        self.health_prober = HealthProber(
+            [UpstreamProbe(self.fireworks_service, self.fireworks_circuit_breaker)]
+            + [UpstreamProbe(provider.service, provider.breaker) for provider in self.answer_router.providers]
+        )
+
+        self.compressor = ResponseCompressor()
+        # Status endpoints: max-age, and how long /health reuses one body
+        self.health_snapshot = TimedSnapshot(int(os.getenv('HEALTH_CACHE_SECONDS', '2')))
+        # Rule-based answers: how long a CDN or browser may reuse one before revalidating
+        self.answer_max_age = int(os.getenv('RULE_ANSWER_MAX_AGE', '300'))
+
+    def warm_up(self):
+        """Build the tables the first request would otherwise build, in this process rather than per worker"""
+        started = time.perf_counter()
+        # Retrieval index for the current data version, plus NumPy's first-call setup
+        self.groq_service.context_index.relevant_data('what projects has he built')
+        # No keyword matches, so this runs the hashed n-gram scorer
+        self.rule_based_chatbot.get_response('qwerty')
+        logger.info("Warmed up in %.1f ms", (time.perf_counter() - started) * 1000)
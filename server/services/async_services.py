@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Optional, Sequence
+
+from services.http_session import get_async_client
+from services.metrics import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFireworksService:
+    """
+    Non-blocking counterpart of FireworksService. Prompt construction and
+    response parsing are delegated to the wrapped sync service so both paths
+    always send the same request.
+    """
+
+    def __init__(self, fireworks_service):
+        self.service = fireworks_service
+
+    def is_available(self) -> bool:
+        return self.service.is_available()
+
+    async def enhance_question(self, user_question: str) -> str:
+        """Enhance the user's question without blocking the event loop"""
+        if not self.service.api_key:
+            logger.warning("Fireworks API key not found")
+            return user_question
+
+        cache = self.service.enhancement_cache
+        # A memory miss may read the SQLite store, which must not block the event loop
+        cached = await asyncio.to_thread(cache.get, user_question) if cache.persistent else cache.get(user_question)
+        if cached is not None:
+            logger.debug("Using cached question enhancement")
+            return cached
+
+        import httpx
+
+        try:
+            headers, payload = self.service._build_request(user_question)
+
+            logger.debug("Sending async request to Fireworks API for question enhancement")
+            response = await get_async_client(self.service.base_url).post(self.service.base_url, headers=headers, json=payload, timeout=10)
+            response.raise_for_status()
+
+            enhanced_question = self.service._parse_enhanced_question(response.json())
+            if cache.persistent:
+                await asyncio.to_thread(cache.set, user_question, enhanced_question)
+            else:
+                cache.set(user_question, enhanced_question)
+            logger.debug("Question enhanced successfully: %s → %s", user_question, enhanced_question)
+            return enhanced_question
+
+        except httpx.HTTPError as e:
+            logger.error(f"Fireworks API request failed: {str(e)}")
+            raise Exception(f"Fireworks API error: {str(e)}")
+        except KeyError as e:
+            logger.error(f"Unexpected Fireworks API response format: {str(e)}")
+            raise Exception("Invalid response format from Fireworks API")
+        except Exception as e:
+            logger.error(f"Fireworks service error: {str(e)}")
+            raise Exception(f"Fireworks service error: {str(e)}")
+
+
+class AsyncGroqService:
+    """Non-blocking counterpart of GroqService sharing its prompt and portfolio data"""
+
+    def __init__(self, groq_service):
+        self.service = groq_service
+
+    def is_available(self) -> bool:
+        return self.service.is_available()
+
+    async def get_response(self, enhanced_question: str, original_question: str, timeout: Optional[float] = None,
+                           history: Sequence = ()) -> str:
+        """Get a completion from the wrapped service's endpoint without blocking the event loop"""
+        if not self.service.api_key:
+            logger.warning(f"{self.service.label} API key not found")
+            raise Exception(f"{self.service.label} API key not configured")
+
+        if not enhanced_question.strip():
+            raise Exception("Empty question provided")
+
+        import httpx
+
+        try:
+            headers, payload = self.service._build_request(enhanced_question, original_question, history=history)
+
+            logger.debug("Sending async request to %s API", self.service.label)
+            response = await get_async_client(self.service.base_url).post(self.service.base_url, headers=headers, json=payload, timeout=timeout or self.service.timeout)
+            response.raise_for_status()
+
+            result = response.json()
+            ai_response = result['choices'][0]['message']['content'].strip()
+            record_usage(self.service.name, result)
+
+            logger.debug("Successfully got response from %s API", self.service.label)
+            return ai_response
+
+        except httpx.HTTPError as e:
+            logger.error(f"{self.service.label} API request failed: {str(e)}")
+            raise Exception(f"{self.service.label} API error: {str(e)}")
+        except KeyError as e:
+            logger.error(f"Unexpected {self.service.label} API response format: {str(e)}")
+            raise Exception(f"Invalid response format from {self.service.label} API")
+        except Exception as e:
+            logger.error(f"{self.service.label} service error: {str(e)}")
+            raise Exception(f"{self.service.label} service error: {str(e)}")
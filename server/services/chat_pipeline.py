@@ -0,0 +1,791 @@
+import os
+import time
+import asyncio
+import logging
+from functools import partial
+from typing import Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from services.async_services import AsyncFireworksService
+from services.latency import LatencyTracker
+from services.logging_setup import KeyValues
+from services.metrics import CHAT_RESPONSES, STAGE_SECONDS, take_usage
+from services.providers import Answer, AnswerProvider, ProviderRouter
+from services.response_cache import normalize_question
+from services.sessions import new_session_id, valid_session_id
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Runs the concurrent stages of the sync pipeline (speculative enhancement)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PIPELINE_WORKERS', '16')),
+    thread_name_prefix='chat-pipeline'
+)
+# Runs hedged provider attempts; separate from _executor so speculative stages
+# waiting on a hedge can never starve the pool they are running in
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('HEDGE_WORKERS', '16')),
+    thread_name_prefix='groq-hedge'
+)
+# Runs the items of batch requests; separate again so a batch can never
+# occupy the workers its own items need for speculative stages
+_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_WORKERS', '8')),
+    thread_name_prefix='chat-batch'
+)
+# Keeps fire-and-forget tasks referenced until they finish
+_background_tasks = set()
+
+SHED_REASONS = {
+    'rate_limited': "Too many requests from this client",
+    'busy': "Server busy, answered without the AI services",
+}
+
+EMERGENCY_RESPONSE = """Hello! I'm Aniru AI, Anirudh's personal assistant. I'm currently experiencing some technical difficulties, but I'm here to help you learn about Anirudh.
+
+Anirudh is a passionate computer science student and full-stack developer with expertise in:
+• Programming Languages: C++, Python, JavaScript
+• Technologies: React, Node.js, Express, MongoDB
+• Specialties: Data Structures, Algorithms, System Design
+
+You can reach out to Anirudh at:
+• Email: anirudh200503@gmail.com
+• LinkedIn: https://www.linkedin.com/in/anirudh-t-b5b26a2aa/
+• GitHub: https://github.com/anirudh-pedro
+
+Please try asking your question again, and I'll do my best to provide you with detailed information about Anirudh's projects and achievements!"""
+
+
+class ChatPipeline:
+    """
+    The /api/chat pipeline: response cache, Fireworks enhancement, an answer
+    from the routed providers (Groq by default), then the rule-based
+    fallbacks. run() is used by the Flask views and arun() by the ASGI entry
+    point; both share the same services, breakers and cache.
+
+    Messages sent with a session id are answered with the session's earlier
+    turns. Once a session has history its answers depend on it, so they skip
+    the response cache, coalescing and enhancement.
+    """
+
+    def __init__(self, fireworks_service, groq_service, rule_based_chatbot, response_cache,
+                 fireworks_circuit_breaker, groq_circuit_breaker, admission=None, sessions=None, router=None):
+        self.fireworks_service = fireworks_service
+        self.groq_service = groq_service
+        self.rule_based_chatbot = rule_based_chatbot
+        self.response_cache = response_cache
+        self.fireworks_circuit_breaker = fireworks_circuit_breaker
+        self.groq_circuit_breaker = groq_circuit_breaker
+        # Optional AdmissionController; without one every request goes upstream
+        self.admission = admission
+        # Optional SessionStore; without one session ids are ignored
+        self.sessions = sessions
+
+        self.async_fireworks_service = AsyncFireworksService(fireworks_service)
+        # Answer providers in routing order; Groq alone unless a router is given
+        self.router = router or ProviderRouter([AnswerProvider(groq_service, groq_circuit_breaker)])
+
+        # sequential: enhance, then answer. speculative: answer the raw message
+        # while enhancing and keep the result chosen by the speculative policy.
+        self.enhancement_mode = os.getenv('ENHANCEMENT_MODE', 'sequential').lower()
+        # prefer_raw: return the raw-message answer as soon as it arrives.
+        # prefer_enhanced: keep it only if the enhanced question asks the same thing
+        # (same text or same rule-based intent), else cancel it and answer the enhanced one.
+        self.speculative_policy = os.getenv('SPECULATIVE_POLICY', 'prefer_raw').lower()
+        self.skip_confident_enhancement = os.getenv('ENHANCEMENT_SKIP_CONFIDENT', 'false').lower() == 'true'
+        self.skip_confidence_threshold = float(os.getenv('ENHANCEMENT_SKIP_CONFIDENCE', '0.8'))
+
+        # Per-stage latency; each provider's successful attempts also drive its adaptive timeout
+        self.latency = LatencyTracker()
+        self.groq_timeout = self.router.primary.timeout
+        # off: wait for the provider. retry: send a second attempt once the first passes
+        # the hedge delay. rule_based: answer from the rule-based chatbot instead.
+        self.hedging_mode = os.getenv('HEDGING_MODE', 'off').lower()
+        # Identical questions arriving together share one upstream pipeline run
+        self.coalescer = SingleFlight(os.getenv('COALESCE_ENABLED', 'true').lower() == 'true')
+        # Questions of one batch answered at the same time
+        self.batch_parallelism = int(os.getenv('BATCH_PARALLELISM', '4'))
+
+    def _cached_result(self, user_message: str):
+        cached = self.response_cache.get(user_message)
+        if cached is not None:
+            logger.info("Chat request: source=%s cached=true", cached.get('source', 'groq_api'))
+            CHAT_RESPONSES.labels(cached.get('source', 'groq_api'), 'true').inc()
+            return {**cached, "original_message": user_message, "cached": True}
+        return None
+
+    def _coalesce_key(self, user_message: str) -> tuple:
+        return normalize_question(user_message), self.groq_service.store.version
+
+    def _shared_result(self, user_message: str, result: dict) -> dict:
+        """Payload for a request that waited on an identical in-flight one"""
+        CHAT_RESPONSES.labels(result['source'], 'coalesced').inc()
+        return {**result, "original_message": user_message, "coalesced": True}
+
+    def session_id(self, requested=None) -> Optional[str]:
+        """
+        The client's session id if it sent a well-formed one, else a new one
+        the response hands back for the client to send with its next message.
+        None when sessions are off.
+        """
+        if self.sessions is None:
+            return None
+        return requested if valid_session_id(requested) else new_session_id()
+
+    def history(self, session_id: Optional[str]) -> list:
+        if self.sessions is None or not session_id:
+            return []
+        try:
+            return self.sessions.history(session_id)
+        except Exception as e:
+            logger.error(f"Session store read failed: {str(e)}")
+            return []
+
+    def remember(self, session_id: Optional[str], user_message: str, result: dict) -> dict:
+        """Record the exchange in the session and tag the payload with its id"""
+        if self.sessions is None or not session_id:
+            return result
+        if 'shed' not in result:
+            try:
+                self.sessions.append(session_id, user_message, result['response'])
+            except Exception as e:
+                logger.error(f"Session store write failed: {str(e)}")
+        return {**result, "session_id": session_id}
+
+    async def _ahistory(self, session_id: Optional[str]) -> list:
+        """Async variant of history(); a file-backed store is read off the event loop"""
+        if self.sessions is not None and session_id and self.sessions.blocking:
+            return await asyncio.to_thread(self._history, session_id)
+        return self.history(session_id)
+
+    async def _aremember(self, session_id: Optional[str], user_message: str, result: dict) -> dict:
+        """Async variant of remember()"""
+        if self.sessions is not None and session_id and self.sessions.blocking:
+            return await asyncio.to_thread(self._remember, session_id, user_message, result)
+        return self.remember(session_id, user_message, result)
+
+    def shed(self, user_message: str, reason: str) -> dict:
+        """Answer straight from the precomputed rule-based answers when admission control refuses a request"""
+        logger.info("Shedding request (%s), answering from the rule-based chatbot", reason)
+        try:
+            response = self.rule_based_chatbot.get_response(user_message)
+            source = 'rule_based'
+        except Exception as e:
+            logger.error(f"Rule-based chatbot failed while shedding: {str(e)}")
+            response, source = EMERGENCY_RESPONSE, 'emergency_fallback'
+        CHAT_RESPONSES.labels(source, 'false').inc()
+        return {
+            "response": response,
+            "source": source,
+            "enhanced_query": False,
+            "original_message": user_message,
+            "shed": reason,
+            "fallback_reason": SHED_REASONS.get(reason, reason)
+        }
+
+    def _api_result(self, user_message: str, enhanced_message: str, answer: Answer, cache: bool = True) -> dict:
+        result = {
+            "response": answer.text,
+            "source": f"{answer.provider}_api",
+            "enhanced_query": enhanced_message != user_message,
+            "original_message": user_message,
+            "enhanced_message": enhanced_message if enhanced_message != user_message else None
+        }
+        if cache:
+            self.response_cache.set(user_message, result)
+        return result
+
+    def fallback(self, user_message: str, enhanced_message: str) -> dict:
+        """Answer from the rule-based chatbot, degrading to a static emergency answer"""
+        try:
+            response = self.rule_based_chatbot.get_response(enhanced_message)
+            logger.debug("Successfully got response from rule-based chatbot")
+
+            return {
+                "response": response,
+                "source": "rule_based",
+                "enhanced_query": enhanced_message != user_message,
+                "original_message": user_message,
+                "enhanced_message": enhanced_message if enhanced_message != user_message else None,
+                "fallback_reason": "API services unavailable or circuit breaker open"
+            }
+        except Exception as fallback_error:
+            logger.error(f"Rule-based chatbot also failed: {str(fallback_error)}")
+            try:
+                response = self.rule_based_chatbot.get_response(user_message)
+                logger.info("Fallback successful with original message")
+
+                return {
+                    "response": response,
+                    "source": "rule_based_fallback",
+                    "enhanced_query": False,
+                    "original_message": user_message,
+                    "fallback_reason": "Enhanced message failed, used original"
+                }
+            except Exception as final_error:
+                logger.error(f"All fallbacks failed: {str(final_error)}")
+                return {
+                    "response": EMERGENCY_RESPONSE,
+                    "source": "emergency_fallback",
+                    "enhanced_query": False,
+                    "original_message": user_message,
+                    "fallback_reason": "All systems temporarily unavailable"
+                }
+
+    def enhance(self, user_message: str) -> str:
+        """Enhance the question with Fireworks, returning the original on failure"""
+        enhanced_message = user_message
+        if self.fireworks_service.is_available() and self.fireworks_circuit_breaker.can_execute():
+            try:
+                logger.debug("Step 1: Enhancing message with Fireworks API")
+                enhanced_message = self.fireworks_service.enhance_question(user_message)
+                self.fireworks_circuit_breaker.record_success()
+                logger.debug("Enhanced message: %s", enhanced_message)
+            except Exception as e:
+                self.fireworks_circuit_breaker.record_failure()
+                logger.warning(f"Fireworks API failed for enhancement: {str(e)}")
+                logger.debug("Proceeding with original message")
+        else:
+            logger.debug("Fireworks API circuit breaker open or service unavailable, skipping enhancement")
+        return enhanced_message
+
+    def should_skip_enhancement(self, user_message: str) -> bool:
+        """True when the rule-based classifier is already confident about the intent"""
+        if not self.skip_confident_enhancement:
+            return False
+        intent, confidence = self.rule_based_chatbot.classify_with_confidence(user_message)
+        return intent != 'default' and confidence >= self.skip_confidence_threshold
+
+    def _same_question(self, user_message: str, enhanced_message: str) -> bool:
+        """True when the enhancement only reworded the question, so an answer to the raw message still fits"""
+        if normalize_question(enhanced_message) == normalize_question(user_message):
+            return True
+        intent, _ = self.rule_based_chatbot.classify_with_confidence(user_message)
+        return intent != 'default' and intent == self.rule_based_chatbot.classify_with_confidence(enhanced_message)[0]
+
+    def _timed_enhance(self, user_message: str, timings: dict) -> str:
+        started = time.perf_counter()
+        try:
+            return self.enhance(user_message)
+        finally:
+            timings['enhance_ms'] = (time.perf_counter() - started) * 1000
+
+    def _hedge_delay(self, provider: AnswerProvider):
+        if self.hedging_mode not in ('retry', 'rule_based'):
+            return None
+        return provider.timeout.hedge_delay()
+
+    def _provider_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str,
+                          history: Sequence = (), timeout: Optional[float] = None, timings: Optional[dict] = None) -> str:
+        """
+        One request to a provider under its adaptive timeout (or `timeout`),
+        recording its latency and, into `timings`, the tokens it reported
+        """
+        timeout = timeout or provider.timeout.seconds()
+        take_usage()
+        started = time.perf_counter()
+        try:
+            response = provider.service.get_response(enhanced_message, user_message, timeout=timeout, history=history)
+        except Exception:
+            waited_ms = (time.perf_counter() - started) * 1000
+            provider.observe(waited_ms, ok=False, timed_out=waited_ms >= timeout * 1000)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        provider.observe(latency_ms, ok=True)
+        self.latency.record(f'{provider.name}_upstream', latency_ms)
+        if timings is not None:
+            timings.update(take_usage())
+        return response
+
+    def _finish_late_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str,
+                             history: Sequence, started: float, future):
+        """Settle an attempt the request stopped waiting for"""
+        if future.cancelled():
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        try:
+            response = future.result()
+        except Exception as e:
+            provider.breaker.record_failure(latency_ms)
+            logger.warning(f"Hedged {provider.service.label} API call failed: {str(e)}")
+            return
+        provider.breaker.record_success(latency_ms)
+        # Cache the full answer so the next identical question gets it
+        if not history:
+            self._api_result(user_message, enhanced_message, Answer(response, provider.name))
+
+    @staticmethod
+    def _settle_hedge_loser(provider: AnswerProvider, future):
+        """Retrieve and log the outcome of the hedged attempt that lost the race"""
+        if future.cancelled():
+            logger.debug("Losing hedged %s API call cancelled", provider.service.label)
+        elif future.exception() is not None:
+            logger.debug("Losing hedged %s API call failed: %s", provider.service.label, future.exception())
+        else:
+            logger.debug("Losing hedged %s API call finished after the winner", provider.service.label)
+
+    @staticmethod
+    def _hedge_error(provider: AnswerProvider, errors: list) -> Exception:
+        reasons = '; '.join(str(e) for e in errors)
+        return RuntimeError(f"all {len(errors)} hedged {provider.service.label} attempts failed: {reasons}")
+
+    def _hedged_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str, hedge_delay: float,
+                        started: float, timings: dict, history: Sequence = (), timeout: Optional[float] = None):
+        """
+        Provider call hedged after `hedge_delay` seconds. Returns the first
+        successful answer, None when the rule-based answer should be used
+        instead, and raises if every attempt failed. Each attempt fills its
+        own timings; only the winner's are merged into `timings`.
+        """
+        attempts = {}
+        first = _hedge_executor.submit(self._provider_attempt, provider, user_message, enhanced_message, history, timeout,
+                                       attempts.setdefault('first', {}))
+        done, _ = wait([first], timeout=hedge_delay)
+        if done:
+            response = first.result()
+            timings.update(attempts['first'])
+            return response
+
+        if self.hedging_mode == 'rule_based':
+            timings['hedged'] = 'rule_based'
+            logger.info("%s API slower than %.0f ms, answering from the rule-based chatbot", provider.service.label, hedge_delay * 1000)
+            first.add_done_callback(partial(self._finish_late_attempt, provider, user_message, enhanced_message, history, started))
+            return None
+
+        if provider.breaker.state != 'closed':
+            response = first.result()
+            timings.update(attempts['first'])
+            return response
+
+        timings['hedged'] = 'retry'
+        logger.info("%s API slower than %.0f ms, sending a hedged request", provider.service.label, hedge_delay * 1000)
+        hedge = _hedge_executor.submit(self._provider_attempt, provider, user_message, enhanced_message, history, timeout,
+                                       attempts.setdefault('hedge', {}))
+        names = {first: 'first', hedge: 'hedge'}
+        pending = set(names)
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                for other in pending:
+                    other.cancel()
+                    other.add_done_callback(partial(self._settle_hedge_loser, provider))
+                timings.update(attempts[names[future]])
+                return response
+        raise self._hedge_error(provider, errors) from errors[-1]
+
+    def _call_providers(self, user_message: str, enhanced_message: str, timings: dict, stage: str = 'groq_ms',
+                        history: Sequence = ()) -> Optional[Answer]:
+        """
+        Ask the answer providers in routing order, failing over to the next one
+        when a call fails. Returns None when the caller should fall back.
+        """
+        started = time.perf_counter()
+        attempted = 0
+        try:
+            for provider in self.router.route():
+                if not provider.breaker.can_execute():
+                    continue
+                if attempted:
+                    self.router.record_failover(provider)
+                timeout = self.router.first_attempt_timeout(provider) if not attempted else None
+                attempted += 1
+                call_started = time.perf_counter()
+                try:
+                    logger.debug("Step 2: Getting response from %s API", provider.service.label)
+                    hedge_delay = self._hedge_delay(provider)
+                    if hedge_delay is None:
+                        response = self._provider_attempt(provider, user_message, enhanced_message, history, timeout, timings)
+                    else:
+                        response = self._hedged_attempt(provider, user_message, enhanced_message, hedge_delay,
+                                                        call_started, timings, history, timeout)
+                        if response is None:
+                            return None
+                except Exception as e:
+                    provider.breaker.record_failure((time.perf_counter() - call_started) * 1000)
+                    logger.warning(f"{provider.service.label} API failed: {str(e)}")
+                    continue
+                provider.breaker.record_success((time.perf_counter() - call_started) * 1000)
+                logger.debug("Successfully got response from %s API", provider.service.label)
+                if attempted > 1:
+                    timings['failover'] = provider.name
+                return Answer(response, provider.name)
+
+            if not attempted:
+                logger.debug("Answer provider circuit breakers open or services unavailable, using fallback")
+            logger.debug("Step 3: Falling back to rule-based chatbot")
+            return None
+        finally:
+            timings[stage] = (time.perf_counter() - started) * 1000
+
+    def _run_speculative(self, user_message: str, timings: dict) -> tuple:
+        """Run enhancement and an answer call on the raw message side by side"""
+        enhance_future = _executor.submit(self._timed_enhance, user_message, timings)
+        raw_future = _executor.submit(self._call_providers, user_message, user_message, timings, 'groq_raw_ms')
+
+        if self.speculative_policy == 'prefer_raw':
+            raw_response = raw_future.result()
+            if raw_response is not None:
+                # The enhancement keeps running in the background and only updates its breaker
+                return user_message, raw_response
+            enhanced_message = enhance_future.result()
+            return enhanced_message, self._call_providers(user_message, enhanced_message, timings)
+
+        enhanced_message = enhance_future.result()
+        if self._same_question(user_message, enhanced_message):
+            return user_message, raw_future.result()
+        timings['speculation_discarded'] = True
+        # Stops the call if it has not started; a call already in flight is left to finish unobserved
+        raw_future.cancel()
+        return enhanced_message, self._call_providers(user_message, enhanced_message, timings)
+
+    def _log_timings(self, mode: str, source: str, timings: dict, started: float):
+        """Record stage latencies and log the request's one-line summary"""
+        total_ms = (time.perf_counter() - started) * 1000
+        # What enhance-then-answer would have cost back to back, minus what this request took.
+        # With prefer_raw the enhancement may still be running, so nothing is claimed.
+        answer_ms = timings.get('groq_ms', timings.get('groq_raw_ms', 0.0))
+        sequential_ms = timings.get('enhance_ms', 0.0) + answer_ms
+        saved_ms = max(sequential_ms - total_ms, 0.0)
+        for key, value in timings.items():
+            if key.endswith('_ms'):
+                self.latency.record(key[:-3], value)
+                STAGE_SECONDS.labels(key[:-3]).observe(value / 1000)
+        self.latency.record('total', total_ms)
+        STAGE_SECONDS.labels('total').observe(total_ms / 1000)
+        CHAT_RESPONSES.labels(source, 'false').inc()
+        # Formatted by the log writer, and only if the record survives sampling
+        logger.info("Chat request: %s", KeyValues(mode=mode, source=source, **timings, total_ms=total_ms, saved_ms=saved_ms))
+
+    def run(self, user_message: str, client: Optional[str] = None, session_id: Optional[str] = None) -> dict:
+        """Run the full pipeline for one message and return the response payload"""
+        if self.admission is not None and not self.admission.allow(client):
+            return self.remember(session_id, user_message, self.shed(user_message, 'rate_limited'))
+
+        history = self.history(session_id)
+        if history:
+            return self.remember(session_id, user_message, self._run_admitted(user_message, history))
+
+        result = self._cached_result(user_message)
+        if result is None:
+            result, shared = self.coalescer.do(self._coalesce_key(user_message), partial(self._run_admitted, user_message))
+            if shared:
+                result = self._shared_result(user_message, result)
+        return self.remember(session_id, user_message, result)
+
+    def _run_admitted(self, user_message: str, history: Sequence = ()) -> dict:
+        """_run_upstream() inside an upstream concurrency slot, or shed when none frees up in time"""
+        if self.admission is None:
+            return self._run_upstream(user_message, history)
+        if not self.admission.upstream.acquire():
+            return self.shed(user_message, 'busy')
+        try:
+            return self._run_upstream(user_message, history)
+        finally:
+            self.admission.upstream.release()
+
+    def _run_upstream(self, user_message: str, history: Sequence = ()) -> dict:
+        started = time.perf_counter()
+        timings = {}
+        if history:
+            # The enhancer sees only this message and would rewrite a follow-up
+            # into an unrelated standalone question; the history gives the provider the context
+            mode = 'session'
+            enhanced_message = user_message
+            response = self._call_providers(user_message, enhanced_message, timings, history=history)
+        elif self.should_skip_enhancement(user_message):
+            mode = 'skip'
+            logger.debug("Skipping enhancement, intent already classified confidently")
+            enhanced_message = user_message
+            response = self._call_providers(user_message, enhanced_message, timings)
+        elif self.enhancement_mode == 'speculative':
+            mode = 'speculative'
+            enhanced_message, response = self._run_speculative(user_message, timings)
+        else:
+            mode = 'sequential'
+            enhanced_message = self._timed_enhance(user_message, timings)
+            response = self._call_providers(user_message, enhanced_message, timings)
+
+        if response is not None:
+            result = self._api_result(user_message, enhanced_message, response, cache=not history)
+        else:
+            fallback_started = time.perf_counter()
+            result = self.fallback(user_message, enhanced_message)
+            timings['fallback_ms'] = (time.perf_counter() - fallback_started) * 1000
+        self._log_timings(mode, result['source'], timings, started)
+        return result
+
+    def _timed_run(self, user_message: str, client: Optional[str] = None) -> Tuple[dict, float]:
+        started = time.perf_counter()
+        try:
+            result = self.run(user_message, client)
+        except Exception as e:
+            logger.error(f"Batch item failed: {str(e)}")
+            result = self.fallback(user_message, user_message)
+        return result, (time.perf_counter() - started) * 1000
+
+    def iter_batch(self, messages: Sequence[str], max_parallel: Optional[int] = None,
+                   client: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+        """
+        Answer many messages with at most `max_parallel` (BATCH_PARALLELISM) in
+        flight, yielding (index, result) in completion order. Each result gets
+        its answering time as `elapsed_ms`. Repeated questions are answered
+        once and shared. The response cache and admission control apply to
+        every question as they do to single requests from `client`, so each
+        distinct question takes one of its rate-limit tokens.
+        """
+        max_parallel = max(1, max_parallel or self.batch_parallelism)
+        groups = {}
+        for index, message in enumerate(messages):
+            groups.setdefault(normalize_question(message), []).append(index)
+        queue = iter(groups.values())
+        pending = {}
+
+        def submit_next():
+            indices = next(queue, None)
+            if indices is not None:
+                pending[_batch_executor.submit(self._timed_run, messages[indices[0]], client)] = indices
+
+        for _ in range(max_parallel):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                indices = pending.pop(future)
+                submit_next()
+                result, elapsed_ms = future.result()
+                yield indices[0], {**result, "elapsed_ms": round(elapsed_ms, 2)}
+                for index in indices[1:]:
+                    yield index, {**self._shared_result(messages[index], result), "elapsed_ms": 0.0}
+
+    def run_batch(self, messages: Sequence[str], max_parallel: Optional[int] = None,
+                  client: Optional[str] = None) -> List[dict]:
+        """iter_batch() collected into a list in input order"""
+        results = [None] * len(messages)
+        for index, result in self.iter_batch(messages, max_parallel, client):
+            results[index] = result
+        return results
+
+    async def aenhance(self, user_message: str) -> str:
+        """Async variant of enhance()"""
+        enhanced_message = user_message
+        if self.fireworks_service.is_available() and await self.fireworks_circuit_breaker.acan_execute():
+            try:
+                logger.debug("Step 1: Enhancing message with Fireworks API")
+                enhanced_message = await self.async_fireworks_service.enhance_question(user_message)
+                await self.fireworks_circuit_breaker.arecord_success()
+                logger.debug("Enhanced message: %s", enhanced_message)
+            except Exception as e:
+                await self.fireworks_circuit_breaker.arecord_failure()
+                logger.warning(f"Fireworks API failed for enhancement: {str(e)}")
+                logger.debug("Proceeding with original message")
+        else:
+            logger.debug("Fireworks API circuit breaker open or service unavailable, skipping enhancement")
+        return enhanced_message
+
+    async def _atimed_enhance(self, user_message: str, timings: dict) -> str:
+        started = time.perf_counter()
+        try:
+            return await self.aenhance(user_message)
+        finally:
+            timings['enhance_ms'] = (time.perf_counter() - started) * 1000
+
+    def _afinish_late_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str,
+                              history: Sequence, started: float, future):
+        """_finish_late_attempt() as a loop callback; file-shared breakers are updated off the loop"""
+        if provider.breaker.shared:
+            asyncio.get_running_loop().run_in_executor(
+                None, self._finish_late_attempt, provider, user_message, enhanced_message, history, started, future)
+        else:
+            self._finish_late_attempt(provider, user_message, enhanced_message, history, started, future)
+
+    async def _aprovider_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str,
+                                 history: Sequence = (), timeout: Optional[float] = None,
+                                 timings: Optional[dict] = None) -> str:
+        """Async variant of _provider_attempt()"""
+        timeout = timeout or provider.timeout.seconds()
+        take_usage()
+        started = time.perf_counter()
+        try:
+            response = await provider.async_service.get_response(enhanced_message, user_message, timeout=timeout,
+                                                                 history=history)
+        except Exception:
+            waited_ms = (time.perf_counter() - started) * 1000
+            provider.observe(waited_ms, ok=False, timed_out=waited_ms >= timeout * 1000)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        provider.observe(latency_ms, ok=True)
+        self.latency.record(f'{provider.name}_upstream', latency_ms)
+        if timings is not None:
+            timings.update(take_usage())
+        return response
+
+    async def _ahedged_attempt(self, provider: AnswerProvider, user_message: str, enhanced_message: str,
+                               hedge_delay: float, started: float, timings: dict, history: Sequence = (),
+                               timeout: Optional[float] = None):
+        """Async variant of _hedged_attempt(); the losing attempt is cancelled"""
+        attempts = {}
+        first = asyncio.ensure_future(self._aprovider_attempt(provider, user_message, enhanced_message, history, timeout,
+                                                              attempts.setdefault('first', {})))
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done:
+            response = first.result()
+            timings.update(attempts['first'])
+            return response
+
+        if self.hedging_mode == 'rule_based':
+            timings['hedged'] = 'rule_based'
+            logger.info("%s API slower than %.0f ms, answering from the rule-based chatbot", provider.service.label, hedge_delay * 1000)
+            _background_tasks.add(first)
+            first.add_done_callback(_background_tasks.discard)
+            first.add_done_callback(partial(self._afinish_late_attempt, provider, user_message, enhanced_message, history, started))
+            return None
+
+        if provider.breaker.state != 'closed':
+            response = await first
+            timings.update(attempts['first'])
+            return response
+
+        timings['hedged'] = 'retry'
+        logger.info("%s API slower than %.0f ms, sending a hedged request", provider.service.label, hedge_delay * 1000)
+        hedge = asyncio.ensure_future(self._aprovider_attempt(provider, user_message, enhanced_message, history, timeout,
+                                                              attempts.setdefault('hedge', {})))
+        names = {first: 'first', hedge: 'hedge'}
+        pending = set(names)
+        errors = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                    continue
+                for other in pending:
+                    other.cancel()
+                    other.add_done_callback(partial(self._settle_hedge_loser, provider))
+                timings.update(attempts[names[task]])
+                return task.result()
+        raise self._hedge_error(provider, errors) from errors[-1]
+
+    async def _acall_providers(self, user_message: str, enhanced_message: str, timings: dict, stage: str = 'groq_ms',
+                               history: Sequence = ()) -> Optional[Answer]:
+        """Async variant of _call_providers()"""
+        started = time.perf_counter()
+        attempted = 0
+        try:
+            for provider in self.router.route():
+                if not await provider.breaker.acan_execute():
+                    continue
+                if attempted:
+                    self.router.record_failover(provider)
+                timeout = self.router.first_attempt_timeout(provider) if not attempted else None
+                attempted += 1
+                call_started = time.perf_counter()
+                try:
+                    logger.debug("Step 2: Getting response from %s API", provider.service.label)
+                    hedge_delay = self._hedge_delay(provider)
+                    if hedge_delay is None:
+                        response = await self._aprovider_attempt(provider, user_message, enhanced_message, history, timeout, timings)
+                    else:
+                        response = await self._ahedged_attempt(provider, user_message, enhanced_message, hedge_delay,
+                                                               call_started, timings, history, timeout)
+                        if response is None:
+                            return None
+                except Exception as e:
+                    await provider.breaker.arecord_failure((time.perf_counter() - call_started) * 1000)
+                    logger.warning(f"{provider.service.label} API failed: {str(e)}")
+                    continue
+                await provider.breaker.arecord_success((time.perf_counter() - call_started) * 1000)
+                logger.debug("Successfully got response from %s API", provider.service.label)
+                if attempted > 1:
+                    timings['failover'] = provider.name
+                return Answer(response, provider.name)
+
+            if not attempted:
+                logger.debug("Answer provider circuit breakers open or services unavailable, using fallback")
+            logger.debug("Step 3: Falling back to rule-based chatbot")
+            return None
+        finally:
+            timings[stage] = (time.perf_counter() - started) * 1000
+
+    async def _arun_speculative(self, user_message: str, timings: dict) -> tuple:
+        """Async variant of _run_speculative()"""
+        enhance_task = asyncio.ensure_future(self._atimed_enhance(user_message, timings))
+        raw_task = asyncio.ensure_future(self._acall_providers(user_message, user_message, timings, 'groq_raw_ms'))
+
+        if self.speculative_policy == 'prefer_raw':
+            raw_response = await raw_task
+            if raw_response is not None:
+                _background_tasks.add(enhance_task)
+                enhance_task.add_done_callback(_background_tasks.discard)
+                return user_message, raw_response
+            enhanced_message = await enhance_task
+            return enhanced_message, await self._acall_providers(user_message, enhanced_message, timings)
+
+        enhanced_message = await enhance_task
+        if self._same_question(user_message, enhanced_message):
+            return user_message, await raw_task
+        timings['speculation_discarded'] = True
+        raw_task.cancel()
+        return enhanced_message, await self._acall_providers(user_message, enhanced_message, timings)
+
+    async def arun(self, user_message: str, client: Optional[str] = None, session_id: Optional[str] = None) -> dict:
+        """Async variant of run(): upstream calls yield to the event loop instead of blocking a worker"""
+        if self.admission is not None and not self.admission.allow(client):
+            return await self._aremember(session_id, user_message, self.shed(user_message, 'rate_limited'))
+
+        history = await self._ahistory(session_id)
+        if history:
+            return await self._aremember(session_id, user_message, await self._arun_admitted(user_message, history))
+
+        result = self._cached_result(user_message)
+        if result is None:
+            result, shared = await self.coalescer.ado(self._coalesce_key(user_message), partial(self._arun_admitted, user_message))
+            if shared:
+                result = self._shared_result(user_message, result)
+        return await self._aremember(session_id, user_message, result)
+
+    async def _arun_admitted(self, user_message: str, history: Sequence = ()) -> dict:
+        """Async variant of _run_admitted()"""
+        if self.admission is None:
+            return await self._arun_upstream(user_message, history)
+        if not await self.admission.upstream.aacquire():
+            return self.shed(user_message, 'busy')
+        try:
+            return await self._arun_upstream(user_message, history)
+        finally:
+            self.admission.upstream.release()
+
+    async def _arun_upstream(self, user_message: str, history: Sequence = ()) -> dict:
+        started = time.perf_counter()
+        timings = {}
+        if history:
+            mode = 'session'
+            enhanced_message = user_message
+            response = await self._acall_providers(user_message, enhanced_message, timings, history=history)
+        elif self.should_skip_enhancement(user_message):
+            mode = 'skip'
+            logger.debug("Skipping enhancement, intent already classified confidently")
+            enhanced_message = user_message
+            response = await self._acall_providers(user_message, enhanced_message, timings)
+        elif self.enhancement_mode == 'speculative':
+            mode = 'speculative'
+            enhanced_message, response = await self._arun_speculative(user_message, timings)
+        else:
+            mode = 'sequential'
+            enhanced_message = await self._atimed_enhance(user_message, timings)
+            response = await self._acall_providers(user_message, enhanced_message, timings)
+
+        if response is not None:
+            result = self._api_result(user_message, enhanced_message, response, cache=not history)
+        else:
+            fallback_started = time.perf_counter()
+            result = self.fallback(user_message, enhanced_message)
+            timings['fallback_ms'] = (time.perf_counter() - fallback_started) * 1000
+        self._log_timings(mode, result['source'], timings, started)
+        return result
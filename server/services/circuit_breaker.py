@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: file-backed sharing is unavailable
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for one upstream.
+
+    The breaker opens when `failure_threshold` calls fail in a row, or when the
+    rolling window (CIRCUIT_WINDOW_SECONDS) holds at least CIRCUIT_MIN_CALLS
+    calls and either the error rate reaches CIRCUIT_ERROR_RATE or the share of
+    calls slower than CIRCUIT_SLOW_CALL_MS reaches CIRCUIT_SLOW_CALL_RATE.
+    After `reset_timeout` seconds it goes half-open and admits at most
+    `half_open_max_calls` concurrent probes; that many successes close it
+    again, any probe failure re-opens it.
+
+    With CIRCUIT_BREAKER_STATE_DIR set, state lives in a flock-protected JSON
+    file per breaker so every gunicorn worker on the host sees the same circuit.
+    Transitions take an exclusive lock and write the file back; reads (state,
+    failure_count, stats) reuse the last parsed copy while the file is
+    unchanged and otherwise read it under a shared lock. Coroutines use the
+    a-prefixed methods, which move shared-file work off the event loop.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60, name='default',
+                 half_open_max_calls: Optional[int] = None, state_dir: Optional[str] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.window_seconds = int(_env_float('CIRCUIT_WINDOW_SECONDS', '60'))
+        self.min_calls = int(_env_float('CIRCUIT_MIN_CALLS', '10'))
+        self.error_rate_threshold = _env_float('CIRCUIT_ERROR_RATE', '0.5')
+        # 0 disables latency-based tripping
+        self.slow_call_ms = _env_float('CIRCUIT_SLOW_CALL_MS', '0')
+        self.slow_call_rate_threshold = _env_float('CIRCUIT_SLOW_CALL_RATE', '0.8')
+        self.half_open_max_calls = half_open_max_calls or int(_env_float('CIRCUIT_HALF_OPEN_MAX_CALLS', '1'))
+
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+        self.state_path = None
+        self._file = None
+        self._file_pid = None
+        # (st_mtime_ns, st_size) of the file when self._state was last read or written
+        self._file_key = None
+
+        state_dir = state_dir if state_dir is not None else os.getenv('CIRCUIT_BREAKER_STATE_DIR')
+        if state_dir:
+            if fcntl is None:
+                logger.warning(f"Circuit breaker '{name}': fcntl unavailable, state is per-process")
+            else:
+                os.makedirs(state_dir, exist_ok=True)
+                self.state_path = os.path.join(state_dir, f"circuit_{name}.json")
+
+    @staticmethod
+    def _initial_state() -> dict:
+        return {
+            "state": "closed",
+            "consecutive_failures": 0,
+            "opened_at": None,
+            "last_failure_time": None,
+            "half_open_in_flight": [],
+            "half_open_successes": 0,
+            # [second, calls, failures, slow_calls] buckets covering the rolling window
+            "window": [],
+            "counters": {
+                "allowed": 0,
+                "rejected": 0,
+                "successes": 0,
+                "failures": 0,
+                "slow_calls": 0,
+                "opened": 0,
+                "probes": 0,
+            },
+        }
+
+    def _state_file(self):
+        # One descriptor per process: flock locks are per open file, so a
+        # descriptor inherited across fork would not exclude the parent
+        if self._file is None or self._file_pid != os.getpid():
+            self._file = open(self.state_path, 'a+', encoding='utf-8')
+            self._file_pid = os.getpid()
+        return self._file
+
+    @contextmanager
+    def _locked(self):
+        """Yield the mutable state dict, loading and saving it when shared through a file"""
+        with self._lock:
+            if self.state_path is None:
+                yield self._state
+                return
+
+            file = self._state_file()
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                raw = file.read()
+                try:
+                    state = json.loads(raw) if raw else self._initial_state()
+                except ValueError:
+                    state = self._initial_state()
+                yield state
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state, separators=(',', ':')))
+                file.flush()
+                stat = os.fstat(file.fileno())
+                self._file_key = (stat.st_mtime_ns, stat.st_size)
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            self._state = state
+
+    def _snapshot(self) -> dict:
+        """The current state for reading only; never written back"""
+        if self.state_path is None:
+            return self._state
+        with self._lock:
+            file = self._state_file()
+            stat = os.fstat(file.fileno())
+            if (stat.st_mtime_ns, stat.st_size) == self._file_key:
+                return self._state
+            fcntl.flock(file, fcntl.LOCK_SH)
+            try:
+                file.seek(0)
+                raw = file.read()
+                stat = os.fstat(file.fileno())
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            try:
+                state = json.loads(raw) if raw else self._initial_state()
+            except ValueError:
+                state = self._initial_state()
+            self._state, self._file_key = state, (stat.st_mtime_ns, stat.st_size)
+            return state
+
+    @property
+    def shared(self) -> bool:
+        """True when state lives in a file, so every call does file I/O under flock"""
+        return self.state_path is not None
+
+    def _prune(self, state: dict, now: float):
+        cutoff = int(now) - self.window_seconds
+        state["window"] = [bucket for bucket in state["window"] if bucket[0] > cutoff]
+
+    def _add_call(self, state: dict, now: float, failed: bool, slow: bool):
+        second = int(now)
+        window = state["window"]
+        if not window or window[-1][0] != second:
+            window.append([second, 0, 0, 0])
+        bucket = window[-1]
+        bucket[1] += 1
+        bucket[2] += int(failed)
+        bucket[3] += int(slow)
+        self._prune(state, now)
+
+    @staticmethod
+    def _window_totals(state: dict) -> tuple:
+        calls = sum(bucket[1] for bucket in state["window"])
+        failures = sum(bucket[2] for bucket in state["window"])
+        slow = sum(bucket[3] for bucket in state["window"])
+        return calls, failures, slow
+
+    def _open(self, state: dict, now: float, reason: str):
+        if state["state"] != 'open':
+            state["counters"]["opened"] += 1
+            logger.warning(f"Circuit breaker '{self.name}' opened: {reason}")
+        state["state"] = 'open'
+        state["opened_at"] = now
+        state["half_open_in_flight"] = []
+        state["half_open_successes"] = 0
+
+    def _should_trip(self, state: dict) -> Optional[str]:
+        if state["consecutive_failures"] >= self.failure_threshold:
+            return f"{state['consecutive_failures']} consecutive failures"
+        calls, failures, slow = self._window_totals(state)
+        if calls < self.min_calls:
+            return None
+        if failures / calls >= self.error_rate_threshold:
+            return f"error rate {failures}/{calls} in {self.window_seconds}s"
+        if self.slow_call_ms > 0 and slow / calls >= self.slow_call_rate_threshold:
+            return f"{slow}/{calls} calls slower than {self.slow_call_ms:.0f} ms"
+        return None
+
+    def can_execute(self) -> bool:
+        """
+        Whether a call may go ahead. In half-open state a True result takes a
+        probe slot, so callers must follow it with record_success/record_failure.
+        """
+        now = time.time()
+        with self._locked() as state:
+            if state["state"] == 'open':
+                if state["opened_at"] is not None and now - state["opened_at"] > self.reset_timeout:
+                    self._half_open(state, "reset timeout elapsed")
+                else:
+                    state["counters"]["rejected"] += 1
+                    return False
+
+            if state["state"] == 'half-open':
+                # Probes whose caller never reported back release their slot after reset_timeout
+                in_flight = [t for t in state["half_open_in_flight"] if now - t < self.reset_timeout]
+                if len(in_flight) >= self.half_open_max_calls:
+                    state["half_open_in_flight"] = in_flight
+                    state["counters"]["rejected"] += 1
+                    return False
+                in_flight.append(now)
+                state["half_open_in_flight"] = in_flight
+                state["counters"]["probes"] += 1
+
+            state["counters"]["allowed"] += 1
+            return True
+
+    def _half_open(self, state: dict, reason: str):
+        logger.info(f"Circuit breaker '{self.name}' half-open ({reason}), probing upstream")
+        state["state"] = 'half-open'
+        state["half_open_in_flight"] = []
+        state["half_open_successes"] = 0
+
+    def upstream_reachable(self):
+        """
+        Hint from an out-of-band check (the health prober) that the upstream
+        answers again: an open breaker goes half-open now instead of waiting
+        out reset_timeout, so the next real calls test it. The check itself
+        is not a call and leaves the window and counters alone.
+        """
+        if self._snapshot()["state"] != 'open':
+            return
+        with self._locked() as state:
+            if state["state"] == 'open':
+                self._half_open(state, "health probe reached the upstream")
+
+    def _release_probe(self, state: dict):
+        if state["half_open_in_flight"]:
+            state["half_open_in_flight"].pop(0)
+
+    def record_success(self, latency_ms: Optional[float] = None):
+        now = time.time()
+        slow = self.slow_call_ms > 0 and latency_ms is not None and latency_ms >= self.slow_call_ms
+        with self._locked() as state:
+            state["counters"]["successes"] += 1
+            state["counters"]["slow_calls"] += int(slow)
+            state["consecutive_failures"] = 0
+            self._add_call(state, now, failed=False, slow=slow)
+
+            if state["state"] == 'half-open':
+                self._release_probe(state)
+                state["half_open_successes"] += 1
+                if state["half_open_successes"] >= self.half_open_max_calls:
+                    logger.info(f"Circuit breaker '{self.name}' closed after successful probes")
+                    state["state"] = 'closed'
+                    state["opened_at"] = None
+                    state["window"] = []
+            elif state["state"] == 'closed':
+                reason = self._should_trip(state)
+                if reason:
+                    self._open(state, now, reason)
+
+    def record_failure(self, latency_ms: Optional[float] = None):
+        now = time.time()
+        with self._locked() as state:
+            state["counters"]["failures"] += 1
+            state["consecutive_failures"] += 1
+            state["last_failure_time"] = now
+            self._add_call(state, now, failed=True, slow=False)
+
+            if state["state"] == 'half-open':
+                self._open(state, now, "half-open probe failed")
+            elif state["state"] == 'closed':
+                reason = self._should_trip(state)
+                if reason:
+                    self._open(state, now, reason)
+
+    async def acan_execute(self) -> bool:
+        """can_execute() for coroutines"""
+        return await asyncio.to_thread(self.can_execute) if self.shared else self.can_execute()
+
+    async def arecord_success(self, latency_ms: Optional[float] = None):
+        if self.shared:
+            await asyncio.to_thread(self.record_success, latency_ms)
+        else:
+            self.record_success(latency_ms)
+
+    async def arecord_failure(self, latency_ms: Optional[float] = None):
+        if self.shared:
+            await asyncio.to_thread(self.record_failure, latency_ms)
+        else:
+            self.record_failure(latency_ms)
+
+    @property
+    def state(self) -> str:
+        return self._snapshot()["state"]
+
+    @property
+    def failure_count(self) -> int:
+        return self._snapshot()["consecutive_failures"]
+
+    @property
+    def last_failure_time(self) -> Optional[float]:
+        return self._snapshot()["last_failure_time"]
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        cutoff = int(time.time()) - self.window_seconds
+        state = self._snapshot()
+        with self._lock:
+            window = [bucket for bucket in state["window"] if bucket[0] > cutoff]
+            calls, failures, slow = self._window_totals({"window": window})
+            return {
+                "state": state["state"],
+                "consecutive_failures": state["consecutive_failures"],
+                "window_seconds": self.window_seconds,
+                "window_calls": calls,
+                "window_error_rate": round(failures / calls, 4) if calls else 0.0,
+                "window_slow_rate": round(slow / calls, 4) if calls else 0.0,
+                "half_open_in_flight": len(state["half_open_in_flight"]),
+                "shared": self.state_path is not None,
+                **state["counters"],
+            }
@@ -0,0 +1,157 @@
+import re
+import json
+import logging
+from typing import Dict, List
+
+from services.prompt_builder import SECTION_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+# GitHub repositories for projects whose data.json entry has no link of its own
+GITHUB_URLS = [
+    ('flashchat', 'https://github.com/anirudh-pedro/FlashChat'),
+    ('typomaster', 'https://github.com/anirudh-pedro/TypoMaster'),
+    ('sentiment', 'https://github.com/anirudh-pedro/Sentiment-Analysis-App'),
+    ('blogsphere', 'https://github.com/anirudh-pedro/blogsphere'),
+    ('blog', 'https://github.com/anirudh-pedro/blogsphere'),
+]
+
+CONTACT_INFO = {
+    'email': 'anirudh200503@gmail.com',
+    'phone': '+91 9894969187',
+    'linkedin': 'https://www.linkedin.com/in/anirudh-t-b5b26a2aa/',
+    'github': 'https://github.com/anirudh-pedro'
+}
+
+# Keyword groups, matched at the start of a word so "projects" hits "project"
+# but "network" no longer hits "work". Farewells that also rule out project
+# context ("bye", "see you") are kept apart from the softer ones ("later").
+TOPIC_KEYWORDS = {
+    'projects': ['project', 'work', 'portfolio', 'built', 'created', 'developed', 'github', 'repo'],
+    'skills': ['skill', 'technology', 'programming', 'languages', 'frameworks', 'tools', 'tech'],
+    'contact': ['contact', 'email', 'phone', 'reach', 'connect', 'linkedin'],
+    'background': ['experience', 'education', 'degree', 'university', 'background'],
+    'achievements': ['achievement', 'leetcode', 'hackathon', 'contest', 'accomplishment'],
+    'goodbye': ['goodbye', 'bye', 'see you'],
+    'farewell': ['farewell', 'take care', 'later'],
+    'thanks': ['thank you', 'thanks'],
+}
+
+# Order in which matched sections appear in the prompt
+SECTION_ORDER = ['projects', 'skills', 'contact', 'background', 'achievements', 'farewell']
+
+
+def _compact(data) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def _github_url(project_name: str):
+    name_lower = project_name.lower()
+    for fragment, url in GITHUB_URLS:
+        if fragment in name_lower:
+            return url
+    return None
+
+
+def _build_matcher():
+    alternatives = []
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        words = '|'.join(re.escape(word) for word in sorted(keywords, key=len, reverse=True))
+        alternatives.append(f"(?P<{topic}>{words})")
+    return re.compile(r"\b(?:" + '|'.join(alternatives) + ")")
+
+
+TOPIC_MATCHER = _build_matcher()
+
+
+class PortfolioContextIndex:
+    """
+    Prompt-ready portfolio sections, serialized once per data.json version and
+    selected per question with a single precompiled regex scan.
+    """
+
+    def __init__(self, portfolio_data: dict):
+        self.sections = self._build_sections(portfolio_data or {})
+
+    def _build_sections(self, data: dict) -> Dict[str, str]:
+        if not data:
+            return {}
+
+        sections = {}
+
+        if 'projects' in data:
+            projects = []
+            for project in data['projects'][:4]:  # Limit to 4 projects to avoid large payload
+                enhanced_project = dict(project)
+                github_url = _github_url(project.get('name', ''))
+                if github_url:
+                    enhanced_project['github_url'] = github_url
+                projects.append(enhanced_project)
+            sections['projects'] = f"PROJECTS: {_compact(projects)}"
+        else:
+            sections['projects'] = "PROJECTS: No detailed project data available."
+
+        if 'skills' in data:
+            sections['skills'] = f"SKILLS: {_compact(data['skills'])}"
+
+        sections['contact'] = f"CONTACT: {_compact(CONTACT_INFO)}"
+
+        profile = data.get('profile')
+        if profile is not None:
+            sections['background'] = "BACKGROUND: " + _compact({
+                'education': profile.get('education', {}),
+                'bio': profile.get('bio', ''),
+                'title': profile.get('title', '')
+            })
+            sections['default'] = "PROFILE: " + _compact({
+                'name': profile.get('name'),
+                'title': profile.get('title'),
+                'bio': profile.get('bio', '')[:200] + '...'  # Truncate long bio
+            })
+
+        if 'achievements' in data:
+            achievements = data['achievements']
+            limited_achievements = {}
+            if 'leetcode' in achievements:
+                limited_achievements['leetcode'] = {
+                    'problems_solved': achievements['leetcode'].get('problems_solved'),
+                    'contest_rating': achievements['leetcode'].get('contest_rating'),
+                    'profile_url': achievements['leetcode'].get('profile_url')
+                }
+            if 'hackathons' in achievements:
+                limited_achievements['hackathons'] = achievements['hackathons'][:2]  # Limit to 2
+            sections['achievements'] = f"ACHIEVEMENTS: {_compact(limited_achievements)}"
+
+        sections['farewell'] = "FAREWELL: " + _compact({
+            'message_type': 'farewell',
+            'response_style': 'brief and friendly'
+        })
+
+        return sections
+
+    @staticmethod
+    def match_topics(question_lower: str) -> set:
+        """Topics mentioned in the question"""
+        found = {match.lastgroup for match in TOPIC_MATCHER.finditer(question_lower)}
+        if 'goodbye' in found:
+            found.add('farewell')
+        if 'projects' in found and ('goodbye' in found or 'thanks' in found):
+            found.discard('projects')
+        return found
+
+    def relevant_sections(self, question_lower: str) -> List[str]:
+        """Relevant portfolio context for a lower-cased question, one string per section"""
+        if not self.sections:
+            return ["No portfolio data available."]
+
+        topics = self.match_topics(question_lower)
+        relevant_sections = [self.sections[topic] for topic in SECTION_ORDER if topic in topics and topic in self.sections]
+
+        if not relevant_sections and 'default' in self.sections:
+            relevant_sections.append(self.sections['default'])
+
+        return relevant_sections or ["Basic portfolio information available."]
+
+    def relevant_data(self, question_lower: str) -> str:
+        """relevant_sections() as one block"""
+        return SECTION_SEPARATOR.join(self.relevant_sections(question_lower))
@@ -0,0 +1,170 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+
+from services.response_cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+
+class EnhancementCache:
+    """
+    Bounded LRU + TTL memo of original question -> Fireworks rewrite.
+
+    With ENHANCEMENT_CACHE_PATH set, entries are also written to a local SQLite
+    file and reloaded on start-up, so rewrites survive restarts. A memory miss
+    falls back to the file, so rewrites stored by another worker or by the
+    warm-enhancement-cache command are picked up without a restart.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('ENHANCEMENT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = int(os.getenv('ENHANCEMENT_CACHE_MAX_ENTRIES', '1024'))
+        self.ttl = float(os.getenv('ENHANCEMENT_CACHE_TTL', '86400'))
+        self.path = os.getenv('ENHANCEMENT_CACHE_PATH') or None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.persistent = False
+
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.enabled and self.path:
+            self._open_store()
+
+    def _open_store(self):
+        # Closed again before returning: this may run in a preloading gunicorn
+        # master, and a SQLite connection must not be carried across fork
+        try:
+            with closing(sqlite3.connect(self.path, timeout=5)) as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS enhancements ("
+                    "question TEXT PRIMARY KEY, enhanced TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                now = time.time()
+                db.execute("DELETE FROM enhancements WHERE expires_at < ?", (now,))
+                rows = db.execute(
+                    "SELECT question, enhanced, expires_at FROM enhancements ORDER BY expires_at DESC LIMIT ?",
+                    (self.max_entries,)
+                ).fetchall()
+                db.commit()
+            for question, enhanced, expires_at in reversed(rows):
+                self._entries[question] = (enhanced, expires_at)
+            self.persistent = True
+            logger.info(f"Loaded {len(rows)} cached enhancements from {self.path}")
+        except sqlite3.Error as e:
+            logger.error(f"Enhancement cache store unavailable, using memory only: {str(e)}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection to the store, opened on first use in each process"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _remember(self, key: str, enhanced: str, expires_at: float):
+        """Insert into the in-memory LRU (lock held)"""
+        self._entries[key] = (enhanced, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key: str) -> Optional[tuple]:
+        """(enhanced, expires_at) from the SQLite store, or None"""
+        try:
+            return self._connection().execute(
+                "SELECT enhanced, expires_at FROM enhancements WHERE question = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read enhancement store: {str(e)}")
+            return None
+
+    def get(self, question: str) -> Optional[str]:
+        """Return the cached rewrite of a question, or None"""
+        if not self.enabled:
+            return None
+
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            if not self.persistent:
+                self.misses += 1
+                return None
+
+        row = self._load(key)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self._remember(key, *row)
+            self.hits += 1
+            self.store_hits += 1
+            return row[0]
+
+    def set(self, question: str, enhanced: str):
+        """Remember the rewrite of a question"""
+        if not self.enabled:
+            return
+
+        key = normalize_question(question)
+        if not key:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, enhanced, expires_at)
+
+        if self.persistent:
+            try:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO enhancements (question, enhanced, expires_at) VALUES (?, ?, ?)",
+                    (key, enhanced, expires_at)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not persist enhancement: {str(e)}")
+
+    def __contains__(self, question: str) -> bool:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.time():
+                return True
+        return self.persistent and self._load(key) is not None
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "persistent": self.persistent,
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -4,29 +4,32 @@ import json
 import logging
 from typing import Optional
 
+from services.http_session import get_session
+from services.enhancement_cache import EnhancementCache
+from services.metrics import record_usage
+
 logger = logging.getLogger(__name__)
 
 class FireworksService:
+    # Label for log and error messages
+    label = 'Fireworks'
+
     def __init__(self):
         self.api_key = os.getenv('FIREWORKS_API_KEY')
-        self.base_url = "https://api.fireworks.ai/inference/v1/chat/completions"
+        self.base_url = os.getenv('FIREWORKS_API_URL', "https://api.fireworks.ai/inference/v1/chat/completions")
         self.model = "accounts/fireworks/models/llama-v3p1-405b-instruct"
         
+        # Rewrites are near-deterministic (temperature 0.3), so they are memoized
+        self.enhancement_cache = EnhancementCache()
+        
     def is_available(self) -> bool:
         """Check if Fireworks API is available"""
         return bool(self.api_key)
     
-    def enhance_question(self, user_question: str) -> str:
-        """
-        Enhance and format the user's question using Fireworks API
-        """
-        if not self.api_key:
-            logger.warning("Fireworks API key not found")
-            return user_question
-            
-        try:
-            # System prompt for question enhancement
-            system_prompt = """You are a question enhancement AI for Anirudh's portfolio chatbot. 
+    def _build_request(self, user_question: str) -> tuple:
+        """Build the headers and chat-completions payload for an enhancement"""
+        # System prompt for question enhancement
+        system_prompt = """You are a question enhancement AI for Anirudh's portfolio chatbot. 
 Your job is to take user questions and enhance them to be more specific and contextually relevant for a portfolio assistant that should provide structured, bullet-point formatted responses.
 
 Rules:
@@ -47,33 +50,57 @@ Examples:
 
 Return only the enhanced question, nothing else."""
 
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Enhance this question: {user_question}"}
+            ],
+            "max_tokens": 150,
+            "temperature": 0.3
+        }
+        
+        return headers, payload
+    
+    def _parse_enhanced_question(self, result: dict) -> str:
+        """Pull the rewritten question out of a chat-completions response"""
+        enhanced_question = result['choices'][0]['message']['content'].strip()
+        record_usage('fireworks', result)
+        
+        # Remove quotes if present
+        if enhanced_question.startswith('"') and enhanced_question.endswith('"'):
+            enhanced_question = enhanced_question[1:-1]
+        return enhanced_question
+    
+    def enhance_question(self, user_question: str) -> str:
+        """
+        Enhance and format the user's question using Fireworks API
+        """
+        if not self.api_key:
+            logger.warning("Fireworks API key not found")
+            return user_question
+        
+        cached = self.enhancement_cache.get(user_question)
+        if cached is not None:
+            logger.debug("Using cached question enhancement")
+            return cached
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Enhance this question: {user_question}"}
-                ],
-                "max_tokens": 150,
-                "temperature": 0.3
-            }
+        try:
+            headers, payload = self._build_request(user_question)
             
-            logger.info(f"Sending request to Fireworks API for question enhancement")
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
+            logger.debug("Sending request to Fireworks API for question enhancement")
+            response = get_session().post(self.base_url, headers=headers, json=payload, timeout=10)
             response.raise_for_status()
             
-            result = response.json()
-            enhanced_question = result['choices'][0]['message']['content'].strip()
+            enhanced_question = self._parse_enhanced_question(response.json())
+            self.enhancement_cache.set(user_question, enhanced_question)
             
-            # Remove quotes if present
-            if enhanced_question.startswith('"') and enhanced_question.endswith('"'):
-                enhanced_question = enhanced_question[1:-1]
-                
-            logger.info(f"Question enhanced successfully: {user_question} → {enhanced_question}")
+            logger.debug("Question enhanced successfully: %s → %s", user_question, enhanced_question)
             return enhanced_question
             
         except requests.exceptions.RequestException as e:
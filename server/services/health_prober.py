@@ -0,0 +1,179 @@
+import os
+import time
+import random
+import threading
+import logging
+from typing import List, NamedTuple, Optional
+
+from services.circuit_breaker import CircuitBreaker
+from services.http_session import get_session
+
+logger = logging.getLogger(__name__)
+
+
+def probe_url(base_url: str) -> str:
+    """The model listing next to an OpenAI-compatible chat-completions URL"""
+    root = base_url.rsplit('/chat/completions', 1)[0]
+    return root.rstrip('/') + '/models'
+
+
+class ProbeResult(NamedTuple):
+    """Outcome of the latest probe with running totals; replaced whole, never mutated"""
+    reachable: Optional[bool] = None  # None: not probed (yet), e.g. no API key
+    latency_ms: Optional[float] = None
+    http_status: Optional[int] = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None
+    probes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+
+
+class UpstreamProbe:
+    """
+    One upstream service with its breaker and the result of its latest probe,
+    named after the breaker. The prober thread swaps `last` for a new
+    ProbeResult, so readers on request threads always see one consistent probe.
+    """
+
+    def __init__(self, service, breaker: CircuitBreaker):
+        self.name = breaker.name
+        self.service = service
+        self.breaker = breaker
+        self.url = probe_url(service.base_url)
+        self.last = ProbeResult()
+
+    def run(self, timeout: float):
+        """Probe once, record the outcome and pass what it says about the upstream to the breaker"""
+        last = self.last
+        if not self.service.is_available():
+            self.last = last._replace(reachable=None, error="API key not configured", checked_at=time.time())
+            return
+
+        started = time.perf_counter()
+        http_status = None
+        try:
+            response = get_session().get(self.url, headers={"Authorization": f"Bearer {self.service.api_key}"},
+                                         timeout=timeout)
+            http_status = response.status_code
+            response.raise_for_status()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        # A model listing says nothing about completion latency or error rates,
+        # so the probe never enters the breaker's window. It only moves the
+        # breaker: a failure to reach the upstream at all (no response, or a
+        # server error) counts as a failure, and a successful probe lets an
+        # open breaker try real calls again without waiting out reset_timeout.
+        if ok:
+            self.breaker.upstream_reachable()
+        elif http_status is None or http_status >= 500:
+            self.breaker.record_failure()
+
+        if not ok and last.consecutive_failures == 0:
+            logger.warning("%s health probe failed: %s", self.service.label, error)
+        elif ok and last.consecutive_failures:
+            logger.info("%s health probe succeeded again after %d failures", self.service.label, last.consecutive_failures)
+        self.last = ProbeResult(
+            reachable=ok, latency_ms=latency_ms, http_status=http_status, error=error, checked_at=time.time(),
+            probes=last.probes + 1, failures=last.failures + (not ok),
+            consecutive_failures=0 if ok else last.consecutive_failures + 1,
+        )
+
+    def result(self) -> dict:
+        """Latest probe in the shape of the services' test_connection() results"""
+        last = self.last
+        if last.checked_at is None:
+            status, message = "pending", "Not probed yet"
+        elif last.reachable is None:
+            status, message = "error", last.error
+        elif last.reachable:
+            status, message = "success", f"{self.service.label} API reachable"
+        else:
+            status, message = "error", f"Probe failed: {last.error}"
+        return {
+            "status": status,
+            "message": message,
+            "latency_ms": round(last.latency_ms, 1) if last.latency_ms is not None else None,
+            "http_status": last.http_status,
+            "age_seconds": round(time.time() - last.checked_at, 1) if last.checked_at is not None else None,
+            "circuit_breaker": self.breaker.state,
+            "probes": last.probes,
+            "failures": last.failures,
+        }
+
+
+class HealthProber:
+    """
+    Probes every upstream in the background each HEALTH_PROBE_INTERVAL seconds
+    (with 10% jitter, so workers drift apart) by listing its models: an
+    authenticated request that generates no tokens. Results are kept for
+    /health and /api/test. An unreachable upstream counts as a breaker
+    failure, so an outage opens the breaker before users hit it, and a
+    reachable one moves an open breaker to half-open early; probe latencies
+    stay out of the breakers' windows.
+
+    The thread starts on the first request a process serves, so a preloading
+    gunicorn master never probes; each worker runs its own.
+    """
+
+    def __init__(self, probes: List[UpstreamProbe], interval: Optional[float] = None, timeout: Optional[float] = None):
+        self.probes = probes
+        self.enabled = os.getenv('HEALTH_PROBE_ENABLED', 'true').lower() == 'true'
+        self.interval = interval if interval is not None else float(os.getenv('HEALTH_PROBE_INTERVAL', '30'))
+        self.timeout = timeout if timeout is not None else float(os.getenv('HEALTH_PROBE_TIMEOUT', '5'))
+        self.rounds = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def ensure_running(self):
+        """Start the probe thread in this process if it is not running yet"""
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._loop, name='health-prober', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            logger.info("Health prober started (every %g s)", self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        stop = self._stop
+        while not stop.is_set():
+            self.probe_all()
+            stop.wait(self.interval * random.uniform(0.9, 1.1))
+
+    def probe_all(self):
+        """One round over every upstream"""
+        for probe in self.probes:
+            try:
+                probe.run(self.timeout)
+            except Exception as e:
+                logger.error("Health probe of %s crashed: %s", probe.name, e)
+        self.rounds += 1
+
+    def get(self, name: str) -> Optional[UpstreamProbe]:
+        return next((probe for probe in self.probes if probe.name == name), None)
+
+    def results(self) -> dict:
+        return {probe.name: probe.result() for probe in self.probes}
+
+    def stats(self) -> dict:
+        """Prober state and the latest result per upstream, for the health endpoint"""
+        return {
+            "enabled": self.enabled,
+            "running": self._pid == os.getpid() and self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+            "rounds": self.rounds,
+            "upstreams": self.results(),
+        }
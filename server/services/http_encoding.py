@@ -0,0 +1,193 @@
+import os
+import gzip
+import time
+import hashlib
+import threading
+import logging
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from werkzeug.http import parse_accept_header
+from werkzeug.wrappers import Response
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Media types worth compressing. Event streams are excluded: they are relayed
+# token by token and a compressor would hold the tokens back.
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/html', 'application/x-ndjson')
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class ResponseCompressor:
+    """
+    gzip/brotli encoding of response bodies. A body is compressed when its
+    media type is textual, it is at least COMPRESSION_MIN_BYTES long and the
+    client accepts an encoding we have; brotli (if installed) is preferred
+    at equal quality values. Levels: COMPRESSION_GZIP_LEVEL and
+    COMPRESSION_BROTLI_QUALITY.
+    """
+
+    def __init__(self):
+        self.enabled = _env_flag('COMPRESSION_ENABLED', 'true')
+        self.min_bytes = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+        self.gzip_level = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+        self.brotli_quality = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def is_compressible(self, mimetype: Optional[str]) -> bool:
+        return self.enabled and mimetype in COMPRESSIBLE_TYPES
+
+    def choose(self, accept_encoding: Optional[str], size: int) -> Optional[str]:
+        """The encoding to use for a body of `size` bytes, or None to send it as is"""
+        if not self.enabled or size < self.min_bytes or not accept_encoding:
+            return None
+        accepted = parse_accept_header(accept_encoding)
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accepted[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            encoded = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            # mtime=0 keeps the output identical for identical bodies
+            encoded = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(encoded)
+        return encoded
+
+    def encode(self, body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """(body, encoding) as it should be sent; encoding is None if left uncompressed"""
+        encoding = self.choose(accept_encoding, len(body))
+        if encoding is None:
+            return body, None
+        return self.compress(body, encoding), encoding
+
+    def apply(self, response, accept_encoding: Optional[str]):
+        """Compress a complete Flask response in place, when worthwhile"""
+        if (response.direct_passthrough or response.is_streamed or not self.is_compressible(response.mimetype)
+                or 'Content-Encoding' in response.headers or not 200 <= response.status_code < 300):
+            return response
+        response.vary.add('Accept-Encoding')
+        body, encoding = self.encode(response.get_data(), accept_encoding)
+        if encoding is not None:
+            response.set_data(body)
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "encodings": list(self.encodings),
+                "min_bytes": self.min_bytes,
+                "compressed": self.compressed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            }
+
+
+def body_tag(body: bytes) -> str:
+    """Opaque tag of an uncompressed body, so it matches whichever encoding was sent"""
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def body_etag(body: bytes) -> str:
+    """Weak validator of an uncompressed body"""
+    return 'W/"' + body_tag(body) + '"'
+
+
+class Snapshot(NamedTuple):
+    body: bytes
+    built_at: float  # wall-clock time
+    tag: str  # body_tag(body), for a weak ETag
+
+
+class TimedSnapshot:
+    """
+    The last body built by `build`, reused for `ttl` seconds. Polled
+    endpoints serve the same body (and validators) to every caller in that
+    window instead of rebuilding it per request; the body's tag is computed
+    once per build, not per poll.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, build: Callable[[], bytes]) -> Snapshot:
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires:
+                return self._snapshot
+            body = build()
+            self._snapshot = Snapshot(body, time.time(), body_tag(body))
+            self._expires = time.monotonic() + self.ttl
+            return self._snapshot
+
+
+def versioned(request, tag: str, max_age: int, build: Callable[[], object]):
+    """
+    A GET response whose content is fully determined by `tag` (e.g. data
+    version and intent), so it is validated without building the body: a
+    client or CDN holding the current tag gets an empty 304, anything else
+    gets build() with the tag as its (weak) ETag.
+    """
+    if request.if_none_match.contains_weak(tag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(tag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def snapshot_response(request, snapshot: Snapshot, max_age: int, mimetype: str):
+    """
+    A GET response serving `snapshot`, validated by its precomputed tag: a
+    client holding the current tag gets an empty 304 without the body being
+    wrapped, hashed or compressed. If-Modified-Since is honoured as well.
+    """
+    if request.if_none_match.contains_weak(snapshot.tag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.body, mimetype=mimetype)
+    response.set_etag(snapshot.tag, weak=True)
+    response.last_modified = snapshot.built_at
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response if response.status_code == 304 else response.make_conditional(request)
+
+
+def conditional(response, request, max_age: int, last_modified: Optional[float] = None):
+    """
+    Validators and Cache-Control for a deterministic GET response, so a CDN or
+    the load balancer may reuse it for `max_age` seconds and revalidate it
+    afterwards. Turns the response into a 304 when the client's copy is current.
+    """
+    response.headers['ETag'] = body_etag(response.get_data())
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
@@ -0,0 +1,237 @@
+import os
+import itertools
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# One transport per process, with the settings it was built from, as a single
+# (pid, config, session) tuple. Gunicorn forks workers after import, so the pid
+# is remembered and a fresh pool is built in the child instead of sharing sockets.
+_state = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient is bound to the event loop that first used it. Each upstream
+# host gets several small clients used round-robin: httpcore scans every pooled
+# connection when assigning a request, so one big pool gets CPU-bound once
+# hundreds of sockets are open.
+ASYNC_POOL_SHARD_SIZE = 16
+_async_clients = {}
+_async_clients_loop = None
+_async_shard_counter = itertools.count()
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def transport_config() -> dict:
+    """Read the pooled transport settings from the environment"""
+    return {
+        "pooling": _env_flag('HTTP_POOLING_ENABLED', 'true'),
+        "pool_connections": int(os.getenv('HTTP_POOL_CONNECTIONS', '4')),
+        "pool_maxsize": int(os.getenv('HTTP_POOL_MAXSIZE', '32')),
+        "pool_block": _env_flag('HTTP_POOL_BLOCK', 'false'),
+        "keep_alive": _env_flag('HTTP_KEEP_ALIVE', 'true'),
+        "http2": _env_flag('HTTP2_ENABLED', 'false'),
+        "async_max_connections": int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '200')),
+    }
+
+
+class _HTTPXResponse:
+    """Wraps an httpx response so callers can keep using the requests API"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            self._response.read()
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self._response.url}", response=self
+            )
+
+    def json(self):
+        return self._response.json()
+
+    @property
+    def text(self):
+        return self._response.text
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self._response.iter_lines():
+            yield line if decode_unicode else line.encode('utf-8')
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2Session:
+    """requests-compatible session backed by an HTTP/2 capable httpx client"""
+
+    def __init__(self, config: dict):
+        import httpx
+
+        self._httpx = httpx
+        headers = {} if config["keep_alive"] else {"Connection": "close"}
+        self._client = httpx.Client(
+            http2=True,
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=config["pool_maxsize"],
+                max_keepalive_connections=config["pool_maxsize"] if config["keep_alive"] else 0,
+            ),
+        )
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False):
+        return self._send("POST", url, headers=headers, json=json, timeout=timeout, stream=stream)
+
+    def get(self, url, headers=None, timeout=None):
+        return self._send("GET", url, headers=headers, timeout=timeout)
+
+    def _send(self, method, url, headers=None, json=None, timeout=None, stream=False):
+        try:
+            request = self._client.build_request(method, url, headers=headers, json=json, timeout=timeout)
+            response = self._client.send(request, stream=stream)
+            if not stream:
+                response.read()
+            return _HTTPXResponse(response)
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except self._httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def close(self):
+        self._client.close()
+
+
+def _build_session(config: dict):
+    if config["http2"]:
+        try:
+            import h2  # noqa: F401  httpx needs it for http2=True
+            return HTTP2Session(config)
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but httpx[http2] is not installed, using HTTP/1.1 pool")
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config["pool_connections"],
+        pool_maxsize=config["pool_maxsize"],
+        pool_block=config["pool_block"],
+        max_retries=0,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not config["keep_alive"]:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def _process_state() -> tuple:
+    """(pid, config, session) for this process; the environment is read once per process"""
+    global _state
+
+    state = _state
+    pid = os.getpid()
+    if state is not None and state[0] == pid:
+        return state
+    with _session_lock:
+        if _state is None or _state[0] != pid:
+            config = transport_config()
+            session = _build_session(config) if config["pooling"] else requests
+            _state = (pid, config, session)
+            if session is not requests:
+                logger.info(
+                    f"Created pooled HTTP session (maxsize={config['pool_maxsize']}, "
+                    f"keep_alive={config['keep_alive']}, http2={isinstance(session, HTTP2Session)})"
+                )
+        return _state
+
+
+def get_session():
+    """
+    Return the process-wide pooled session shared by all upstream services.
+    With HTTP_POOLING_ENABLED=false the bare requests module is returned, which
+    opens a new connection for every call (the original behaviour).
+    """
+    return _process_state()[2]
+
+
+def reset_session():
+    """Close the shared session so the next call builds one from fresh settings"""
+    global _state
+
+    with _session_lock:
+        if _state is not None and _state[2] is not requests:
+            try:
+                _state[2].close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled HTTP session: {str(e)}")
+        _state = None
+
+
+def get_async_client(url: str):
+    """
+    Return the pooled httpx.AsyncClient for the upstream host of `url` on the
+    running event loop, used by the async service clients so one worker can
+    keep many upstream calls in flight.
+    """
+    global _async_clients_loop
+
+    import asyncio
+    import httpx
+    from urllib.parse import urlsplit
+
+    loop = asyncio.get_running_loop()
+    if _async_clients_loop is not loop:
+        _async_clients.clear()
+        _async_clients_loop = loop
+
+    origin = urlsplit(url).netloc
+    shards = _async_clients.get(origin)
+    if shards is None:
+        config = _process_state()[1]
+        http2 = False
+        if config["http2"]:
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                logger.warning("HTTP2_ENABLED is set but httpx[http2] is not installed, using HTTP/1.1 pool")
+
+        max_connections = config["async_max_connections"]
+        shard_count = max(1, -(-max_connections // ASYNC_POOL_SHARD_SIZE))
+        shard_size = -(-max_connections // shard_count)
+        shards = [
+            httpx.AsyncClient(
+                http2=http2,
+                headers={} if config["keep_alive"] else {"Connection": "close"},
+                limits=httpx.Limits(
+                    max_connections=shard_size,
+                    max_keepalive_connections=shard_size if config["keep_alive"] else 0,
+                ),
+            )
+            for _ in range(shard_count)
+        ]
+        _async_clients[origin] = shards
+        logger.info(
+            f"Created async HTTP clients for {origin} "
+            f"({shard_count} x {shard_size} connections, http2={http2})"
+        )
+    return shards[next(_async_shard_counter) % len(shards)]
+
+
+async def close_async_client():
+    """Close the async clients, e.g. on ASGI lifespan shutdown"""
+    global _async_clients_loop
+
+    for shards in list(_async_clients.values()):
+        for client in shards:
+            await client.aclose()
+    _async_clients.clear()
+    _async_clients_loop = None
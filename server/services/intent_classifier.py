@@ -0,0 +1,334 @@
+import os
+import re
+import zlib
+import logging
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # The hashed n-gram scorer is optional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Ties between equally scored intents go to the one listed first
+INTENT_KEYWORDS = [
+    ('greeting', ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']),
+    ('skills', ['skill', 'technology', 'technologies', 'programming', 'language', 'languages', 'frameworks',
+                'tools', 'technical', 'expertise', 'tech stack']),
+    ('projects', ['project', 'projects', 'work', 'portfolio', 'built', 'created', 'developed', 'github', 'show me his']),
+    ('experience', ['experience', 'job', 'career', 'work history', 'work experience', 'employment', 'professional', 'internship']),
+    ('contact', ['contact', 'email', 'phone', 'reach', 'connect', 'linkedin', 'social', 'hire']),
+    ('education', ['education', 'degree', 'university', 'college', 'study', 'academic']),
+    ('about', ['about', 'who is', 'tell me', 'background', 'bio', 'story']),
+]
+
+# Generic intents only win when nothing more specific matched as strongly,
+# so "hi, what are his skills" is about skills rather than a greeting
+INTENT_WEIGHTS = {'greeting': 0.4, 'about': 0.5}
+
+# Example phrasings the n-gram scorer learns from, on top of the keywords
+INTENT_EXAMPLES = {
+    'greeting': ["hi there", "hey there", "good evening", "howdy", "hello aniru"],
+    'skills': ["what are his skills", "which programming languages does he know", "what technologies does he use",
+               "does he know react", "is he good at python", "what frameworks and tools"],
+    'projects': ["show me his projects", "what has he built", "what apps has he developed",
+                 "github repositories", "what is he working on"],
+    'experience': ["work experience", "internships he has done", "jobs he has had", "career history",
+                   "professional employment"],
+    'contact': ["how can i contact him", "what is his email address", "phone number", "linkedin profile",
+                "how do i reach out", "can i hire him"],
+    'education': ["where did he study", "which university", "college degree", "academic qualifications",
+                  "what is he studying"],
+    'about': ["who is anirudh", "tell me about him", "his background", "his bio", "his story",
+              "introduce anirudh"],
+}
+
+_TOKEN = re.compile(r"[a-z0-9+#]+")
+_WORD = re.compile(r"\w+")
+# Distinct words remembered by IntentClassifier before its lookup table is reset
+_WORD_CACHE_SIZE = 8192
+
+
+def _word_matches(keyword: str, word: str) -> bool:
+    """
+    Whether a whole word matches a single-word keyword. Short keywords must
+    match exactly ("hi" is not "his"); longer ones also match inflections
+    ("works", "skills", "contacting").
+    """
+    if len(keyword) >= 5:
+        return word.startswith(keyword)
+    if len(keyword) == 4:
+        return word == keyword or word == keyword + 's'
+    return word == keyword
+
+
+def _phrase_pattern(phrase: str) -> re.Pattern:
+    return re.compile(r'\s+'.join(re.escape(word) for word in phrase.split()) + r'\b')
+
+
+@lru_cache(maxsize=16384)
+def _token_ngram_indices(token: str, dimensions: int, low: int, high: int) -> tuple:
+    padded = f"<{token}>"
+    indices = [zlib.crc32(padded.encode('utf-8')) % dimensions]
+    for n in range(low, high + 1):
+        for start in range(len(padded) - n + 1):
+            indices.append(zlib.crc32(padded[start:start + n].encode('utf-8')) % dimensions)
+    return tuple(indices)
+
+
+def hashed_ngram_indices(text: str, dimensions: int, ngram_range=(3, 4)) -> List[int]:
+    """Hashed feature indices of every token and its padded character n-grams"""
+    indices = []
+    low, high = ngram_range
+    for token in _TOKEN.findall(text.lower()):
+        indices.extend(_token_ngram_indices(token, dimensions, low, high))
+    return indices
+
+
+class HashedNgramScorer:
+    """
+    TF-IDF over hashed character n-grams with one L2-normalized centroid per
+    intent; a message scores the cosine similarity against every centroid in
+    a single NumPy dot product. Tolerates typos ("skils", "projcts") that the
+    keyword matcher cannot see.
+    """
+
+    def __init__(self, examples: Dict[str, List[str]], dimensions: int = 4096, ngram_range=(3, 4)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.intents = list(examples)
+
+        documents = [(intent, text) for intent, texts in examples.items() for text in texts]
+        counts = self._count_matrix([text for _, text in documents])
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+
+        vectors = self._normalize(counts * self.idf)
+        labels = np.array([self.intents.index(intent) for intent, _ in documents])
+        centroids = np.stack([vectors[labels == i].mean(axis=0) for i in range(len(self.intents))])
+        self.centroids = self._normalize(centroids)
+        # Row-major (dimensions, intents) copy for gathering a message's n-grams
+        self._centroid_rows = np.ascontiguousarray(self.centroids.T)
+
+    def _ngram_indices(self, text: str) -> List[int]:
+        return hashed_ngram_indices(text, self.dimensions, self.ngram_range)
+
+    def _features(self, texts: Sequence[str]):
+        """(row, feature) index arrays with one entry per n-gram of every text"""
+        rows, features = [], []
+        for row, text in enumerate(texts):
+            indices = self._ngram_indices(text)
+            features.extend(indices)
+            rows.extend([row] * len(indices))
+        return np.asarray(rows, dtype=np.intp), np.asarray(features, dtype=np.intp)
+
+    def _count_matrix(self, texts: Sequence[str]):
+        rows, features = self._features(texts)
+        flat = rows * self.dimensions + features
+        counts = np.bincount(flat, minlength=len(texts) * self.dimensions)
+        return counts.reshape(len(texts), self.dimensions).astype(np.float32)
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def score_many(self, texts: Sequence[str]):
+        """
+        (len(texts), len(intents)) cosine similarities. Messages only touch a
+        few dozen of the hashed dimensions, so the batch is counted over the
+        features it actually uses and scored against those centroid rows in
+        one matrix product.
+        """
+        rows, features = self._features(texts)
+        if not len(features):
+            return np.zeros((len(texts), len(self.intents)), dtype=np.float32)
+        columns, inverse = np.unique(features, return_inverse=True)
+        flat = rows * len(columns) + inverse
+        counts = np.bincount(flat, minlength=len(texts) * len(columns)).reshape(len(texts), len(columns))
+        weights = counts * self.idf[columns]
+        norms = np.sqrt(np.einsum('ij,ij->i', weights, weights))
+        norms[norms == 0] = 1.0
+        return (weights @ self._centroid_rows[columns]) / norms[:, np.newaxis]
+
+
+class IntentClassifier:
+    """
+    Ranks intents for a message. Each word of the message is looked up in a
+    table of the intent (and INTENT_WEIGHTS weight) its keywords give it,
+    filled lazily per distinct word; multi-word phrases take precedence over
+    their words so "work experience" wins over "work". Messages no keyword
+    matches fall back to the hashed n-gram scorer when NumPy is installed and
+    INTENT_NGRAM_ENABLED is not 'false'.
+
+    A request classifies the same message several times (response cache
+    lookup and store, speculative comparison, rule-based fallback), so
+    classify() remembers the last INTENT_CACHE_SIZE messages.
+    """
+
+    def __init__(self, intent_keywords=INTENT_KEYWORDS, examples: Optional[Dict[str, List[str]]] = None):
+        self._priority = {intent: i for i, (intent, _) in enumerate(intent_keywords)}
+        # Single-word keywords in match order: intents in order, longest keyword first
+        self._keywords = [
+            (keyword, intent, INTENT_WEIGHTS.get(intent, 1.0))
+            for intent, keywords in intent_keywords
+            for keyword in sorted(keywords, key=len, reverse=True) if ' ' not in keyword
+        ]
+        # First word -> [(remaining words, intent, weight, pattern)] for multi-word phrases
+        self._phrases = {}
+        for intent, keywords in intent_keywords:
+            for phrase in sorted(keywords, key=len, reverse=True):
+                words = phrase.split()
+                if len(words) > 1:
+                    self._phrases.setdefault(words[0], []).append(
+                        (words[1:], intent, INTENT_WEIGHTS.get(intent, 1.0), _phrase_pattern(phrase)))
+        self._phrase_starts = frozenset(self._phrases)
+        # word -> (intent, weight), or False when no keyword matches it
+        self._word_intents = {}
+        self.cache_size = int(os.getenv('INTENT_CACHE_SIZE', '1024'))
+        self._recent = {}
+        self.ngram_threshold = float(os.getenv('INTENT_NGRAM_THRESHOLD', '0.3'))
+
+        self.scorer = None
+        if np is not None and os.getenv('INTENT_NGRAM_ENABLED', 'true').lower() == 'true':
+            training = {intent: list(keywords) for intent, keywords in intent_keywords}
+            for intent, texts in (examples if examples is not None else INTENT_EXAMPLES).items():
+                training.setdefault(intent, []).extend(texts)
+            self.scorer = HashedNgramScorer(training)
+        elif np is None:
+            logger.info("NumPy not installed, intent classification uses keywords only")
+
+    def _word_intent(self, word: str):
+        hit = self._word_intents.get(word)
+        if hit is None:
+            if len(self._word_intents) >= _WORD_CACHE_SIZE:
+                self._word_intents.clear()
+            hit = next(((intent, weight) for keyword, intent, weight in self._keywords
+                        if _word_matches(keyword, word)), False)
+            self._word_intents[word] = hit
+        return hit
+
+    def _match_phrase(self, words: List[str], i: int, message_lower: str, spaced: bool):
+        """
+        (intent, weight, word count) of the phrase starting at words[i], if any.
+        `spaced` means only whitespace separates the words of the message.
+        """
+        start = None
+        for rest, intent, weight, pattern in self._phrases[words[i]]:
+            if words[i + 1:i + 1 + len(rest)] != rest:
+                continue
+            if spaced:
+                return intent, weight, 1 + len(rest)
+            # The words line up; check that only whitespace separates them
+            if start is None:
+                start = next(islice(_WORD.finditer(message_lower), i, None)).start()
+            if pattern.match(message_lower, start):
+                return intent, weight, 1 + len(rest)
+        return None
+
+    def _keyword_scores(self, message_lower: str) -> Dict[str, float]:
+        scores = {}
+        # Splitting on whitespace is several times cheaper than the word regex
+        # and gives the same words unless punctuation sits inside the message
+        words = message_lower.rstrip('?!. ').split()
+        spaced = ''.join(words).isalnum()
+        if not spaced:
+            words = _WORD.findall(message_lower)
+        hits = list(map(self._word_intents.get, words))
+        if None in hits:
+            hits = list(map(self._word_intent, words))
+        if not self._phrase_starts.isdisjoint(words):
+            # A phrase takes the place of the words it spans
+            end = 0
+            for i, word in enumerate(words):
+                if i >= end and word in self._phrase_starts:
+                    phrase = self._match_phrase(words, i, message_lower, spaced)
+                    if phrase is not None:
+                        intent, weight, length = phrase
+                        hits[i:i + length] = [(intent, weight)] + [False] * (length - 1)
+                        end = i + length
+        for intent, weight in filter(None, hits):
+            scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+    def _keyword_ranking(self, message_lower: str) -> List[Tuple[str, float]]:
+        return self._ranking(self._keyword_scores(message_lower))
+
+    def _ranking(self, scores: Dict[str, float]) -> List[Tuple[str, float]]:
+        if not scores:
+            return []
+        total = sum(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._priority[item[0]]))
+        return [(intent, score / total) for intent, score in ranked]
+
+    def _best(self, scores: Dict[str, float]) -> Tuple[str, float]:
+        return (*scores, 1.0) if len(scores) == 1 else self._ranking(scores)[0]
+
+    def _ngram_best(self, row) -> Tuple[str, float]:
+        best = int(row.argmax())
+        if row[best] >= self.ngram_threshold:
+            return self.scorer.intents[best], float(row[best])
+        return 'default', 0.0
+
+    def _ngram_ranking(self, row) -> List[Tuple[str, float]]:
+        ranked = sorted(
+            ((self.scorer.intents[i], float(score)) for i, score in enumerate(row) if score >= self.ngram_threshold),
+            key=lambda item: -item[1]
+        )
+        return ranked
+
+    def rank(self, message: str) -> List[Tuple[str, float]]:
+        """Intents with confidence in [0, 1], best first; empty when nothing matched"""
+        return self.rank_many([message])[0]
+
+    def rank_many(self, messages: Sequence[str]) -> List[List[Tuple[str, float]]]:
+        rankings = [self._keyword_ranking(message.lower()) for message in messages]
+        if self.scorer is not None:
+            unmatched = [i for i, ranking in enumerate(rankings) if not ranking and messages[i].strip()]
+            if unmatched:
+                scores = self.scorer.score_many([messages[i] for i in unmatched])
+                for i, row in zip(unmatched, scores):
+                    rankings[i] = self._ngram_ranking(row)
+        return rankings
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        """Best intent and its confidence, or ('default', 0.0)"""
+        recent = self._recent
+        result = recent.get(message)
+        if result is not None:
+            return result
+        scores = self._keyword_scores(message.lower())
+        if len(scores) == 1:
+            result = (*scores, 1.0)
+        elif scores:
+            result = self._ranking(scores)[0]
+        elif self.scorer is not None and message.strip():
+            result = self._ngram_best(self.scorer.score_many([message])[0])
+        else:
+            result = ('default', 0.0)
+        if self.cache_size > 0:
+            if len(recent) >= self.cache_size:
+                recent.clear()
+            recent[message] = result
+        return result
+
+    def classify_many(self, messages: Sequence[str]) -> List[Tuple[str, float]]:
+        """classify() for a batch; n-gram scoring of the unmatched messages runs as one matrix product"""
+        results, unmatched = [], []
+        for i, message in enumerate(messages):
+            scores = self._keyword_scores(message.lower())
+            if scores:
+                results.append(self._best(scores))
+                continue
+            results.append(('default', 0.0))
+            if self.scorer is not None and message.strip():
+                unmatched.append(i)
+        if unmatched:
+            rows = self.scorer.score_many([messages[i] for i in unmatched])
+            for i, row in zip(unmatched, rows):
+                results[i] = self._ngram_best(row)
+        return results
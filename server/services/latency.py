@@ -0,0 +1,143 @@
+import os
+import bisect
+import threading
+from typing import Dict, Optional
+
+
+def _bucket_bounds(start_ms: float = 1.0, end_ms: float = 120000.0, growth: float = 1.15) -> list:
+    bounds = []
+    bound = start_ms
+    while bound < end_ms:
+        bounds.append(round(bound, 3))
+        bound *= growth
+    bounds.append(end_ms)
+    return bounds
+
+
+BUCKET_BOUNDS = _bucket_bounds()
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (1 ms to 120 s, 15% wide buckets).
+
+    Recording and percentile lookups are O(buckets) at worst and never sort
+    samples. Once `max_samples` observations accumulate, every count is halved
+    so percentiles follow recent behaviour instead of the whole uptime.
+    """
+
+    def __init__(self, max_samples: int = 2048):
+        self.max_samples = max_samples
+        self._counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._total = 0
+        self._lifetime = 0
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms: float):
+        index = bisect.bisect_left(BUCKET_BOUNDS, value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+            self._lifetime += 1
+            self._sum_ms += value_ms
+            if self._total >= self.max_samples:
+                self._counts = [count // 2 for count in self._counts]
+                self._total = sum(self._counts)
+
+    @property
+    def count(self) -> int:
+        """Observations currently weighted in the histogram"""
+        return self._total
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given quantile, or None without samples"""
+        with self._lock:
+            if not self._total:
+                return None
+            rank = fraction * self._total
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return BUCKET_BOUNDS[min(index, len(BUCKET_BOUNDS) - 1)]
+            return BUCKET_BOUNDS[-1]
+
+    def summary(self) -> dict:
+        with self._lock:
+            lifetime, sum_ms = self._lifetime, self._sum_ms
+        return {
+            "count": lifetime,
+            "mean_ms": round(sum_ms / lifetime, 1) if lifetime else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class LatencyTracker:
+    """Named latency histograms, one per pipeline stage"""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def record(self, stage: str, value_ms: float):
+        self.histogram(stage).record(value_ms)
+
+    def stats(self) -> dict:
+        """p50/p95/p99 per stage for the health endpoint"""
+        return {stage: histogram.summary() for stage, histogram in sorted(self._histograms.items())}
+
+
+class AdaptiveTimeout:
+    """
+    Upstream timeout derived from observed latency: p99 x UPSTREAM_TIMEOUT_FACTOR,
+    clamped to [UPSTREAM_TIMEOUT_MIN, default]. Until `min_samples` calls have
+    been seen, or with a factor of 0, the default is used unchanged. The same
+    histogram provides the hedging delay (HEDGE_PERCENTILE).
+
+    Timed-out calls are recorded at the time they waited, and every
+    consecutive timeout doubles the timeout (up to the default) until a call
+    succeeds, so a shift in upstream latency above the current timeout widens
+    it instead of failing every call against a histogram that never moves.
+    """
+
+    def __init__(self, histogram: LatencyHistogram, default_seconds: float):
+        self.histogram = histogram
+        self.default_seconds = default_seconds
+        self.factor = float(os.getenv('UPSTREAM_TIMEOUT_FACTOR', '3'))
+        self.min_seconds = float(os.getenv('UPSTREAM_TIMEOUT_MIN', '2'))
+        self.min_samples = int(os.getenv('UPSTREAM_TIMEOUT_MIN_SAMPLES', '20'))
+        self.hedge_percentile = float(os.getenv('HEDGE_PERCENTILE', '95')) / 100
+        self.consecutive_timeouts = 0
+
+    def _warmed_up(self) -> bool:
+        return self.histogram.count >= self.min_samples
+
+    def seconds(self) -> float:
+        if self.factor <= 0 or not self._warmed_up():
+            return self.default_seconds
+        p99_ms = self.histogram.percentile(0.99)
+        seconds = max(self.min_seconds, p99_ms * self.factor / 1000) * 2 ** min(self.consecutive_timeouts, 16)
+        return min(self.default_seconds, seconds)
+
+    def record_success(self):
+        self.consecutive_timeouts = 0
+
+    def record_timeout(self, waited_ms: float):
+        self.histogram.record(waited_ms)
+        self.consecutive_timeouts += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data"""
+        if not self._warmed_up():
+            return None
+        return self.histogram.percentile(self.hedge_percentile) / 1000
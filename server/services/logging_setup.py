@@ -0,0 +1,126 @@
+import os
+import sys
+import queue
+import atexit
+import random
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEFAULT_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+
+_listener = None
+
+
+class KeyValues(dict):
+    """Fields of a one-line summary, rendered as key=value pairs only if the record is emitted"""
+
+    def __str__(self) -> str:
+        return ' '.join(
+            f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in self.items()
+        )
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'services.groq_service=0.1,services.chat_pipeline=0.5' -> {logger prefix: keep rate}"""
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fixed share of the records below WARNING from each configured
+    logger (the longest matching name prefix wins); warnings and errors
+    always pass. Loggers without a rate are not sampled.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefixes = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            rate = self.rates[max(prefixes, key=len)] if prefixes else 1.0
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record as logged. The stock prepare()
+    formats the message on the calling thread; here msg % args, exception
+    text and the final line are all built by the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def stop_logging():
+    """Flush and stop the background writer, if one is running"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_in_child():
+    """Threads do not survive fork: a worker forked from a configured master needs its own writer"""
+    global _listener
+    if _listener is not None:
+        # Records queued before the fork belong to the parent's writer
+        log_queue = _listener.queue
+        while not log_queue.empty():
+            log_queue.get_nowait()
+        _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def configure_logging(level: Optional[str] = None) -> Optional[QueueListener]:
+    """
+    Root logging setup. LOG_MODE=sync (default) writes on the logging thread
+    like logging.basicConfig; LOG_MODE=queue hands records to a background
+    writer through an unbounded queue, so requests never wait on stderr.
+    LOG_LEVEL sets the level, LOG_FORMAT the line format, and
+    LOG_SAMPLE_RATES keeps only a share of the info/debug records of chosen
+    loggers. Returns the queue listener, if one was started.
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
+        # Already configured (by an earlier import or the host server)
+        return _listener
+
+    root.setLevel((level or os.getenv('LOG_LEVEL', 'INFO')).upper())
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(logging.Formatter(os.getenv('LOG_FORMAT', DEFAULT_FORMAT)))
+
+    handler = output
+    if os.getenv('LOG_MODE', 'sync').lower() == 'queue':
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_in_child)
+
+    rates = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    root.addHandler(handler)
+    return _listener
@@ -0,0 +1,254 @@
+import abc
+import bisect
+import threading
+import contextvars
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits (sub-millisecond) up to the upstream timeout
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric(abc.ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The child for one label combination; callers on hot paths may keep it"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label combination's value"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def render(self, name, labelnames, key):
+        return [f"{name}{_label_text(labelnames, key)} {_format_value(self._value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_counts', '_sum', '_lock')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            counts, total_sum = list(self._counts), self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_label_text(labelnames, key, le)} {cumulative}")
+        labels = _label_text(labelnames, key)
+        lines.append(f"{name}_sum{labels} {_format_value(total_sum)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+
+class CallbackGauge(_Metric):
+    """
+    Samples read at scrape time, so the hot path pays nothing. `kind` may be
+    'counter' when the callback reports an existing monotonic count.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, callback: Callable[[], Iterable[Tuple[tuple, float]]],
+                 kind: str = 'gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def _new_child(self):
+        raise TypeError(f"{self.name} is read from its callback and has no labelled children")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            for key, value in self.callback():
+                lines.append(f"{self.name}{_label_text(self.labelnames, tuple(str(v) for v in key))} {_format_value(value)}")
+        except Exception as e:
+            logger.error(f"Metrics callback for {self.name} failed: {str(e)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry. Metrics are per process; with
+    several gunicorn workers each scrape sees the worker that answered it.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Iterable[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, tuple(buckets or DEFAULT_BUCKETS)))
+
+    def gauge_callback(self, name: str, documentation: str, labelnames: Iterable[str],
+                       callback: Callable[[], Iterable[Tuple[tuple, float]]], kind: str = 'gauge') -> CallbackGauge:
+        """Replace any previous callback, so re-created apps report their own objects"""
+        metric = CallbackGauge(name, documentation, labelnames, callback, kind)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'aniru_stage_duration_seconds', 'Latency of chat pipeline stages', ['stage']
+)
+CHAT_RESPONSES = REGISTRY.counter(
+    'aniru_chat_responses_total', 'Chat answers by source', ['source', 'cached']
+)
+LLM_TOKENS = REGISTRY.counter(
+    'aniru_llm_tokens_total', 'Tokens reported in upstream usage fields', ['provider', 'kind']
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    'aniru_prompt_estimated_tokens', 'Locally estimated input tokens per upstream request', ['provider'],
+    buckets=(250, 500, 750, 1000, 1250, 1500, 2000, 3000, 4000, 8000)
+)
+SHED_REQUESTS = REGISTRY.counter(
+    'aniru_shed_requests_total', 'Chat requests answered by the rule-based chatbot because of admission control', ['reason']
+)
+PROVIDER_FAILOVERS = REGISTRY.counter(
+    'aniru_provider_failovers_total', 'Answer requests retried on another provider after a failure', ['provider']
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'aniru_http_requests_total', 'HTTP requests by endpoint and status', ['endpoint', 'status']
+)
+
+
+# Tokens of the latest completion in this thread or task, for the request's summary line
+_last_usage = contextvars.ContextVar('last_usage', default=None)
+
+
+def record_usage(provider: str, result: dict):
+    """Count and log prompt/completion tokens from an OpenAI-style `usage` block, if present"""
+    usage = result.get('usage') or (result.get('x_groq') or {}).get('usage')
+    if not usage:
+        return
+    _last_usage.set(usage)
+    logger.debug("%s usage: %s prompt tokens, %s completion tokens", provider, usage.get('prompt_tokens'), usage.get('completion_tokens'))
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        tokens = usage.get(kind)
+        if tokens:
+            LLM_TOKENS.labels(provider, kind[:-len('_tokens')]).inc(tokens)
+
+
+def take_usage() -> dict:
+    """prompt_tokens/completion_tokens recorded since the last call in this thread or task, then forget them"""
+    usage = _last_usage.get()
+    if usage is None:
+        return {}
+    _last_usage.set(None)
+    return {kind: usage[kind] for kind in ('prompt_tokens', 'completion_tokens') if usage.get(kind) is not None}
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+import weakref
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data.json')
+
+
+class PortfolioSnapshot(NamedTuple):
+    """One immutable version of data.json. Treat `data` as read-only."""
+    version: str
+    data: dict
+    loaded_at: float
+
+
+class PortfolioStore:
+    """
+    Process-wide holder of the parsed portfolio data shared by every service.
+
+    Readers take `store.snapshot` once per request and use it throughout, so a
+    reload (an atomic reference swap) never mixes two versions mid-request.
+    data.json is re-stat'ed at most every `check_interval` seconds; with
+    PORTFOLIO_WATCH=true and watchdog installed, inotify events reload it
+    immediately as well.
+    """
+
+    def __init__(self, data_path: str = DEFAULT_DATA_PATH, check_interval: float = None):
+        self.data_path = os.path.abspath(data_path)
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv('PORTFOLIO_RELOAD_INTERVAL', '1.0')
+        )
+        self.reloads = 0
+        self.reload_errors = 0
+
+        self._lock = threading.Lock()
+        # Zero-argument callables returning the subscriber, or None once it has been collected
+        self._subscribers: List[Callable[[], Optional[Callable[[PortfolioSnapshot], None]]]] = []
+        self._observer = None
+        self._fork_hook = False
+        self._file_signature = self._stat_signature()
+        self._checked_at = time.monotonic()
+        self._snapshot = self._load() or PortfolioSnapshot("empty", {}, time.time())
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.data_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _load(self):
+        """Parse data.json into a new snapshot, or None if it cannot be read"""
+        try:
+            with open(self.data_path, 'rb') as file:
+                raw = file.read()
+            data = json.loads(raw)
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            logger.info(f"Portfolio data loaded (version {version})")
+            return PortfolioSnapshot(version, data, time.time())
+        except FileNotFoundError:
+            logger.warning("data.json not found, using empty portfolio data")
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing data.json: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error loading portfolio data: {str(e)}")
+        return None
+
+    @property
+    def snapshot(self) -> PortfolioSnapshot:
+        """The current snapshot, reloading first if data.json changed"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.maybe_reload()
+        return self._snapshot
+
+    @property
+    def data(self) -> dict:
+        return self.snapshot.data
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version
+
+    def maybe_reload(self) -> bool:
+        """Reload if data.json's mtime or size changed. Returns True if a new version was swapped in."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            signature = self._stat_signature()
+            if signature == self._file_signature:
+                return False
+            self._file_signature = signature
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Re-read data.json and swap it in. A broken file keeps the previous version."""
+        with self._lock:
+            snapshot = self._load()
+            if snapshot is None:
+                self.reload_errors += 1
+                logger.warning("Keeping previous portfolio data after failed reload")
+                return False
+            if snapshot.version == self._snapshot.version:
+                return False
+            self._snapshot = snapshot
+            self.reloads += 1
+            subscribers = [ref() for ref in self._subscribers]
+            self._subscribers = [ref for ref, callback in zip(self._subscribers, subscribers) if callback is not None]
+
+        logger.info(f"Portfolio data hot-reloaded (version {snapshot.version})")
+        for callback in subscribers:
+            if callback is None:
+                continue
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Portfolio reload subscriber failed: {str(e)}")
+        return True
+
+    def subscribe(self, callback: Callable[[PortfolioSnapshot], None]):
+        """
+        Call `callback(snapshot)` after every successful reload. Bound methods
+        are held weakly, so subscribing does not keep their object alive.
+        """
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        with self._lock:
+            self._subscribers = [live for live in self._subscribers if live() is not None]
+            self._subscribers.append(ref)
+
+    def unsubscribe(self, callback: Callable[[PortfolioSnapshot], None]):
+        with self._lock:
+            self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
+
+    def start_watcher(self) -> bool:
+        """Reload on inotify/FSEvents notifications when watchdog is installed"""
+        if self._observer is not None:
+            return True
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info("watchdog not installed, relying on mtime polling for data.json")
+            return False
+
+        store = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = {getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')}
+                if store.data_path in {os.path.abspath(p) for p in paths if p}:
+                    store.maybe_reload()
+
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(_Handler(), os.path.dirname(self.data_path), recursive=False)
+        self._observer.start()
+        if not self._fork_hook and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_watcher)
+            self._fork_hook = True
+        logger.info("Watching data.json for changes")
+        return True
+
+    def _restart_watcher(self):
+        """The observer thread does not survive fork: a worker forked from a preloaded master starts its own"""
+        if self._observer is not None:
+            self._observer = None
+            self.start_watcher()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "watching": self._observer is not None,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store() -> PortfolioStore:
+    """The process-wide store shared by the services and routes"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PortfolioStore()
+                if os.getenv('PORTFOLIO_WATCH', 'false').lower() == 'true':
+                    _store.start_watcher()
+    return _store
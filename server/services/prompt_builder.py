@@ -0,0 +1,164 @@
+import os
+import logging
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# The fixed instructions come first and never change, so they are serialized
+# and counted once, and the upstream sees an identical prefix on every call
+SYSTEM_INSTRUCTIONS = """You are Aniru AI, Anirudh's personal assistant. You're here to help users learn about Anirudh and answer their questions in a natural, conversational way.
+
+PERSONALITY & BEHAVIOR:
+- You are helpful, friendly, and conversational - like a real AI assistant
+- Answer questions directly and specifically based on what the user asks
+- ALWAYS give the exact information requested - don't give generic responses
+- Use natural language and adapt to the user's tone and question type
+- Be enthusiastic about Anirudh's work when relevant
+- Keep responses focused on the user's specific question
+- Handle different types of interactions naturally based on the RELEVANT DATA context
+- Stay upbeat and engaging, never defensive or overly formal
+- NEVER give generic "I'm here to help" responses when asked for specific information
+
+FORMATTING RULES (use when listing multiple items):
+1. Use numbered lists (1. 2. 3.) for multiple projects/items
+2. Use bullet points (•) for details under each item
+3. Only include links if they exist in the portfolio data - never mention "no live demo available"
+4. **CRITICAL URL FORMATTING**: Format links EXACTLY like this for clickability:
+   - "Live Demo: https://example.com" (on same line, no bullets or line breaks)
+   - "GitHub: https://github.com/user/repo" (on same line, no bullets or line breaks)
+   - Never use bullet points (•) before URLs
+   - Never put URLs on separate lines
+5. Bold important names using **text**
+6. Add line breaks between sections for readability
+7. **CRITICAL**: NEVER add periods or punctuation after URLs - keep URLs clean for proper linking
+8. When providing URLs, ensure they end without any trailing punctuation
+
+RESPONSE GUIDELINES:
+- Use the RELEVANT DATA provided below to answer questions accurately
+- Answer naturally and conversationally based on the context and data provided
+- For project questions: List projects from the PROJECTS data with descriptions and links
+- For skill questions: Use the SKILLS data to mention specific technologies
+- For contact questions: Use the CONTACT data to provide connection information
+- For achievement questions: Use the ACHIEVEMENTS data to highlight accomplishments
+- For background questions: Use the BACKGROUND data for education and bio info
+- For farewell questions: Respond naturally and briefly based on the FAREWELL data context
+- **CRITICAL**: NEVER add periods or punctuation after URLs - keep URLs clean for proper linking
+- **URL FORMAT**: Always format URLs as "Live Demo: https://example.com" (same line, no bullets)
+- Always answer directly based on the provided data - don't give generic responses
+- Be conversational and adapt your response style to match the user's question type
+
+**EXAMPLE PROJECT FORMAT:**
+1. **ProjectName** - Brief description
+   Tech Stack: Technology1, Technology2, Technology3
+   Live Demo: https://example.com
+   GitHub: https://github.com/user/repo
+
+Remember: Use the actual data provided in the RELEVANT DATA section below to give accurate, specific answers."""
+
+DATA_HEADER = "\n\nRELEVANT DATA FOR THIS QUESTION:\n"
+
+# Separator between the sections of a relevant_data block
+SECTION_SEPARATOR = '\n\n'
+
+# Fixed per-message overhead of the chat format (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English and JSON text (about four characters a token)"""
+    return len(text) // 4 + 1
+
+
+class Prompt(NamedTuple):
+    messages: List[dict]
+    estimated_tokens: int
+    sections: int
+    dropped_sections: int
+    history_turns: int
+
+
+def conversation_turns(history: Sequence) -> List[list]:
+    """
+    Group session Turns into exchanges: a user message and the replies that
+    follow it. Replies whose question already left the session are dropped.
+    """
+    exchanges = []
+    for turn in history:
+        if turn.role == 'user':
+            exchanges.append([turn])
+        elif exchanges:
+            exchanges[-1].append(turn)
+    return exchanges
+
+
+class PromptBuilder:
+    """
+    Assembles chat messages under PROMPT_TOKEN_BUDGET estimated input tokens,
+    less PROMPT_BUDGET_HEADROOM (a fraction, default 0.15) because the
+    four-characters-a-token estimate undercounts JSON and non-English text.
+
+    The instructions and the question are always sent. Context sections are
+    added in the order given, which callers sort most relevant first, until
+    the budget is reached; the first section is kept even when it alone is
+    over budget, since an answer without data is worse than a long prompt.
+    Conversation history comes next after that first section, newest
+    exchange first and never split, so a long conversation loses its oldest
+    exchanges rather than the data. The note about question enhancement is
+    the first thing dropped.
+    """
+
+    def __init__(self, instructions: str = SYSTEM_INSTRUCTIONS, token_budget: Optional[int] = None,
+                 headroom: Optional[float] = None):
+        self.token_budget = token_budget or int(os.getenv('PROMPT_TOKEN_BUDGET', '1600'))
+        self.headroom = headroom if headroom is not None else float(os.getenv('PROMPT_BUDGET_HEADROOM', '0.15'))
+        # What the estimates may add up to
+        self.limit = int(self.token_budget * (1 - self.headroom))
+        self.instructions = instructions + DATA_HEADER
+        self.instruction_tokens = estimate_tokens(self.instructions) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, relevant_data: Union[str, Sequence[str]], enhanced_question: str, original_question: str,
+              history: Sequence = ()) -> Prompt:
+        """
+        `relevant_data` is the list of context sections (relevant_sections()
+        of the context index) or one preformatted block, which is kept or
+        dropped whole; `history` holds the earlier session Turns, oldest first.
+        """
+        used = self.instruction_tokens + estimate_tokens(enhanced_question) + MESSAGE_OVERHEAD_TOKENS
+
+        sections = [relevant_data] if isinstance(relevant_data, str) else list(relevant_data)
+        kept = [sections[0]]
+        used += estimate_tokens(sections[0]) + 1
+
+        turns = []
+        for exchange in reversed(conversation_turns(history)):
+            tokens = sum(estimate_tokens(turn.content) + MESSAGE_OVERHEAD_TOKENS for turn in exchange)
+            if used + tokens > self.limit:
+                break
+            turns[:0] = exchange
+            used += tokens
+
+        for section in sections[1:]:
+            tokens = estimate_tokens(section) + 1
+            if used + tokens > self.limit:
+                continue
+            kept.append(section)
+            used += tokens
+
+        messages = [{"role": "system", "content": self.instructions + SECTION_SEPARATOR.join(kept)}]
+        messages.extend(turn.as_message() for turn in turns)
+        messages.append({"role": "user", "content": enhanced_question})
+
+        # Add context about question enhancement if applicable
+        if enhanced_question != original_question:
+            context_msg = f"Note: The user originally asked '{original_question}' which was enhanced to '{enhanced_question}' for better context."
+            tokens = estimate_tokens(context_msg) + MESSAGE_OVERHEAD_TOKENS
+            if used + tokens <= self.limit:
+                messages.append({"role": "system", "content": context_msg})
+                used += tokens
+
+        dropped = len(sections) - len(kept)
+        if dropped:
+            logger.info("Prompt over budget: dropped %d of %d context sections", dropped, len(sections))
+        if len(turns) < len(history):
+            logger.info("Prompt over budget: kept %d of %d conversation turns", len(turns), len(history))
+        return Prompt(messages, used, len(kept), dropped, len(turns))
@@ -0,0 +1,247 @@
+import os
+import random
+import threading
+import logging
+from typing import List, NamedTuple, Optional
+
+from services.async_services import AsyncGroqService
+from services.circuit_breaker import CircuitBreaker
+from services.groq_service import GroqService
+from services.latency import AdaptiveTimeout, LatencyHistogram
+from services.metrics import PROVIDER_FAILOVERS
+
+logger = logging.getLogger(__name__)
+
+# Defaults for well-known OpenAI-compatible endpoints: (label, url, model)
+KNOWN_ENDPOINTS = {
+    'fireworks': ('Fireworks', "https://api.fireworks.ai/inference/v1/chat/completions",
+                  "accounts/fireworks/models/llama-v3p1-70b-instruct"),
+    'openai': ('OpenAI', "https://api.openai.com/v1/chat/completions", "gpt-4o-mini"),
+}
+
+ROUTING_POLICIES = ('least_latency', 'weighted', 'ordered')
+
+
+class Answer(NamedTuple):
+    text: str
+    provider: str
+
+
+class CompletionService(GroqService):
+    """
+    GroqService's prompt and request format sent to another OpenAI-compatible
+    chat-completions endpoint. Context retrieval and the prompt builder are
+    shared with the primary service, so every provider gets the same prompt.
+    """
+
+    def __init__(self, primary: GroqService, name: str, label: str, api_key: Optional[str],
+                 base_url: str, model: str, timeout: Optional[float] = None):
+        super().__init__(primary.store)
+        self.primary = primary
+        self.name = name
+        self.label = label
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout or primary.timeout
+        self.max_tokens = primary.max_tokens
+        self.prompt_builder = primary.prompt_builder
+
+    @property
+    def context_index(self):
+        return self.primary.context_index
+
+
+class AnswerProvider:
+    """
+    One answer endpoint with its circuit breaker and live health: an EWMA of
+    successful-call latency, an EWMA of the error rate (ROUTER_EWMA_ALPHA) and
+    a latency histogram driving its adaptive timeout and hedge delay.
+    """
+
+    def __init__(self, service: GroqService, breaker: CircuitBreaker, weight: float = 1.0):
+        self.name = service.name
+        self.service = service
+        self.async_service = AsyncGroqService(service)
+        self.breaker = breaker
+        self.weight = weight
+        self.alpha = float(os.getenv('ROUTER_EWMA_ALPHA', '0.2'))
+        self.latency = LatencyHistogram()
+        self.timeout = AdaptiveTimeout(self.latency, service.timeout)
+
+        self.latency_ewma_ms = None
+        self.error_ewma = 0.0
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return self.service.is_available()
+
+    def observe(self, latency_ms: float, ok: bool, timed_out: bool = False):
+        """Fold one finished attempt into the EWMAs and the adaptive timeout"""
+        with self._lock:
+            if ok:
+                self.latency.record(latency_ms)
+                self.timeout.record_success()
+            elif timed_out:
+                self.timeout.record_timeout(latency_ms)
+            self.calls += 1
+            self.failures += not ok
+            self.error_ewma += self.alpha * ((0.0 if ok else 1.0) - self.error_ewma)
+            if ok:
+                if self.latency_ewma_ms is None:
+                    self.latency_ewma_ms = latency_ms
+                else:
+                    self.latency_ewma_ms += self.alpha * (latency_ms - self.latency_ewma_ms)
+
+    def score(self, error_penalty: float) -> float:
+        """Expected cost of routing here in ms; 0 until the first success so new providers get tried"""
+        with self._lock:
+            if self.latency_ewma_ms is None:
+                return 0.0
+            return self.latency_ewma_ms * (1 + error_penalty * self.error_ewma)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "available": self.is_available(),
+                "model": self.service.model,
+                "weight": self.weight,
+                "breaker": self.breaker.state,
+                "latency_ewma_ms": round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+                "error_rate_ewma": round(self.error_ewma, 4),
+                "calls": self.calls,
+                "failures": self.failures,
+                "timeout_seconds": self.timeout.seconds(),
+            }
+
+
+class ProviderRouter:
+    """
+    Orders the answer providers for each request; the pipeline tries them in
+    that order and fails over on errors before using the rule-based chatbot.
+
+    ROUTER_POLICY picks the first choice:
+    - ordered (default): the configured order, failover only
+    - weighted: random, in proportion to weight / that cost
+    - least_latency: lowest latency EWMA, inflated by the error EWMA times
+      ROUTER_ERROR_PENALTY. The EWMA only learns from finished calls, so a
+      provider that starts stalling keeps winning until its calls time out;
+      its tail is the worst of the three when the primary degrades.
+
+    Providers whose breaker is not closed go last, open ones after half-open
+    ones. A ROUTER_EXPLORE share of requests starts at a random closed
+    provider so the EWMAs of providers that stopped winning stay current.
+    """
+
+    def __init__(self, providers: List[AnswerProvider], policy: Optional[str] = None):
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        self.providers = providers
+        self.policy = (policy or os.getenv('ROUTER_POLICY', 'ordered')).lower()
+        if self.policy not in ROUTING_POLICIES:
+            logger.warning(f"Unknown ROUTER_POLICY '{self.policy}', using ordered")
+            self.policy = 'ordered'
+        self.error_penalty = float(os.getenv('ROUTER_ERROR_PENALTY', '4'))
+        self.explore_rate = float(os.getenv('ROUTER_EXPLORE', '0.05'))
+        self.failovers = 0
+
+    @property
+    def primary(self) -> AnswerProvider:
+        return self.providers[0]
+
+    def get(self, name: str) -> Optional[AnswerProvider]:
+        return next((provider for provider in self.providers if provider.name == name), None)
+
+    def route(self) -> List[AnswerProvider]:
+        """Configured providers in the order to try them for one request"""
+        available = [provider for provider in self.providers if provider.is_available()]
+        if len(available) < 2:
+            return available
+
+        tiers = {'closed': [], 'half-open': [], 'open': []}
+        for provider in available:
+            tiers.get(provider.breaker.state, tiers['open']).append(provider)
+        healthy = tiers['closed']
+
+        if self.policy != 'ordered' and len(healthy) > 1:
+            costs = {provider.name: provider.score(self.error_penalty) for provider in healthy}
+            healthy.sort(key=lambda provider: costs[provider.name])
+            first = None
+            if self.explore_rate and random.random() < self.explore_rate:
+                first = random.choice(healthy)
+            elif self.policy == 'weighted':
+                weights = [provider.weight / max(costs[provider.name], 1.0) for provider in healthy]
+                first = random.choices(healthy, weights)[0]
+            if first is not None:
+                healthy.remove(first)
+                healthy.insert(0, first)
+
+        return healthy + tiers['half-open'] + tiers['open']
+
+    def first_attempt_timeout(self, provider: AnswerProvider) -> float:
+        """
+        Timeout for the first attempt of a request. A first choice that is not
+        the cheapest healthy provider (an exploration or weighted pick) gets no
+        longer than the cheapest one would, so trying it costs at most that
+        provider's tail before failing over.
+        """
+        timeout = provider.timeout.seconds()
+        known = [candidate for candidate in self.providers
+                 if candidate.latency_ewma_ms is not None and candidate.is_available() and candidate.breaker.state == 'closed']
+        if not known:
+            return timeout
+        best = min(known, key=lambda candidate: candidate.score(self.error_penalty))
+        return timeout if best is provider else min(timeout, best.timeout.seconds())
+
+    def record_failover(self, provider: AnswerProvider):
+        self.failovers += 1
+        PROVIDER_FAILOVERS.labels(provider.name).inc()
+        logger.info("Failing over to %s API", provider.service.label)
+
+    def stats(self) -> dict:
+        """Routing state for the health endpoint"""
+        return {
+            "policy": self.policy,
+            "failovers": self.failovers,
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
+
+
+def build_answer_router(groq_service: GroqService, groq_circuit_breaker: CircuitBreaker) -> ProviderRouter:
+    """
+    Router over ANSWER_PROVIDERS, a comma-separated preference order such as
+    "groq,fireworks". groq is the shared GroqService; any other name NAME is
+    an OpenAI-compatible endpoint configured by NAME_API_KEY, NAME_API_URL,
+    NAME_ANSWER_MODEL, NAME_TIMEOUT and NAME_WEIGHT (fireworks and openai
+    have default URLs and models). Each gets its own circuit breaker.
+    """
+    providers = []
+    for name in os.getenv('ANSWER_PROVIDERS', 'groq').split(','):
+        name = name.strip().lower()
+        if not name or any(provider.name == name for provider in providers):
+            continue
+        prefix = name.upper()
+        weight = float(os.getenv(f'{prefix}_WEIGHT', '1'))
+        if name == 'groq':
+            providers.append(AnswerProvider(groq_service, groq_circuit_breaker, weight))
+            continue
+
+        label, default_url, default_model = KNOWN_ENDPOINTS.get(name, (name.capitalize(), None, None))
+        base_url = os.getenv(f'{prefix}_API_URL', default_url)
+        model = os.getenv(f'{prefix}_ANSWER_MODEL', default_model)
+        if not base_url or not model:
+            logger.warning(f"Answer provider '{name}' needs {prefix}_API_URL and {prefix}_ANSWER_MODEL, skipping it")
+            continue
+        timeout = os.getenv(f'{prefix}_TIMEOUT')
+        service = CompletionService(groq_service, name, label, os.getenv(f'{prefix}_API_KEY'), base_url, model,
+                                    float(timeout) if timeout else None)
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, name=f'{name}_answer')
+        providers.append(AnswerProvider(service, breaker, weight))
+
+    if not providers:
+        logger.warning("ANSWER_PROVIDERS names no usable provider, answering with Groq")
+        providers.append(AnswerProvider(groq_service, groq_circuit_breaker))
+    logger.info(f"Answer providers: {', '.join(provider.name for provider in providers)}")
+    return ProviderRouter(providers)
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from services.portfolio_store import PortfolioStore, get_portfolio_store
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', question.lower())).strip()
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of final chat payloads, keyed on the normalized question and
+    the data.json version. Entries are dropped as soon as data.json changes.
+
+    Near-duplicate matching (RESPONSE_CACHE_SIMILARITY) only considers cached
+    questions that `classify` puts in the same intent as the new one: word
+    overlap alone scores "his projects" and "his skills" at 0.6. Without a
+    classifier, or for questions in no particular intent, only exact
+    normalized keys hit.
+    """
+
+    def __init__(self, store: Optional[PortfolioStore] = None, classify: Optional[Callable[[str], str]] = None):
+        self.enabled = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+        self.ttl = float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+        # Jaccard similarity over question tokens; 0 disables near-duplicate matching
+        self.similarity_threshold = float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0'))
+        self.classify = classify
+
+        self.store = store or get_portfolio_store()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version = self.store.version
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_data_version(self):
+        """Drop every entry if the portfolio data changed since the last lookup (lock held)"""
+        version = self.store.version
+        if version != self._data_version:
+            logger.info("Portfolio data changed, invalidating response cache")
+            self._data_version = version
+            self._entries.clear()
+            self.invalidations += 1
+
+    def _near_matching(self) -> bool:
+        return self.similarity_threshold > 0 and self.classify is not None
+
+    def _intent(self, key: str) -> Optional[str]:
+        """The question's intent for near matching, or None when it must match exactly"""
+        if not self._near_matching() or not key:
+            return None
+        intent = self.classify(key)
+        return intent if intent != 'default' else None
+
+    def _find_similar(self, tokens: frozenset, intent: str, now: float) -> Optional[str]:
+        best_key, best_score = None, self.similarity_threshold
+        for key, (entry_tokens, _, expires_at, entry_intent) in self._entries.items():
+            if expires_at < now or not entry_tokens or entry_intent != intent:
+                continue
+            score = len(tokens & entry_tokens) / len(tokens | entry_tokens)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(self, question: str) -> Optional[dict]:
+        """Return the cached payload for a question, or None"""
+        if not self.enabled:
+            return None
+
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            self._check_data_version()
+            entry = self._entries.get(key)
+            near = False
+            intent = self._intent(key) if entry is None else None
+            if intent is not None:
+                similar_key = self._find_similar(frozenset(key.split()), intent, now)
+                if similar_key is not None:
+                    key, entry, near = similar_key, self._entries[similar_key], True
+
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] < now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if near:
+                self.near_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, question: str, payload: dict):
+        """Store a payload for a question"""
+        if not self.enabled:
+            return
+
+        key = normalize_question(question)
+        if not key:
+            return
+        now = time.monotonic()
+        intent = self._intent(key)
+        with self._lock:
+            self._check_data_version()
+            self._entries[key] = (frozenset(key.split()), payload, now + self.ttl, intent)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "data_version": self._data_version,
+            }
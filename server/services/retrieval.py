@@ -0,0 +1,346 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from services.context_index import CONTACT_INFO, _compact, _github_url
+from services.intent_classifier import hashed_ngram_indices
+from services.prompt_builder import SECTION_SEPARATOR, estimate_tokens
+
+try:
+    import numpy as np
+except ImportError:  # Hashed embeddings are optional; BM25 alone still works
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Prompt heading per section
+SECTION_LABELS = {
+    'projects': 'PROJECTS',
+    'skills': 'SKILLS',
+    'certifications': 'CERTIFICATIONS',
+    'background': 'BACKGROUND',
+    'achievements': 'ACHIEVEMENTS',
+    'contact': 'CONTACT',
+    'farewell': 'FAREWELL',
+}
+
+# Sections rendered as a JSON list; the others merge their chunks into one object
+LIST_SECTIONS = {'projects', 'certifications'}
+
+# Words people use for a section that its data rarely contains ("what has he
+# built" should reach the projects even though no project says "built"). A
+# hit adds SECTION_WEIGHT to every chunk of the section on top of BM25.
+SECTION_TERMS = {
+    'projects': "projects portfolio built build developed created made apps applications work repo github",
+    'skills': "skills technologies tech stack programming languages frameworks tools expertise know",
+    'certifications': "certifications certificates certified courses",
+    'background': "background education degree university college study experience bio",
+    'achievements': "achievements accomplishments leetcode hackathons contests competitive",
+    'contact': "contact email phone reach connect linkedin hire social",
+    'farewell': "bye goodbye farewell later thanks thank cya",
+}
+SECTION_WEIGHT = 1.0
+
+STOP_WORDS = frozenset("""
+a an the and or of to in on at for with by from as is are was were be been it its this that these those
+he his him she her they them i me my you your we our what which who whom how when where why does did do
+has have had can could would should will about tell show give list any some all more please anirudh
+use used using take now right today
+""".split())
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, lightly stemmed content words"""
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def _flatten(value) -> str:
+    """Every string and number in a JSON value, keys excluded"""
+    if isinstance(value, dict):
+        return ' '.join(_flatten(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_flatten(item) for item in value)
+    return str(value)
+
+
+class Chunk(NamedTuple):
+    section: str
+    key: str
+    payload: object
+    text: str   # what BM25 indexes
+    json: str   # what the prompt gets, serialized once
+    tokens: int
+
+
+def _chunk(section: str, key: str, payload, extra: str = '') -> Chunk:
+    text = ' '.join((key.replace('_', ' '), _flatten(payload), extra))
+    json_text = _compact(payload)
+    return Chunk(section, key, payload, text, json_text, estimate_tokens(json_text))
+
+
+def build_chunks(data: dict) -> List[Chunk]:
+    """Split data.json into small, self-contained prompt chunks"""
+    chunks = []
+
+    for project in data.get('projects', []):
+        project = dict(project)
+        github_url = _github_url(project.get('name', ''))
+        if github_url:
+            project['github_url'] = github_url
+        chunks.append(_chunk('projects', project.get('name', ''), project))
+
+    for name, values in data.get('skills', {}).items():
+        chunks.append(_chunk('skills', name, {name: values}))
+    coding_profile = data.get('coding_profile', {})
+    for name, details in coding_profile.get('programming_languages', {}).items():
+        chunks.append(_chunk('skills', name, {name: details}, 'language'))
+    for name, details in coding_profile.get('development_areas', {}).items():
+        # Suffixed so they do not collide with the skill lists of the same name
+        chunks.append(_chunk('skills', name, {f"{name}_experience": details}))
+
+    for certification in data.get('certifications', []):
+        chunks.append(_chunk('certifications', certification.get('title', ''), certification))
+
+    profile = data.get('profile')
+    if profile is not None:
+        chunks.append(_chunk('background', 'education', {
+            'education': profile.get('education', {}),
+            'title': profile.get('title', '')
+        }, 'college university'))
+        chunks.append(_chunk('background', 'bio', {'bio': profile.get('bio', '')}, 'about who'))
+    for name in ('coursework', 'expertise_areas', 'current_focus', 'interests'):
+        if name in data:
+            chunks.append(_chunk('background', name, {name: data[name]}))
+
+    achievements = data.get('achievements', {})
+    if 'leetcode' in achievements:
+        leetcode = achievements['leetcode']
+        chunks.append(_chunk('achievements', 'leetcode', {'leetcode': {
+            'problems_solved': leetcode.get('problems_solved'),
+            'contest_rating': leetcode.get('contest_rating'),
+            'global_ranking': leetcode.get('global_ranking'),
+            'profile_url': leetcode.get('profile_url')
+        }}, 'problems solved dsa algorithms'))
+    if 'hackathons' in achievements:
+        chunks.append(_chunk('achievements', 'hackathons', {'hackathons': achievements['hackathons'][:2]}))
+
+    chunks.append(_chunk('contact', 'contact', CONTACT_INFO))
+    chunks.append(_chunk('farewell', 'farewell', {
+        'message_type': 'farewell',
+        'response_style': 'brief and friendly'
+    }))
+    return chunks
+
+
+class BM25Index:
+    """
+    Okapi BM25 over tokenized documents. Each posting stores its final term
+    weight, so a query is a handful of dict lookups and additions.
+    """
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.2, b: float = 0.75):
+        self.size = len(documents)
+        lengths = [len(tokens) for tokens in documents]
+        average = (sum(lengths) / self.size) if self.size else 1.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, tokens in enumerate(documents):
+            for term, frequency in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+        self.weights: Dict[str, List[Tuple[int, float]]] = {}
+        for term, docs in postings.items():
+            idf = math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.weights[term] = [
+                (doc_id, idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * lengths[doc_id] / average)))
+                for doc_id, frequency in docs
+            ]
+
+    def scores(self, query_tokens: Sequence[str]) -> List[float]:
+        scores = [0.0] * self.size
+        for term in set(query_tokens):
+            for doc_id, weight in self.weights.get(term, ()):
+                scores[doc_id] += weight
+        return scores
+
+
+class HashedTermEmbeddings:
+    """
+    CPU-only vectors for the index vocabulary: TF-IDF over hashed character
+    n-grams, L2 normalized. A query word BM25 has never seen ("flsk",
+    "hackaton") is replaced by its nearest vocabulary term, so typos still
+    retrieve. Only unknown words are embedded; the common path never runs it.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], dimensions: int = 1024, ngram_range=(2, 3),
+                 min_similarity: float = 0.5):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.min_similarity = min_similarity
+        self.terms = list(vocabulary)
+        counts = np.zeros((len(self.terms), dimensions), dtype=np.float32)
+        for row, term in enumerate(self.terms):
+            np.add.at(counts[row], hashed_ngram_indices(term, dimensions, ngram_range), 1.0)
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(self.terms)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        vectors = counts * self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        # (dimensions, terms), so a query word gathers only the rows it touches
+        self._rows = np.ascontiguousarray((vectors / norms).T)
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def nearest(self, word: str) -> Optional[str]:
+        """Closest vocabulary term, or None when nothing is similar enough"""
+        if word in self._cache:
+            return self._cache[word]
+        if len(self._cache) >= 4096:
+            self._cache.clear()
+        self._cache[word] = term = self._nearest(word)
+        return term
+
+    def _nearest(self, word: str) -> Optional[str]:
+        counts = Counter(hashed_ngram_indices(word, self.dimensions, self.ngram_range))
+        if not counts or not self.terms:
+            return None
+        indices = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[indices]
+        similarities = weights @ self._rows[indices] / np.sqrt(weights @ weights)
+        best = int(similarities.argmax())
+        return self.terms[best] if similarities[best] >= self.min_similarity else None
+
+
+class PortfolioRetriever:
+    """
+    Prompt context chosen by retrieval instead of keyword lists: data.json is
+    split into chunks (one per project, skill group, certification, ...) and
+    ranked by BM25 plus a boost for the section a question names. With NumPy
+    installed, unknown query words are mapped to their nearest indexed term
+    by hashed embeddings first (RETRIEVAL_EMBEDDINGS). The best
+    RETRIEVAL_TOP_K chunks that fit RETRIEVAL_TOKEN_BUDGET are rendered under
+    the section headings the system prompt refers to.
+    """
+
+    def __init__(self, portfolio_data: dict, top_k: Optional[int] = None, token_budget: Optional[int] = None,
+                 use_embeddings: Optional[bool] = None):
+        self.top_k = top_k or int(os.getenv('RETRIEVAL_TOP_K', '6'))
+        self.token_budget = token_budget or int(os.getenv('RETRIEVAL_TOKEN_BUDGET', '700'))
+        self.min_ratio = float(os.getenv('RETRIEVAL_MIN_RATIO', '0.3'))
+        if use_embeddings is None:
+            use_embeddings = os.getenv('RETRIEVAL_EMBEDDINGS', 'true').lower() == 'true'
+
+        data = portfolio_data or {}
+        self.chunks = build_chunks(data) if data else []
+        self._positions = {id(chunk): i for i, chunk in enumerate(self.chunks)}
+        self.bm25 = BM25Index([tokenize(chunk.text) for chunk in self.chunks])
+        self._section_terms: Dict[str, set] = {}
+        for section, terms in SECTION_TERMS.items():
+            for term in tokenize(terms):
+                self._section_terms.setdefault(term, set()).add(section)
+
+        self.embeddings = None
+        if use_embeddings and self.chunks:
+            if np is not None:
+                vocabulary = set(self.bm25.weights) | set(self._section_terms)
+                self.embeddings = HashedTermEmbeddings(sorted(term for term in vocabulary if len(term) > 2))
+            else:
+                logger.info("NumPy not installed, retrieval uses BM25 only")
+
+        profile = data.get('profile')
+        self.default = None
+        if profile is not None:
+            self.default = "PROFILE: " + _compact({
+                'name': profile.get('name'),
+                'title': profile.get('title'),
+                'bio': profile.get('bio', '')[:200] + '...'  # Truncate long bio
+            })
+
+    def search(self, question: str, k: Optional[int] = None) -> List[Tuple[Chunk, float]]:
+        """Chunks relevant to the question with their scores, best first"""
+        if not self.chunks:
+            return []
+        tokens = tokenize(question)
+        if self.embeddings is not None:
+            tokens = [self._known(token) for token in tokens]
+        scores = self.bm25.scores(tokens)
+        best = max(scores)
+        if best > 0:
+            scores = [score / best for score in scores]
+
+        sections = set()
+        for token in tokens:
+            sections.update(self._section_terms.get(token, ()))
+        if sections:
+            scores = [score + SECTION_WEIGHT if chunk.section in sections else score
+                      for chunk, score in zip(self.chunks, scores)]
+
+        top = max(scores)
+        if top <= 0:
+            return []
+        ranked = sorted(
+            ((chunk, score) for chunk, score in zip(self.chunks, scores) if score >= top * self.min_ratio),
+            key=lambda item: -item[1]
+        )
+        return ranked[:k or self.top_k]
+
+    def _known(self, token: str) -> str:
+        if token in self.bm25.weights or token in self._section_terms or len(token) < 4:
+            return token
+        return self.embeddings.nearest(token) or token
+
+    def select(self, question: str) -> List[Chunk]:
+        """Top chunks that fit the token budget, best first"""
+        selected, used = [], 0
+        for chunk, _ in self.search(question):
+            if used + chunk.tokens > self.token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+        return selected
+
+    def relevant_sections(self, question_lower: str) -> List[str]:
+        """
+        Relevant portfolio context for a question; same contract as
+        PortfolioContextIndex. Sections come most relevant first so the
+        prompt builder trims the least relevant ones; chunks inside a
+        section keep their data.json order.
+        """
+        if not self.chunks:
+            return ["No portfolio data available."]
+
+        by_section: Dict[str, List[Chunk]] = {}
+        for chunk in self.select(question_lower):
+            by_section.setdefault(chunk.section, []).append(chunk)
+
+        sections = []
+        for section, chunks in by_section.items():
+            chunks.sort(key=lambda chunk: self._positions[id(chunk)])
+            label = SECTION_LABELS[section]
+            if section in LIST_SECTIONS:
+                body = '[' + ','.join(chunk.json for chunk in chunks) + ']'
+            else:
+                # Chunk payloads are objects with distinct keys: splice them into one
+                body = '{' + ','.join(chunk.json[1:-1] for chunk in chunks) + '}'
+            sections.append(f"{label}: {body}")
+
+        if not sections and self.default:
+            sections.append(self.default)
+
+        return sections or ["Basic portfolio information available."]
+
+    def relevant_data(self, question_lower: str) -> str:
+        """relevant_sections() as one block"""
+        return SECTION_SEPARATOR.join(self.relevant_sections(question_lower))
@@ -1,33 +1,27 @@
-import json
-import os
 import re
 import logging
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from services.portfolio_store import PortfolioSnapshot, PortfolioStore, get_portfolio_store
+from services.intent_classifier import IntentClassifier
 
 logger = logging.getLogger(__name__)
 
 class RuleBasedChatbot:
-    def __init__(self):
-        self.portfolio_data = self._load_portfolio_data()
+    def __init__(self, store: Optional[PortfolioStore] = None):
+        self.store = store or get_portfolio_store()
         self.responses = self._initialize_responses()
+        self.classifier = IntentClassifier()
+        # (data version, intent -> answer); rendered on load and on every reload
+        self._answers = (None, None)
+        self._on_reload(self.store.snapshot)
+        self.store.subscribe(self._on_reload)
         
-    def _load_portfolio_data(self) -> dict:
-        """Load portfolio data from data.json"""
-        try:
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'data.json')
-            with open(data_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                logger.info("Portfolio data loaded for rule-based chatbot")
-                return data
-        except FileNotFoundError:
-            logger.warning("data.json not found for rule-based chatbot")
-            return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing data.json in rule-based chatbot: {str(e)}")
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading portfolio data in rule-based chatbot: {str(e)}")
-            return {}
+    @property
+    def portfolio_data(self) -> dict:
+        """Current portfolio data from the shared store"""
+        return self.store.data
     
     def _initialize_responses(self) -> Dict[str, List[str]]:
         """Initialize response patterns and templates"""
@@ -71,15 +65,15 @@ class RuleBasedChatbot:
             ]
         }
     
-    def _extract_portfolio_info(self, category: str) -> str:
+    def _extract_portfolio_info(self, category: str, portfolio_data: dict) -> str:
         """Extract specific information from portfolio data with bullet point formatting"""
         try:
-            if not self.portfolio_data:
+            if not portfolio_data:
                 return "I don't have detailed portfolio information available at the moment."
             
             # Handle different data structures in portfolio_data
-            if category == 'skills' and 'skills' in self.portfolio_data:
-                skills = self.portfolio_data['skills']
+            if category == 'skills' and 'skills' in portfolio_data:
+                skills = portfolio_data['skills']
                 if isinstance(skills, list):
                     return f"I'd be happy to share Anirudh's technical expertise. Here are his key skills:\n\n• {chr(10).join([f'**{skill}**' for skill in skills])}\n\nThese skills demonstrate Anirudh's comprehensive knowledge across multiple domains. Would you like to know more about his experience with any of these technologies?"
                 elif isinstance(skills, dict):
@@ -93,8 +87,8 @@ class RuleBasedChatbot:
                     skill_text.append("\nThis diverse skill set enables Anirudh to work on various types of projects and adapt to different technological requirements. Feel free to ask about his experience with any specific technology!")
                     return "\n".join(skill_text)
             
-            elif category == 'projects' and 'projects' in self.portfolio_data:
-                projects = self.portfolio_data['projects']
+            elif category == 'projects' and 'projects' in portfolio_data:
+                projects = portfolio_data['projects']
                 if isinstance(projects, list):
                     project_info = ["Here are Anirudh's key projects:\n"]
                     
@@ -121,8 +115,8 @@ class RuleBasedChatbot:
                     
                     return "\n\n".join(project_info)
             
-            elif category == 'experience' and 'experience' in self.portfolio_data:
-                experience = self.portfolio_data['experience']
+            elif category == 'experience' and 'experience' in portfolio_data:
+                experience = portfolio_data['experience']
                 if isinstance(experience, list):
                     exp_info = ["Anirudh's professional experience:\n"]
                     for i, exp in enumerate(experience, 1):
@@ -142,8 +136,8 @@ class RuleBasedChatbot:
                             exp_info.append(f"{i}. {exp}")
                     return "\n\n".join(exp_info)
             
-            elif category == 'contact' and 'contact' in self.portfolio_data:
-                contact = self.portfolio_data['contact']
+            elif category == 'contact' and 'contact' in portfolio_data:
+                contact = portfolio_data['contact']
                 if isinstance(contact, dict):
                     contact_info = ["Here's how to contact Anirudh:\n"]
                     for key, value in contact.items():
@@ -167,38 +161,83 @@ class RuleBasedChatbot:
             return f"I have information about Anirudh's {category}, but I'm having trouble accessing it right now. Please try asking in a different way!"
     
     def _classify_intent(self, message: str) -> str:
-        """Classify user intent based on keywords"""
-        message_lower = message.lower()
-        
-        # Greeting patterns
-        if any(word in message_lower for word in ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon']):
-            return 'greeting'
-        
-        # Skills patterns
-        if any(word in message_lower for word in ['skill', 'technology', 'programming', 'languages', 'frameworks', 'tools', 'technical', 'expertise']):
-            return 'skills'
-        
-        # Projects patterns
-        if any(word in message_lower for word in ['project', 'projects', 'work', 'portfolio', 'built', 'created', 'developed', 'github', 'show me his']):
-            return 'projects'
-        
-        # Experience patterns
-        if any(word in message_lower for word in ['experience', 'job', 'career', 'work history', 'employment', 'professional']):
-            return 'experience'
+        """Classify user intent with the compiled keyword / n-gram classifier"""
+        return self.classifier.classify(message)[0]
+    
+    def classify_with_confidence(self, message: str) -> Tuple[str, float]:
+        """
+        Classify intent and estimate how sure we are: a short message that hits
+        exactly one intent scores 1.0, ambiguous or long messages score lower.
+        """
+        intent, confidence = self.classifier.classify(message)
+        if len(message.split()) > 8:
+            # Long questions carry detail that the enhancement step may use
+            confidence *= 0.5
+        return intent, confidence
+    
+    def _render_answer(self, intent: str, portfolio_data: dict) -> str:
+        """Full rule-based answer for one intent"""
+        # Get base response template with fallback
+        response_templates = self.responses.get(intent, self.responses.get('default', [
+            "I'm here to help you learn more about Anirudh. What would you like to know?"
+        ]))
         
-        # Contact patterns
-        if any(word in message_lower for word in ['contact', 'email', 'phone', 'reach', 'connect', 'linkedin', 'social']):
-            return 'contact'
+        if not response_templates:
+            response_templates = ["I'm here to help you learn about Anirudh's professional background."]
         
-        # Education patterns
-        if any(word in message_lower for word in ['education', 'degree', 'university', 'college', 'study', 'academic']):
-            return 'education'
+        base_response = response_templates[0]  # Use first template
         
-        # About patterns
-        if any(word in message_lower for word in ['about', 'who is', 'tell me', 'background', 'bio', 'story']):
-            return 'about'
+        # Add portfolio-specific information if available
+        if intent in ['skills', 'projects', 'experience', 'contact'] and portfolio_data:
+            try:
+                portfolio_info = self._extract_portfolio_info(intent, portfolio_data)
+                response = f"{base_response}\n\n{portfolio_info}"
+            except Exception as e:
+                logger.warning(f"Failed to extract portfolio info for {intent}: {str(e)}")
+                # Provide basic information as fallback
+                if intent == 'contact':
+                    response = f"{base_response}\n\nYou can reach Anirudh at:\n• Email: anirudh200503@gmail.com\n• LinkedIn: https://www.linkedin.com/in/anirudh-t-b5b26a2aa/\n• GitHub: https://github.com/anirudh-pedro"
+                elif intent == 'skills':
+                    response = f"{base_response}\n\nAnirudh specializes in:\n• Programming: C++, Python, JavaScript\n• Web Development: React, Node.js, Express\n• Database: MongoDB, MySQL\n• Areas: Data Structures, Algorithms, System Design"
+                elif intent == 'projects':
+                    response = f"{base_response}\n\nAnirudh has worked on various projects including web applications, chatbots, and data analysis tools. You can find his work on GitHub: https://github.com/anirudh-pedro"
+                else:
+                    response = base_response
+        else:
+            response = base_response
+            
+            # Add helpful navigation for default/unknown intents
+            if intent == 'default':
+                response += "\n\nI can help you learn about:"
+                response += "\n• His technical skills and expertise"
+                response += "\n• Projects he's worked on"
+                response += "\n• Professional experience"
+                response += "\n• How to contact him"
+                response += "\n\nWhat would you like to know more about?"
         
-        return 'default'
+        return response
+    
+    def _render_answers(self, snapshot: PortfolioSnapshot) -> Mapping[str, str]:
+        """Render every intent's answer for one data version into a read-only table"""
+        answers = {intent: self._render_answer(intent, snapshot.data) for intent in self.responses}
+        logger.info(f"Rendered {len(answers)} rule-based answers for data version {snapshot.version}")
+        return MappingProxyType(answers)
+    
+    def _on_reload(self, snapshot: PortfolioSnapshot):
+        self._answers = (snapshot.version, self._render_answers(snapshot))
+    
+    def versioned_answers(self) -> Tuple[str, Mapping[str, str]]:
+        """(data version, pre-rendered answers) for the current data version"""
+        snapshot = self.store.snapshot
+        current = self._answers
+        if current[0] != snapshot.version:
+            current = self._answers = (snapshot.version, self._render_answers(snapshot))
+        return current
+
+    @property
+    def answers(self) -> Mapping[str, str]:
+        """Pre-rendered answers for the current data version"""
+        return self.versioned_answers()[1]
     
     def get_response(self, user_message: str) -> str:
         """Generate response based on rule-based logic with enhanced error handling"""
@@ -208,51 +247,16 @@ class RuleBasedChatbot:
                 return "Hello! I'm Aniru AI, Anirudh's personal assistant. How can I help you learn more about his portfolio and expertise?"
             
             user_message = user_message.strip()
-            logger.info(f"Rule-based chatbot processing: {user_message}")
+            logger.debug("Rule-based chatbot processing: %s", user_message)
             
             # Classify the intent
             intent = self._classify_intent(user_message)
-            logger.info(f"Classified intent: {intent}")
-            
-            # Get base response template with fallback
-            response_templates = self.responses.get(intent, self.responses.get('default', [
-                "I'm here to help you learn more about Anirudh. What would you like to know?"
-            ]))
-            
-            if not response_templates:
-                response_templates = ["I'm here to help you learn about Anirudh's professional background."]
-            
-            base_response = response_templates[0]  # Use first template
+            logger.debug("Classified intent: %s", intent)
             
-            # Add portfolio-specific information if available
-            if intent in ['skills', 'projects', 'experience', 'contact'] and self.portfolio_data:
-                try:
-                    portfolio_info = self._extract_portfolio_info(intent)
-                    response = f"{base_response}\n\n{portfolio_info}"
-                except Exception as e:
-                    logger.warning(f"Failed to extract portfolio info for {intent}: {str(e)}")
-                    # Provide basic information as fallback
-                    if intent == 'contact':
-                        response = f"{base_response}\n\nYou can reach Anirudh at:\n• Email: anirudh200503@gmail.com\n• LinkedIn: https://www.linkedin.com/in/anirudh-t-b5b26a2aa/\n• GitHub: https://github.com/anirudh-pedro"
-                    elif intent == 'skills':
-                        response = f"{base_response}\n\nAnirudh specializes in:\n• Programming: C++, Python, JavaScript\n• Web Development: React, Node.js, Express\n• Database: MongoDB, MySQL\n• Areas: Data Structures, Algorithms, System Design"
-                    elif intent == 'projects':
-                        response = f"{base_response}\n\nAnirudh has worked on various projects including web applications, chatbots, and data analysis tools. You can find his work on GitHub: https://github.com/anirudh-pedro"
-                    else:
-                        response = base_response
-            else:
-                response = base_response
-                
-                # Add helpful navigation for default/unknown intents
-                if intent == 'default':
-                    response += "\n\nI can help you learn about:"
-                    response += "\n• His technical skills and expertise"
-                    response += "\n• Projects he's worked on"
-                    response += "\n• Professional experience"
-                    response += "\n• How to contact him"
-                    response += "\n\nWhat would you like to know more about?"
+            answers = self.answers
+            response = answers.get(intent) or answers['default']
             
-            logger.info("Rule-based response generated successfully")
+            logger.debug("Rule-based response generated successfully")
             return response
             
         except Exception as e:
@@ -0,0 +1,290 @@
+import abc
+import os
+import time
+import secrets
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict, deque
+from contextlib import closing
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SESSION_ID_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def valid_session_id(session_id) -> bool:
+    return isinstance(session_id, str) and 8 <= len(session_id) <= 64 and set(session_id) <= _SESSION_ID_CHARS
+
+
+class Turn:
+    """One message of a conversation"""
+    __slots__ = ('role', 'content', 'created_at')
+
+    def __init__(self, role: str, content: str, created_at: float):
+        self.role = role
+        self.content = content
+        self.created_at = created_at
+
+    def as_message(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+
+class _Session:
+    __slots__ = ('turns', 'updated_at')
+
+    def __init__(self, max_turns: int, now: float):
+        self.turns = deque(maxlen=max_turns)
+        self.updated_at = now
+
+
+class SessionStore(abc.ABC):
+    """
+    Bounded conversation history per session id. Each session keeps the last
+    `max_exchanges` question/answer pairs (older ones fall out of a ring
+    buffer), messages longer than `max_chars` are truncated when stored, and
+    sessions idle for `ttl` seconds are evicted.
+    """
+
+    backend = 'none'
+    # True when calls do file I/O, so async callers should run them in a thread
+    blocking = False
+
+    def __init__(self, max_exchanges: int, max_chars: int, ttl: float):
+        self.max_turns = max_exchanges * 2
+        self.max_chars = max_chars
+        self.ttl = ttl
+        self.evictions = 0
+
+    def _truncate(self, content: str) -> str:
+        if len(content) <= self.max_chars:
+            return content
+        return content[:self.max_chars].rsplit(' ', 1)[0] + ' …'
+
+    @abc.abstractmethod
+    def history(self, session_id: str) -> List[Turn]:
+        """Stored turns, oldest first; empty for unknown or expired sessions"""
+
+    @abc.abstractmethod
+    def append(self, session_id: str, question: str, answer: str):
+        """Record one exchange, creating the session if needed"""
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Process-local sessions in an LRU of at most `max_sessions`. Each worker
+    process has its own, so with several gunicorn workers (WEB_CONCURRENCY
+    defaults to 2) a follow-up turn only finds its history if it reaches the
+    same worker: use a single worker, sticky routing, or the sqlite backend.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_exchanges: int, max_chars: int, ttl: float, max_sessions: int):
+        super().__init__(max_exchanges, max_chars, ttl)
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_idle(self, now: float):
+        """Drop expired sessions from the LRU end (lock held)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.updated_at < self.ttl:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def history(self, session_id: str) -> List[Turn]:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            if now - session.updated_at >= self.ttl:
+                del self._sessions[session_id]
+                self.evictions += 1
+                return []
+            return list(session.turns)
+
+    def append(self, session_id: str, question: str, answer: str):
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session.updated_at >= self.ttl:
+                # New, or expired but not evicted yet: start the conversation afresh
+                session = self._sessions[session_id] = _Session(self.max_turns, now)
+            self._sessions.move_to_end(session_id)
+            session.turns.append(Turn('user', self._truncate(question), now))
+            session.turns.append(Turn('assistant', self._truncate(answer), now))
+            session.updated_at = now
+            self._evict_idle(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "max_turns": self.max_turns,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions,
+            }
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in a local SQLite file, shared by every worker on the host and
+    kept across restarts. One connection per thread; WAL lets readers and the
+    single writer proceed together.
+    """
+
+    backend = 'sqlite'
+    blocking = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS session_turns (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            next_seq INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+    """
+
+    def __init__(self, path: str, max_exchanges: int, max_chars: int, ttl: float, sweep_interval: float = 60.0):
+        super().__init__(max_exchanges, max_chars, ttl)
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        # Not kept open: this may run in a preloading gunicorn master, and each
+        # worker opens its own connections after the fork
+        with closing(sqlite3.connect(self.path, timeout=5.0)) as connection:
+            connection.executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        # A connection opened before a gunicorn fork must not be used by the worker
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def history(self, session_id: str) -> List[Turn]:
+        connection = self._connection()
+        row = connection.execute('SELECT updated_at FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        if row is None or time.time() - row[0] >= self.ttl:
+            return []
+        rows = connection.execute(
+            'SELECT role, content, created_at FROM session_turns WHERE session_id = ? ORDER BY seq',
+            (session_id,)
+        ).fetchall()
+        return [Turn(role, content, created_at) for role, content, created_at in rows]
+
+    def append(self, session_id: str, question: str, answer: str):
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT next_seq, updated_at FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            seq = row[0] if row else 0
+            if row and now - row[1] >= self.ttl:
+                # Expired but not swept yet: start the conversation afresh
+                connection.execute('DELETE FROM session_turns WHERE session_id = ?', (session_id,))
+            connection.executemany(
+                'INSERT INTO session_turns (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(session_id, seq, 'user', self._truncate(question), now),
+                 (session_id, seq + 1, 'assistant', self._truncate(answer), now)]
+            )
+            # Ring buffer: only the newest max_turns rows survive
+            connection.execute('DELETE FROM session_turns WHERE session_id = ? AND seq < ?',
+                               (session_id, seq + 2 - self.max_turns))
+            connection.execute(
+                'INSERT INTO sessions (session_id, next_seq, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(session_id) DO UPDATE SET next_seq = excluded.next_seq, updated_at = excluded.updated_at',
+                (session_id, seq + 2, now)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self._evict_idle(now)
+
+    def _evict_idle(self, now: float):
+        connection = self._connection()
+        cutoff = now - self.ttl
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM session_turns WHERE session_id IN (SELECT session_id FROM sessions WHERE updated_at < ?)',
+                (cutoff,)
+            )
+            evicted = connection.execute('DELETE FROM sessions WHERE updated_at < ?', (cutoff,)).rowcount
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self.evictions += evicted
+
+    def stats(self) -> dict:
+        sessions = self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "sessions": sessions,
+            "max_turns": self.max_turns,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+        }
+
+
+def create_session_store() -> Optional[SessionStore]:
+    """
+    Session store from SESSION_STORE (off, memory or sqlite). The default is
+    memory for a single worker and sqlite when WEB_CONCURRENCY is above one,
+    so a follow-up finds its history whichever worker takes it. Exchanges
+    kept per session: SESSION_MAX_EXCHANGES; stored message length:
+    SESSION_MAX_CHARS; idle expiry: SESSION_TTL seconds; memory backend
+    size: SESSION_MAX_SESSIONS.
+    """
+    workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+    backend = os.getenv('SESSION_STORE', 'memory' if workers <= 1 else 'sqlite').lower()
+    max_exchanges = int(os.getenv('SESSION_MAX_EXCHANGES', '4'))
+    max_chars = int(os.getenv('SESSION_MAX_CHARS', '1200'))
+    ttl = float(os.getenv('SESSION_TTL', '1800'))
+
+    if backend == 'off':
+        return None
+    if backend == 'sqlite':
+        path = os.getenv('SESSION_DB_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'sessions.sqlite3'))
+        logger.info(f"Conversation sessions stored in SQLite at {path}")
+        return SqliteSessionStore(path, max_exchanges, max_chars, ttl)
+    if workers > 1:
+        logger.warning(f"In-memory sessions with {workers} workers: follow-ups reach a worker without their history "
+                       "unless routing is sticky; use SESSION_STORE=sqlite or a single worker")
+    return MemorySessionStore(max_exchanges, max_chars, ttl, int(os.getenv('SESSION_MAX_SESSIONS', '10000')))
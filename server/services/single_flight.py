@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent work: while a call for a key is in flight, later
+    callers with the same key wait for it and share its result (or error)
+    instead of starting their own. Nothing is kept once the call finishes;
+    repeat questions after that are the response cache's job.
+
+    do() serves threads and ado() coroutines; they track calls separately.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() once per in-flight key; returns (result, shared)"""
+        if not self.enabled:
+            return fn(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async variant of do(). The work runs as its own task, so it keeps
+        going for the waiting callers if the caller that started it is
+        cancelled (client disconnect).
+        """
+        if not self.enabled:
+            return await factory(), False
+
+        key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(factory())
+                task.add_done_callback(lambda done: self._forget(key, done))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        return await asyncio.shield(task), not leader
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        with self._lock:
+            self._tasks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint; `coalesced` are upstream pipelines saved"""
+        with self._lock:
+            in_flight = len(self._calls) + len(self._tasks)
+            total = self.executions + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "in_flight": in_flight,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, SERVER_DIR)
+
+from services.portfolio_store import PortfolioStore
+
+DATA_PATH = os.path.join(SERVER_DIR, 'data', 'data.json')
+
+
+class FakeClock:
+    """Stands in for a module's `time` so TTLs can be crossed without sleeping"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = perf_counter = time
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def portfolio_store(tmp_path):
+    """A store over a private copy of data.json, so a test can edit and reload it"""
+    path = tmp_path / 'data.json'
+    shutil.copy(DATA_PATH, path)
+    return PortfolioStore(str(path), check_interval=3600)
+
+
+@pytest.fixture(scope='session')
+def portfolio_data():
+    """The shipped data.json, parsed; read-only"""
+    with open(DATA_PATH, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import admission
+from services.admission import AdmissionController, ConcurrencyLimiter, TokenBucketLimiter, client_ip
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_token_bucket_allows_a_burst_then_refills(monkeypatch, clock):
+    monkeypatch.setattr(admission, 'time', clock)
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b")
+    clock.advance(0.5)
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    assert limiter.stats()["limited"] == 2
+
+
+def test_token_bucket_keeps_at_most_max_clients(monkeypatch, clock):
+    monkeypatch.setattr(admission, 'time', clock)
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.allow(client)
+    assert limiter.stats()["clients"] == 2
+    # "a" was evicted, so it starts again with a full bucket
+    assert limiter.allow("a")
+
+
+def test_proxy_header_is_only_trusted_when_configured():
+    assert client_ip("10.0.0.1", "203.0.113.7, 10.0.0.1") == "10.0.0.1"
+    assert client_ip("10.0.0.1", "203.0.113.7, 10.0.0.1", trust_proxy=True) == "203.0.113.7"
+
+
+def test_rate_limit_without_trusted_proxy_keys_by_peer(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_RPS', '1')
+    monkeypatch.delenv('TRUST_PROXY_HEADERS', raising=False)
+    controller = AdmissionController()
+    assert controller.rate_limiter.enabled
+    assert controller.client("10.0.0.1", "203.0.113.7") == "10.0.0.1"
+
+
+def test_upstream_cap_defaults_to_the_worker_threads(monkeypatch):
+    monkeypatch.delenv('UPSTREAM_MAX_CONCURRENCY', raising=False)
+    monkeypatch.setenv('GUNICORN_THREADS', '12')
+    assert AdmissionController().upstream.max_concurrent == 12
+
+
+def test_released_slot_is_handed_to_the_oldest_waiter():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=2, queue_timeout=5)
+    assert limiter.acquire()
+    order = []
+
+    def waiter(name):
+        assert limiter.acquire()
+        order.append(name)
+        limiter.release()
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(waiter, "first")
+        wait_for(lambda: limiter.queue_depth == 1)
+        second = pool.submit(waiter, "second")
+        wait_for(lambda: limiter.queue_depth == 2)
+        limiter.release()
+        first.result(5)
+        second.result(5)
+
+    assert order == ["first", "second"]
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["queue_depth"], stats["admitted"], stats["queued"]) == (0, 0, 3, 2)
+
+
+def test_full_queue_rejects_at_once():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=5)
+    assert limiter.acquire()
+    started = time.monotonic()
+    assert not limiter.acquire()
+    assert time.monotonic() - started < 1
+    assert limiter.stats()["queue_full"] == 1
+
+
+def test_waiter_gives_up_after_the_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    assert limiter.stats()["queue_timeouts"] == 1
+    assert limiter.queue_depth == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_zero_cap_admits_everyone():
+    limiter = ConcurrencyLimiter(max_concurrent=0, max_queue=0, queue_timeout=0)
+    assert all(limiter.acquire() for _ in range(100))
+    assert limiter.in_flight == 100
+
+
+def test_threads_hand_slots_to_coroutines_and_back():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=4, queue_timeout=5)
+
+    async def main():
+        assert limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        threading.Thread(target=limiter.release).start()
+        assert await asyncio.wait_for(waiter, 5)
+        assert limiter.in_flight == 1
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
+
+
+def test_async_waiter_times_out_and_cancellation_leaves_no_slot_behind():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+
+    async def main():
+        assert await limiter.aacquire()
+        assert not await limiter.aacquire()
+
+        limiter.queue_timeout = 5
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
+    assert limiter.stats()["queue_timeouts"] == 1
@@ -0,0 +1,133 @@
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def window_settings(monkeypatch, clock):
+    monkeypatch.setenv('CIRCUIT_WINDOW_SECONDS', '60')
+    monkeypatch.setenv('CIRCUIT_MIN_CALLS', '4')
+    monkeypatch.setenv('CIRCUIT_ERROR_RATE', '0.5')
+    monkeypatch.setenv('CIRCUIT_SLOW_CALL_MS', '0')
+    monkeypatch.delenv('CIRCUIT_BREAKER_STATE_DIR', raising=False)
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+def test_consecutive_failures_open_the_breaker(monkeypatch):
+    monkeypatch.setenv('CIRCUIT_MIN_CALLS', '100')
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.can_execute()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_error_rate_over_the_window_opens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=100, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_success()
+        breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+def test_calls_leave_the_window_after_it_rolls_over(clock):
+    breaker = CircuitBreaker(failure_threshold=100, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.advance(61)
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    assert breaker.stats()["window_calls"] == 2
+
+
+def test_slow_calls_open_the_breaker(monkeypatch):
+    monkeypatch.setenv('CIRCUIT_SLOW_CALL_MS', '1000')
+    monkeypatch.setenv('CIRCUIT_SLOW_CALL_RATE', '0.75')
+    breaker = CircuitBreaker(failure_threshold=100, reset_timeout=30)
+    for latency_ms in (1500, 1200, 100):
+        breaker.record_success(latency_ms)
+    assert breaker.state == 'closed'
+    breaker.record_success(2000)
+    assert breaker.state == 'open'
+
+
+def test_half_open_after_reset_timeout_and_closed_by_a_successful_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(29)
+    assert not breaker.can_execute()
+    clock.advance(2)
+    assert breaker.can_execute()
+    assert breaker.state == 'half-open'
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.stats()["window_calls"] == 0
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(31)
+    assert breaker.can_execute()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.can_execute()
+
+
+def test_half_open_admits_at_most_the_probe_limit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_max_calls=2)
+    open_breaker(breaker)
+    clock.advance(31)
+    assert breaker.can_execute()
+    assert breaker.can_execute()
+    assert not breaker.can_execute()
+    assert breaker.stats()["half_open_in_flight"] == 2
+
+    # One success frees its slot but the breaker needs both probes to close
+    breaker.record_success()
+    assert breaker.state == 'half-open'
+    assert breaker.can_execute()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_abandoned_probe_slots_are_released_after_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(31)
+    assert breaker.can_execute()
+    assert not breaker.can_execute()
+    clock.advance(31)
+    assert breaker.can_execute()
+
+
+def test_state_is_shared_through_the_state_dir(tmp_path, clock):
+    first = CircuitBreaker(failure_threshold=2, reset_timeout=30, name='groq', state_dir=str(tmp_path))
+    second = CircuitBreaker(failure_threshold=2, reset_timeout=30, name='groq', state_dir=str(tmp_path))
+    assert first.shared
+
+    first.record_failure()
+    second.record_failure()
+    assert first.state == 'open'
+    assert not second.can_execute()
+
+    clock.advance(31)
+    assert second.can_execute()
+    assert not first.can_execute()
+    first.record_success()
+    assert second.state == 'closed'
+    assert second.failure_count == 0
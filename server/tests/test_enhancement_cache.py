@@ -0,0 +1,59 @@
+import pytest
+
+from services import enhancement_cache
+from services.enhancement_cache import EnhancementCache
+
+
+@pytest.fixture
+def memory_cache(monkeypatch, clock):
+    monkeypatch.setenv('ENHANCEMENT_CACHE_MAX_ENTRIES', '2')
+    monkeypatch.setenv('ENHANCEMENT_CACHE_TTL', '60')
+    monkeypatch.delenv('ENHANCEMENT_CACHE_PATH', raising=False)
+    monkeypatch.setattr(enhancement_cache, 'time', clock)
+    return EnhancementCache()
+
+
+def test_rewrites_are_keyed_on_the_normalized_question(memory_cache):
+    memory_cache.set("His skills?", "What are Anirudh's technical skills?")
+    assert memory_cache.get("his   SKILLS") == "What are Anirudh's technical skills?"
+    assert "his skills" in memory_cache
+
+
+def test_least_recently_used_rewrite_is_evicted(memory_cache):
+    memory_cache.set("a", "A")
+    memory_cache.set("b", "B")
+    memory_cache.get("a")
+    memory_cache.set("c", "C")
+    assert memory_cache.get("b") is None
+    assert memory_cache.get("a") == "A"
+    assert memory_cache.stats()["evictions"] == 1
+
+
+def test_rewrites_expire(memory_cache, clock):
+    memory_cache.set("skills", "What are his skills?")
+    clock.advance(61)
+    assert memory_cache.get("skills") is None
+    assert "skills" not in memory_cache
+
+
+def test_persistent_store_is_shared_between_instances(monkeypatch, tmp_path):
+    monkeypatch.setenv('ENHANCEMENT_CACHE_PATH', str(tmp_path / 'enhancements.db'))
+    writer = EnhancementCache()
+    reader = EnhancementCache()
+    assert writer.persistent and reader.persistent
+
+    writer.set("projects", "Which projects has Anirudh built?")
+    assert reader.get("projects") == "Which projects has Anirudh built?"
+    assert reader.stats()["store_hits"] == 1
+    # Loaded at start-up by a fresh instance
+    assert EnhancementCache().stats()["entries"] == 1
+
+
+def test_expired_rows_are_not_loaded(monkeypatch, tmp_path, clock):
+    monkeypatch.setenv('ENHANCEMENT_CACHE_PATH', str(tmp_path / 'enhancements.db'))
+    monkeypatch.setattr(enhancement_cache, 'time', clock)
+    EnhancementCache().set("projects", "Which projects has Anirudh built?")
+    clock.advance(86401)
+    cache = EnhancementCache()
+    assert cache.stats()["entries"] == 0
+    assert cache.get("projects") is None
@@ -0,0 +1,97 @@
+import json
+import time
+
+import pytest
+
+from app import _stream_text
+from services.groq_service import GroqService
+from services.metrics import take_usage
+from services.sessions import Turn
+
+
+class FakeStreamResponse:
+    """The parts of a streaming requests.Response the SSE parser uses"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def close(self):
+        self.closed = True
+
+
+def chunk(content=None, **extra):
+    delta = {"content": content} if content is not None else {}
+    return "data: " + json.dumps({"choices": [{"delta": delta}], **extra})
+
+
+@pytest.fixture
+def groq(portfolio_store):
+    return GroqService(portfolio_store)
+
+
+def test_deltas_are_relayed_until_done(groq):
+    response = FakeStreamResponse([
+        ": keep-alive comment",
+        chunk(),
+        "",
+        chunk("Hello"),
+        chunk(" there"),
+        "data: [DONE]",
+        chunk("never read"),
+    ])
+    assert list(groq._iter_stream_deltas(response)) == ["Hello", " there"]
+    assert response.closed
+
+
+def test_usage_from_the_final_chunk_is_recorded(groq):
+    take_usage()
+    usage = {"prompt_tokens": 120, "completion_tokens": 7}
+    response = FakeStreamResponse([chunk("Hi"), chunk(x_groq={"usage": usage}), "data: [DONE]"])
+    list(groq._iter_stream_deltas(response))
+    assert take_usage() == usage
+
+
+def test_malformed_chunk_raises_and_closes(groq):
+    response = FakeStreamResponse([chunk("Hi"), "data: {not json"])
+    deltas = groq._iter_stream_deltas(response)
+    assert next(deltas) == "Hi"
+    with pytest.raises(Exception, match="Invalid stream format"):
+        next(deltas)
+    assert response.closed
+
+
+def test_streaming_request_carries_session_history(groq):
+    groq.api_key = 'test'
+    history = [Turn('user', "which projects has he built?", 0.0), Turn('assistant', "TypoMaster and more.", 0.0)]
+    _, payload = groq._build_request("tell me about the first one", "tell me about the first one",
+                                     stream=True, history=history)
+
+    assert payload["stream"] is True
+    contents = [message["content"] for message in payload["messages"]]
+    assert "which projects has he built?" in contents
+    assert "TypoMaster and more." in contents
+    assert payload["messages"][-1]["role"] == 'user'
+
+
+def parse_events(body):
+    events = []
+    for raw in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in raw.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_complete_answers_are_streamed_as_word_aligned_chunks():
+    text = "Anirudh builds full-stack apps with Python, React and C++ " * 4
+    events = parse_events(''.join(_stream_text({"source": "rule_based"}, text, time.perf_counter())))
+
+    assert events[0] == ('meta', {"source": "rule_based"})
+    assert events[-1][0] == 'done' and events[-1][1]["ttft_ms"] is not None
+    deltas = [data["delta"] for event, data in events[1:-1]]
+    assert all(event == 'token' for event, _ in events[1:-1])
+    assert ''.join(deltas) == text.rstrip()
+    assert all(not delta[-1].isspace() for delta in deltas)
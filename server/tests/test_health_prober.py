@@ -0,0 +1,122 @@
+import pytest
+import requests
+
+from services import health_prober
+from services.circuit_breaker import CircuitBreaker
+from services.health_prober import HealthProber, UpstreamProbe, probe_url
+
+
+class FakeService:
+    label = 'Groq'
+    base_url = 'https://api.example.com/openai/v1/chat/completions'
+
+    def __init__(self, api_key='key'):
+        self.api_key = api_key
+
+    def is_available(self):
+        return bool(self.api_key)
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """Answers model listings with `outcome`: a status code or an exception to raise"""
+
+    def __init__(self):
+        self.outcome = 200
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return FakeResponse(self.outcome)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(health_prober, 'get_session', lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.delenv('CIRCUIT_BREAKER_STATE_DIR', raising=False)
+    monkeypatch.setenv('CIRCUIT_MIN_CALLS', '100')
+    return CircuitBreaker(failure_threshold=2, reset_timeout=60, name='groq')
+
+
+def test_probe_url_lists_models():
+    assert probe_url(FakeService.base_url) == 'https://api.example.com/openai/v1/models'
+
+
+def test_successful_probes_stay_out_of_the_breaker_window(session, breaker):
+    probe = UpstreamProbe(FakeService(), breaker)
+    for _ in range(3):
+        probe.run(timeout=1)
+    assert session.urls == [probe.url] * 3
+    assert probe.last.reachable and probe.last.probes == 3
+    stats = breaker.stats()
+    assert (stats["window_calls"], stats["successes"], stats["allowed"]) == (0, 0, 0)
+
+
+@pytest.mark.parametrize('outcome', [requests.ConnectionError("refused"), 503])
+def test_unreachable_upstream_counts_as_a_failure(session, breaker, outcome):
+    session.outcome = outcome
+    probe = UpstreamProbe(FakeService(), breaker)
+    probe.run(timeout=1)
+    probe.run(timeout=1)
+    assert breaker.state == 'open'
+    assert probe.last.consecutive_failures == 2
+    assert probe.result()["status"] == 'error'
+
+
+def test_client_errors_do_not_touch_the_breaker(session, breaker):
+    session.outcome = 401
+    probe = UpstreamProbe(FakeService(), breaker)
+    probe.run(timeout=1)
+    probe.run(timeout=1)
+    assert breaker.state == 'closed'
+    assert breaker.stats()["failures"] == 0
+    assert probe.last.http_status == 401 and not probe.last.reachable
+
+
+def test_reachable_upstream_moves_an_open_breaker_to_half_open(session, breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    probe = UpstreamProbe(FakeService(), breaker)
+    probe.run(timeout=1)
+    assert breaker.state == 'half-open'
+    # The real call is the probe that closes it
+    assert breaker.can_execute()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_unconfigured_service_is_not_probed(session, breaker):
+    probe = UpstreamProbe(FakeService(api_key=None), breaker)
+    assert probe.result()["status"] == 'pending'
+    probe.run(timeout=1)
+    assert session.urls == []
+    assert probe.result()["message"] == "API key not configured"
+
+
+def test_results_are_whole_snapshots(session, breaker):
+    probe = UpstreamProbe(FakeService(), breaker)
+    prober = HealthProber([probe], interval=3600, timeout=1)
+    prober.probe_all()
+    before = probe.last
+    session.outcome = 503
+    prober.probe_all()
+    # The earlier result object is untouched; readers holding it see one probe
+    assert before.reachable and before.probes == 1
+    assert prober.results()['groq']["failures"] == 1
+    assert prober.stats()["rounds"] == 2
@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from flask import Flask, request
+
+from services import http_encoding
+from services.http_encoding import ResponseCompressor, TimedSnapshot, body_etag, body_tag, snapshot_response
+
+BODY = b'{"status": "healthy", "padding": "' + b'x' * 2000 + b'"}'
+
+
+@pytest.fixture
+def compressor(monkeypatch):
+    monkeypatch.setenv('COMPRESSION_MIN_BYTES', '1024')
+    return ResponseCompressor()
+
+
+def test_gzip_is_chosen_when_accepted(compressor):
+    assert compressor.choose('gzip, deflate', len(BODY)) in ('gzip', 'br')
+    assert compressor.choose('identity', len(BODY)) is None
+    assert compressor.choose('gzip;q=0', len(BODY)) is None
+    assert compressor.choose(None, len(BODY)) is None
+
+
+def test_small_bodies_are_sent_as_is(compressor):
+    assert compressor.encode(b'{}', 'gzip') == (b'{}', None)
+
+
+def test_gzip_output_is_deterministic(compressor, monkeypatch):
+    monkeypatch.setattr(compressor, 'encodings', ('gzip',))
+    body, encoding = compressor.encode(BODY, 'gzip')
+    assert encoding == 'gzip'
+    assert gzip.decompress(body) == BODY
+    assert compressor.encode(BODY, 'gzip')[0] == body
+    assert compressor.stats()["compressed"] == 2
+
+
+def test_only_textual_types_are_compressed(compressor):
+    assert compressor.is_compressible('application/json')
+    assert not compressor.is_compressible('text/event-stream')
+
+
+def test_snapshot_is_reused_until_its_ttl(monkeypatch, clock):
+    monkeypatch.setattr(http_encoding, 'time', clock)
+    snapshot = TimedSnapshot(ttl=2)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return BODY + str(len(builds)).encode()
+
+    first = snapshot.get(build)
+    assert snapshot.get(build) is first
+    assert first.tag == body_tag(first.body)
+    clock.advance(2.1)
+    second = snapshot.get(build)
+    assert len(builds) == 2
+    assert second.tag != first.tag
+
+
+@pytest.fixture
+def app(compressor):
+    app = Flask(__name__)
+    snapshot = TimedSnapshot(ttl=60)
+
+    @app.route('/health')
+    def health():
+        return snapshot_response(request, snapshot.get(lambda: BODY), 2, 'application/json')
+
+    app.after_request(lambda response: compressor.apply(response, request.headers.get('Accept-Encoding')))
+    return app
+
+
+def test_snapshot_response_carries_validators(app):
+    response = app.test_client().get('/health', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == body_etag(BODY)
+    assert response.headers['Content-Encoding'] in ('gzip', 'br')
+    assert response.cache_control.public and response.cache_control.max_age == 2
+    assert response.last_modified is not None
+
+
+def test_matching_etag_gets_an_empty_304_whatever_the_encoding(app):
+    client = app.test_client()
+    etag = client.get('/health', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = client.get('/health', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_stale_etag_gets_the_body(app):
+    response = app.test_client().get('/health', headers={'If-None-Match': 'W/"stale"'})
+    assert response.status_code == 200
+    assert response.get_data() == BODY
+
+
+def test_if_modified_since_is_honoured(app):
+    client = app.test_client()
+    last_modified = client.get('/health').headers['Last-Modified']
+    assert client.get('/health', headers={'If-Modified-Since': last_modified}).status_code == 304
@@ -0,0 +1,78 @@
+import pytest
+
+from services.intent_classifier import IntentClassifier, np
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return IntentClassifier()
+
+
+@pytest.fixture
+def keywords_only(monkeypatch):
+    monkeypatch.setenv('INTENT_NGRAM_ENABLED', 'false')
+    return IntentClassifier()
+
+
+@pytest.mark.parametrize('message, intent', [
+    ("hello", 'greeting'),
+    ("what are his skills?", 'skills'),
+    ("which programming languages does he know", 'skills'),
+    ("show me his projects", 'projects'),
+    ("what is his work experience", 'experience'),
+    ("has he done any internships", 'experience'),
+    ("how can i contact him", 'contact'),
+    ("which university does he attend", 'education'),
+    ("who is anirudh", 'about'),
+])
+def test_keywords(keywords_only, message, intent):
+    assert keywords_only.classify(message)[0] == intent
+
+
+def test_keywords_match_whole_words_only(keywords_only):
+    # "this" contains "hi", "network" contains "work"
+    assert keywords_only.classify("this is nice") == ('default', 0.0)
+    assert keywords_only.classify("which network protocols") == ('default', 0.0)
+
+
+def test_phrases_take_precedence_over_their_words(keywords_only):
+    assert keywords_only.classify("tell me about his work history")[0] == 'experience'
+
+
+def test_generic_intents_yield_to_specific_ones(keywords_only):
+    intent, confidence = keywords_only.classify("hi, what are his technical skills?")
+    assert intent == 'skills'
+    assert 0 < confidence < 1
+
+
+def test_blank_message_is_default(classifier):
+    assert classifier.classify("   ") == ('default', 0.0)
+    assert classifier.rank("") == []
+
+
+def test_repeated_classification_is_memoized_without_changing_the_result(monkeypatch):
+    monkeypatch.setenv('INTENT_CACHE_SIZE', '2')
+    classifier = IntentClassifier()
+    first = classifier.classify("what has he built")
+    assert classifier.classify("what has he built") == first
+    for message in ("a", "b", "c"):
+        classifier.classify(message)
+    assert len(classifier._recent) <= 2
+    assert classifier.classify("what has he built") == first
+
+
+def test_classify_many_matches_classify(monkeypatch):
+    monkeypatch.setenv('INTENT_CACHE_SIZE', '0')
+    classifier = IntentClassifier()
+    messages = ["hello", "what skils does he have", "list his projcts", "his linkedin please", "ok", "", "howdy"]
+    batch = classifier.classify_many(messages)
+    single = [classifier.classify(message) for message in messages]
+    assert [intent for intent, _ in batch] == [intent for intent, _ in single]
+    assert [confidence for _, confidence in batch] == pytest.approx([confidence for _, confidence in single])
+
+
+@pytest.mark.skipif(np is None, reason="the n-gram scorer needs NumPy")
+def test_ngram_scorer_catches_typos_the_keywords_miss(classifier, keywords_only):
+    assert keywords_only.classify("what skils does he have")[0] == 'default'
+    assert classifier.classify("what skils does he have")[0] == 'skills'
+    assert classifier.classify("what is the weather today")[0] == 'default'
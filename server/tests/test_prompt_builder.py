@@ -0,0 +1,94 @@
+import pytest
+
+from services.prompt_builder import (MESSAGE_OVERHEAD_TOKENS, SECTION_SEPARATOR, PromptBuilder, conversation_turns,
+                                     estimate_tokens)
+from services.sessions import Turn
+
+INSTRUCTIONS = "Answer from the data."
+
+
+def section(name, tokens):
+    """A context section estimated at exactly `tokens` tokens"""
+    text = f"{name}: "
+    return text + 'x' * ((tokens - 1) * 4 - len(text))
+
+
+def exchange(question, answer):
+    return [Turn('user', question, 0.0), Turn('assistant', answer, 0.0)]
+
+
+def builder(limit):
+    return PromptBuilder(INSTRUCTIONS, token_budget=limit, headroom=0.0)
+
+
+def base_tokens(question):
+    prompt_builder = builder(10_000)
+    return prompt_builder.instruction_tokens + estimate_tokens(question) + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_headroom_lowers_the_limit():
+    assert PromptBuilder(INSTRUCTIONS, token_budget=1400, headroom=0.15).limit == 1190
+
+
+def test_sections_are_kept_in_order_until_the_budget_runs_out():
+    question = "what are his skills"
+    sections = [section('SKILLS', 50), section('PROJECTS', 100), section('CONTACT', 30)]
+    prompt = builder(base_tokens(question) + 51 + 31).build(sections, question, question)
+
+    system = prompt.messages[0]["content"]
+    assert system.endswith(SECTION_SEPARATOR.join([sections[0], sections[2]]))
+    assert (prompt.sections, prompt.dropped_sections) == (2, 1)
+    assert prompt.estimated_tokens <= base_tokens(question) + 82
+
+
+def test_first_section_is_kept_even_over_budget():
+    question = "projects"
+    prompt = builder(10).build([section('PROJECTS', 500)], question, question)
+    assert prompt.sections == 1
+    assert "PROJECTS" in prompt.messages[0]["content"]
+
+
+def test_a_string_is_one_section():
+    prompt = builder(10_000).build("SKILLS: python" + SECTION_SEPARATOR + "CONTACT: email", "q", "q")
+    assert prompt.sections == 1
+
+
+def test_conversation_turns_group_replies_with_their_question():
+    orphan = Turn('assistant', "reply to an evicted question", 0.0)
+    history = [orphan, *exchange("q1", "a1"), Turn('user', "q2", 0.0)]
+    assert [[turn.content for turn in group] for group in conversation_turns(history)] == [["q1", "a1"], ["q2"]]
+
+
+def test_oldest_exchanges_are_dropped_whole():
+    question = "and the second one?"
+    old, recent = exchange("which projects?", "a" * 400), exchange("tell me about FlashChat", "b" * 40)
+    recent_tokens = sum(estimate_tokens(turn.content) + MESSAGE_OVERHEAD_TOKENS for turn in recent)
+    limit = base_tokens(question) + 11 + recent_tokens + 20
+    prompt = builder(limit).build([section('PROJECTS', 10)], question, question, old + recent)
+
+    contents = [message["content"] for message in prompt.messages[1:-1]]
+    assert contents == ["tell me about FlashChat", "b" * 40]
+    assert prompt.history_turns == 2
+    assert prompt.messages[-1] == {"role": "user", "content": question}
+
+
+def test_history_never_displaces_the_first_section():
+    question = "more?"
+    prompt = builder(base_tokens(question) + 11).build(
+        [section('PROJECTS', 10)], question, question, exchange("q", "a" * 200))
+    assert prompt.history_turns == 0
+    assert prompt.sections == 1
+
+
+def test_enhancement_note_is_added_only_when_it_fits():
+    original, enhanced = "skills?", "What are Anirudh's technical skills?"
+    roomy = builder(10_000).build(["SKILLS: python"], enhanced, original)
+    assert roomy.messages[-1]["role"] == 'system' and original in roomy.messages[-1]["content"]
+
+    tight = builder(base_tokens(enhanced) + 5).build(["SKILLS: python"], enhanced, original)
+    assert tight.messages[-1] == {"role": "user", "content": enhanced}
+
+
+@pytest.mark.parametrize('text, tokens', [("", 1), ("abcd", 2), ("a" * 40, 11)])
+def test_estimate_tokens(text, tokens):
+    assert estimate_tokens(text) == tokens
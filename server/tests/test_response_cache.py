@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from services import response_cache
+from services.response_cache import ResponseCache, normalize_question
+
+
+@pytest.fixture
+def cache(monkeypatch, clock, portfolio_store):
+    monkeypatch.setenv('RESPONSE_CACHE_MAX_ENTRIES', '2')
+    monkeypatch.setenv('RESPONSE_CACHE_TTL', '60')
+    monkeypatch.setattr(response_cache, 'time', clock)
+    return ResponseCache(portfolio_store)
+
+
+def test_normalize_question():
+    assert normalize_question("  What are his SKILLS?!  ") == "what are his skills"
+
+
+def test_hit_on_normalized_question(cache):
+    cache.set("What are his skills?", {"response": "Python"})
+    assert cache.get("what are his skills") == {"response": "Python"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("first", {"response": "1"})
+    cache.set("second", {"response": "2"})
+    cache.get("first")
+    cache.set("third", {"response": "3"})
+
+    assert cache.get("second") is None
+    assert cache.get("first") == {"response": "1"}
+    assert cache.get("third") == {"response": "3"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("skills", {"response": "Python"})
+    clock.advance(59)
+    assert cache.get("skills") is not None
+    clock.advance(2)
+    assert cache.get("skills") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_new_data_version_invalidates_entries(cache, portfolio_store):
+    cache.set("skills", {"response": "Python"})
+    path = portfolio_store.data_path
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    data["updated_date"] = "tomorrow"
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    assert portfolio_store.reload()
+
+    assert cache.get("skills") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_near_duplicates_only_match_within_an_intent(monkeypatch, portfolio_store):
+    monkeypatch.setenv('RESPONSE_CACHE_SIMILARITY', '0.5')
+    intents = {"show his projects": 'projects', "show his projects please": 'projects', "show his skills": 'skills'}
+    cache = ResponseCache(portfolio_store, classify=lambda key: intents.get(key, 'default'))
+    cache.set("show his projects", {"response": "projects"})
+
+    assert cache.get("show his projects please") == {"response": "projects"}
+    assert cache.get("show his skills") is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_disabled_cache_stores_nothing(monkeypatch, portfolio_store):
+    monkeypatch.setenv('RESPONSE_CACHE_ENABLED', 'false')
+    cache = ResponseCache(portfolio_store)
+    cache.set("skills", {"response": "Python"})
+    assert cache.get("skills") is None
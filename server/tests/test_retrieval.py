@@ -0,0 +1,63 @@
+import pytest
+
+from services.retrieval import BM25Index, PortfolioRetriever, np, tokenize
+
+
+def test_tokenize_drops_stop_words_and_stems_plurals():
+    assert tokenize("What are his Projects and technologies?") == ['project', 'technology']
+
+
+def test_bm25_prefers_rare_terms_and_short_documents():
+    index = BM25Index([
+        ['python', 'flask', 'api'],
+        ['python', 'react'],
+        ['python', 'react', 'node', 'mongodb', 'express', 'docker'],
+    ])
+    flask, react_short, react_long = index.scores(['flask'])[0], *index.scores(['react'])[1:]
+    assert index.scores(['flask'])[1:] == [0.0, 0.0]
+    assert react_short > react_long > 0
+    # "python" is in every document, so it says less than "flask"
+    assert flask > index.scores(['python'])[0]
+    assert index.scores(['kubernetes']) == [0.0, 0.0, 0.0]
+
+
+def test_repeated_query_terms_count_once():
+    index = BM25Index([['python'], ['react']])
+    assert index.scores(['python', 'python']) == index.scores(['python'])
+
+
+@pytest.fixture(scope='module')
+def retriever(portfolio_data):
+    return PortfolioRetriever(portfolio_data, use_embeddings=False)
+
+
+def test_a_named_project_is_retrieved(retriever):
+    keys = [chunk.key for chunk, _ in retriever.search("tell me about typomaster")]
+    assert 'TypoMaster Web App' in keys
+    assert 'FlashChat' not in keys
+
+
+def test_a_named_section_is_boosted(retriever):
+    sections = {chunk.section for chunk, _ in retriever.search("what skills does he have")}
+    assert 'skills' in sections
+
+
+def test_selection_stays_within_the_token_budget(portfolio_data):
+    retriever = PortfolioRetriever(portfolio_data, token_budget=120, use_embeddings=False)
+    chunks = retriever.select("projects skills certifications achievements")
+    assert chunks
+    assert sum(chunk.tokens for chunk in chunks) <= 120
+
+
+def test_unmatched_question_falls_back_to_the_profile(retriever):
+    assert retriever.relevant_sections("zzz qqq") == [retriever.default]
+
+
+def test_empty_portfolio():
+    assert PortfolioRetriever({}).relevant_sections("projects") == ["No portfolio data available."]
+
+
+@pytest.mark.skipif(np is None, reason="hashed embeddings need NumPy")
+def test_misspelled_terms_map_to_indexed_ones(portfolio_data):
+    retriever = PortfolioRetriever(portfolio_data, use_embeddings=True)
+    assert 'TypoMaster Web App' in [chunk.key for chunk, _ in retriever.search("typomastr")]
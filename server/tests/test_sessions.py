@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from services import sessions
+from services.sessions import (MemorySessionStore, SqliteSessionStore, create_session_store, new_session_id,
+                               valid_session_id)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, monkeypatch, clock, tmp_path):
+    monkeypatch.setattr(sessions, 'time', clock)
+    if request.param == 'memory':
+        return MemorySessionStore(max_exchanges=2, max_chars=40, ttl=60, max_sessions=3)
+    return SqliteSessionStore(str(tmp_path / 'sessions.sqlite3'), max_exchanges=2, max_chars=40, ttl=60)
+
+
+def contents(store, session_id):
+    return [(turn.role, turn.content) for turn in store.history(session_id)]
+
+
+def test_session_ids():
+    session_id = new_session_id()
+    assert valid_session_id(session_id)
+    assert session_id != new_session_id()
+    for bad in (None, 42, "short", "x" * 65, "has spaces in it", "../../etc/passwd"):
+        assert not valid_session_id(bad)
+
+
+def test_exchanges_are_kept_in_order(store):
+    store.append("s1", "which projects?", "FlashChat and TypoMaster")
+    assert contents(store, "s1") == [('user', "which projects?"), ('assistant', "FlashChat and TypoMaster")]
+    assert store.history("unknown") == []
+
+
+def test_only_the_newest_exchanges_are_kept(store):
+    for i in range(4):
+        store.append("s1", f"q{i}", f"a{i}")
+    assert contents(store, "s1") == [('user', "q2"), ('assistant', "a2"), ('user', "q3"), ('assistant', "a3")]
+
+
+def test_long_messages_are_truncated_at_a_word(store):
+    store.append("s1", "short", "one two three four five six seven eight nine ten")
+    answer = store.history("s1")[1].content
+    assert answer.endswith(" …")
+    assert len(answer) <= 42
+    assert answer.startswith("one two") and "nine" not in answer
+
+
+def test_idle_sessions_expire(store, clock):
+    store.append("s1", "q", "a")
+    clock.advance(59)
+    assert store.history("s1")
+    clock.advance(2)
+    assert store.history("s1") == []
+
+
+def test_an_expired_session_starts_afresh(store, clock):
+    store.append("s1", "old", "answer")
+    clock.advance(61)
+    store.append("s1", "new", "answer")
+    assert contents(store, "s1") == [('user', "new"), ('assistant', "answer")]
+
+
+def test_memory_store_keeps_the_most_recent_sessions(monkeypatch, clock):
+    monkeypatch.setattr(sessions, 'time', clock)
+    store = MemorySessionStore(max_exchanges=2, max_chars=40, ttl=60, max_sessions=2)
+    store.append("s1", "q", "a")
+    store.append("s2", "q", "a")
+    store.append("s1", "q", "a")
+    store.append("s3", "q", "a")
+    assert store.history("s2") == []
+    assert store.history("s1") and store.history("s3")
+    assert store.stats()["evictions"] == 1
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    SqliteSessionStore(path, max_exchanges=2, max_chars=40, ttl=60).append("s1", "q", "a")
+    other = SqliteSessionStore(path, max_exchanges=2, max_chars=40, ttl=60)
+    assert [turn.content for turn in other.history("s1")] == ["q", "a"]
+
+
+def test_sqlite_sweep_removes_idle_sessions(monkeypatch, clock, tmp_path):
+    monkeypatch.setattr(sessions, 'time', clock)
+    store = SqliteSessionStore(str(tmp_path / 'sessions.sqlite3'), 2, 40, ttl=60, sweep_interval=0)
+    store.append("s1", "q", "a")
+    clock.advance(61)
+    store.append("s2", "q", "a")
+    assert store.stats()["sessions"] == 1
+    assert store.stats()["evictions"] == 1
+
+
+@pytest.mark.parametrize('workers, backend', [('1', 'memory'), ('4', 'sqlite')])
+def test_default_backend_follows_the_worker_count(monkeypatch, tmp_path, workers, backend):
+    monkeypatch.delenv('SESSION_STORE', raising=False)
+    monkeypatch.setenv('WEB_CONCURRENCY', workers)
+    monkeypatch.setenv('SESSION_DB_PATH', str(tmp_path / 'sessions.sqlite3'))
+    assert create_session_store().backend == backend
+
+
+def test_sessions_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv('SESSION_STORE', 'off')
+    assert create_session_store() is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for name in ('GROQ_API_KEY', 'FIREWORKS_API_KEY', 'SESSION_STORE'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    monkeypatch.setenv('HEALTH_PROBE_ENABLED', 'false')
+    from app import create_app
+    app = create_app()
+    return app, app.test_client()
+
+
+def test_chat_mints_a_session_and_remembers_follow_ups(client):
+    app, test_client = client
+    first = test_client.post('/api/chat', json={"message": "what are his skills"}).get_json()
+    session_id = first["session_id"]
+    assert valid_session_id(session_id)
+
+    second = test_client.post('/api/chat', json={"message": "and his projects?", "session_id": session_id}).get_json()
+    assert second["session_id"] == session_id
+    history = app.extensions['aniru'].session_store.history(session_id)
+    assert [turn.content for turn in history if turn.role == 'user'] == ["what are his skills", "and his projects?"]
+
+
+def test_invalid_session_id_is_replaced(client):
+    _, test_client = client
+    response = test_client.post('/api/chat', json={"message": "hello", "session_id": "not valid!"}).get_json()
+    assert response["session_id"] != "not valid!"
+    assert valid_session_id(response["session_id"])
+
+
+def test_stream_reports_the_session_and_records_the_exchange(client):
+    app, test_client = client
+    body = test_client.post('/api/chat/stream', json={"message": "how can i contact him"}).get_data(as_text=True)
+    meta = body.split("\n\n")[0]
+    assert meta.startswith("event: meta")
+    session_id = json.loads(meta.split("data: ", 1)[1])["session_id"]
+    history = app.extensions['aniru'].session_store.history(session_id)
+    assert [turn.role for turn in history] == ['user', 'assistant']
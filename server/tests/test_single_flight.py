@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flight.do, "q", work)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "q", work) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result(5)] + [future.result(5) for future in followers]
+
+    assert calls == [1]
+    assert results == [("answer", False)] + [("answer", True)] * 3
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "q", fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, "q", fail)
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="upstream down"):
+                future.result(5)
+
+    assert flight.do("q", lambda: "recovered") == ("recovered", False)
+
+
+def test_finished_calls_are_not_reused():
+    flight = SingleFlight()
+    assert flight.do("q", lambda: 1) == (1, False)
+    assert flight.do("q", lambda: 2) == (2, False)
+    assert flight.stats()["executions"] == 2
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+    assert flight.do("q", lambda: 1) == (1, False)
+    assert flight.stats()["executions"] == 0
+
+
+def test_async_callers_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("q", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == [("answer", False), ("answer", True), ("answer", True)]
+    assert calls == [1]
+
+
+def test_async_work_survives_the_leader_being_cancelled():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ("answer", True)